@@ -1,11 +1,10 @@
-from flask import Flask, jsonify, request, send_file
+from flask import Flask, Response, jsonify, request, send_file
 import logging
-import psycopg2
-from psycopg2.extras import RealDictCursor
-import requests
 import os
 from pathlib import Path
 from config import CS2_DEMO_DIRECTORY
+from cogs.helpers.events import EVENT_CHANNEL, LiveTrackingRequested, encode_event
+from cogs.helpers.metrics import metrics
 
 log: logging.Logger = logging.getLogger(__name__)
 
@@ -13,6 +12,9 @@ app = Flask(__name__)
 
 def get_sync_db_connection():
     import start # avoiding circular import
+    import psycopg2
+    from psycopg2.extras import RealDictCursor
+
     conn_opts = start.db_connection_options()
     del conn_opts['min_size']
     del conn_opts['max_size']
@@ -29,26 +31,26 @@ def health_check():
     """Health check endpoint."""
     return jsonify({"status": "healthy"})
 
+@app.route('/metrics')
+def prometheus_metrics():
+    """Bot latency histograms and error counts in Prometheus text format."""
+    return Response(metrics.render_prometheus(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/guelo_start', methods=['POST'])
 def guelo_start():
     try:
-        data = request.get_json() or {}
+        data = request.get_json(silent=True) or {}
         image_url = data.get('image_url')
         
-        log.info(f"Received /guelo_start request with image_url: {image_url}, contacting internal server")
+        log.info(f"Received /guelo_start request with image_url: {image_url}, publishing {LiveTrackingRequested.type}")
         
-        payload = {}
-        if image_url:
-            payload['image_url'] = image_url
-            
-        response = requests.post(
-            'http://127.0.0.1:8081/start-live-tracking',
-            json=payload if payload else None,
-            timeout=5
-        )
-        return '', response.status_code
-    except requests.exceptions.RequestException as e:
-        log.info(f"Error contacting internal server: {e}")
+        # the cs2 cog picks this up from the event bus, the notification is sent when the connection commits
+        with get_sync_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT pg_notify(%s, %s)", (EVENT_CHANNEL, encode_event(LiveTrackingRequested(image_url))))
+        return '', 202
+    except Exception as e:
+        log.error(f"Error publishing {LiveTrackingRequested.type}: {e}")
         return '', 500
 
 @app.route('/match_history')
@@ -1,12 +1,29 @@
-from discord.ext import commands
+from discord.ext import commands, tasks
+import asyncio
 import discord
+import functools
+import hashlib
+import inspect
+import json
 import logging
+import time
 import config
 from aiohttp import ClientSession
 import asyncpg
 import datetime
 
-from typing import Optional
+from typing import Dict, List, Optional
+
+from cogs.helpers.bot_state import BotStateDb
+from cogs.helpers.db_instrumentation import InstrumentedPool
+from cogs.helpers.dm import DmBroadcaster
+from cogs.helpers.events import EventBus
+from cogs.helpers.http_service import HttpService
+from cogs.helpers.identity import IdentityMap
+from cogs.helpers.imports import import_profiler
+from cogs.helpers.message_pipeline import MessagePipeline
+from cogs.helpers.metrics import metrics
+from cogs.helpers.sharding import parse_shard_ids, shard_for_guild, validate_sharding
 
 log: logging.Logger = logging.getLogger(__name__)
 
@@ -39,24 +56,71 @@ def setup_intents():
     intents.message_content = True
     return intents
 
-class Zhenpai(commands.Bot):
+def _timed_loop_coro(coro, name: str):
+    @functools.wraps(coro)
+    async def timed(*args, **kwargs):
+        with metrics.timer('loop', name):
+            return await coro(*args, **kwargs)
+    timed.__instrumented__ = True
+    return timed
+
+class Zhenpai(commands.AutoShardedBot):
+    """
+    Runs the shards in `shard_ids` out of `shard_count` (config SHARD_IDS / SHARD_COUNT), all of them
+    when unset, so the bot can be split over several processes that each hold only their own guilds'
+    member and presence caches. Guild-scoped state stays correct as long as each process only loads
+    and acts on the guilds it owns (see owns_guild); anything process-wide runs only where is_primary.
+    """
     def __init__(self, 
         http_client: ClientSession, 
         db_pool: asyncpg.pool,
-        testing_guild_id: Optional[int] = None
+        testing_guild_id: Optional[int] = None,
+        cogs: Optional[List[str]] = None,
+        shard_count: Optional[int] = config.SHARD_COUNT,
+        shard_ids: Optional[List[int]] = None
     ):
+        if shard_ids is None:
+            shard_ids = parse_shard_ids(config.SHARD_IDS)
+        validate_sharding(shard_count, shard_ids)
         super().__init__(
             command_prefix=config.COMMAND_PREFIX, 
             owner_id=config.OWNER_ID, 
-            intents=setup_intents()
+            intents=setup_intents(),
+            shard_count=shard_count,
+            shard_ids=shard_ids
         )
         self.http_client = http_client
-        self.db_pool = db_pool
+        # Cogs should fetch through this rather than http_client directly (`http` is taken by discord.py)
+        self.http_service = HttpService(http_client)
+        # Cogs register message handlers here instead of adding their own on_message listeners
+        self.message_pipeline = MessagePipeline(config.COMMAND_PREFIX)
+        # Records every query's latency in metrics, otherwise behaves like the asyncpg pool
+        self.db_pool = InstrumentedPool(db_pool)
         self.testing_guild_id = testing_guild_id or config.TESTING_GUILD_ID
+        # start.py --cogs boots a subset for faster dev startup
+        self.initial_extensions = cogs if cogs is not None else extensions
         self.start_time = datetime.datetime.now()
+        # Shared so DM failure cooldowns apply across cogs
+        self.dms = DmBroadcaster()
+        # Cogs publish and subscribe to cross-cog events here instead of polling each other's tables
+        self.events = EventBus(self.db_pool)
+        # steamid64 <-> discord id resolution without hitting the users table
+        self.identities = IdentityMap(self.db_pool, self.events)
+
+    @property
+    def is_primary(self) -> bool:
+        """ Whether this process runs the process-wide singletons, see config.PRIMARY_SHARD_ID. """
+        return self.shard_ids is None or config.PRIMARY_SHARD_ID in self.shard_ids
+
+    def owns_guild(self, guild_id: int) -> bool:
+        """ Whether the guild's events come to this process. """
+        if self.shard_ids is None:
+            return True
+        return shard_for_guild(guild_id, self.shard_count) in self.shard_ids
 
     async def on_ready(self):
         log.info('Logged in as: %s', self.user)
+        log.info('Shards: %s of %s%s', self.shard_ids or 'all', self.shard_count, ' (primary)' if self.is_primary else '')
         log.info('Discord.py version: %s', discord.__version__)
         log.info('Commit hash: %s', config.COMMIT_HASH)
 
@@ -88,26 +152,122 @@ class Zhenpai(commands.Bot):
 
         log.warning('%s - %s - %s', ctx.message.content, error, type(error))
     
+    async def invoke(self, ctx: commands.Context) -> None:
+        if ctx.command is None:
+            return await super().invoke(ctx)
+        start = time.perf_counter()
+        # errors are handled and swallowed inside, command_failed says whether there was one
+        await super().invoke(ctx)
+        metrics.observe('command', ctx.command.qualified_name, time.perf_counter() - start, error=ctx.command_failed)
+
+    async def on_app_command_completion(self, interaction: discord.Interaction, command) -> None:
+        elapsed = (discord.utils.utcnow() - interaction.created_at).total_seconds()
+        metrics.observe('app_command', command.qualified_name, elapsed)
+
+    async def _run_event(self, coro, event_name: str, *args, **kwargs) -> None:
+        # Every listener, cog or not, is run through here by discord.py
+        name = getattr(coro, '__qualname__', event_name)
+
+        async def timed(*args, **kwargs):
+            with metrics.timer('listener', name):
+                await coro(*args, **kwargs)
+
+        await super()._run_event(timed, event_name, *args, **kwargs)
+
+    async def add_cog(self, cog: commands.Cog, *args, **kwargs) -> None:
+        await super().add_cog(cog, *args, **kwargs)
+        self._instrument_loops(cog)
+
+    def _instrument_loops(self, cog: commands.Cog) -> None:
+        """ Time every iteration of the cog's tasks.loop tasks. """
+        for attr_name, _ in inspect.getmembers(type(cog), lambda member: isinstance(member, tasks.Loop)):
+            loop = getattr(cog, attr_name)
+            if getattr(loop.coro, '__instrumented__', False):
+                continue
+            loop.coro = _timed_loop_coro(loop.coro, f'{type(cog).__name__}.{attr_name}')
+
     async def on_message(self, message: discord.Message) -> None:
+        self.message_pipeline.dispatch(message)
         if message.author.bot:
             return
         await self.process_commands(message)
 
     async def setup_hook(self) -> None:
-        for ext in extensions:
-            await self.load_extension(extensions_dir.format(ext))
-            log.info('Loaded extension: %s', ext)
-        
-        # Sync app_commands for testing guild
-        if self.testing_guild_id:
-            log.info(f'Syncing global commands to {self.testing_guild_id}')
-            guild = discord.Object(self.testing_guild_id)
-            self.tree.copy_global_to(guild=guild)
-            await self.tree.sync(guild=guild)
-            log.info(f'Finished syncing global commands')
-
-        # This would also be a good place to connect to our database and
-        # load anything that should be in memory prior to handling events.
+        # Cogs don't depend on each other at load time, so their imports and cog_load db reads can overlap,
+        # along with syncing users.json into the db and starting the event bus
+        timings: Dict[str, float] = {}
+        start = time.perf_counter()
+        await asyncio.gather(
+            *([self._load_users(timings)] if self.is_primary else []),
+            self._start_events(timings),
+            *(self._load_extension_timed(ext, timings) for ext in self.initial_extensions)
+        )
+
+        # Sync app_commands for testing guild, once for all processes
+        if self.testing_guild_id and self.is_primary:
+            sync_start = time.perf_counter()
+            await self._sync_commands_if_changed(discord.Object(self.testing_guild_id))
+            timings['command sync'] = time.perf_counter() - sync_start
+
+        breakdown = ', '.join(f'{name} {seconds:.2f}s' for name, seconds in
+                              sorted(timings.items(), key=lambda item: item[1], reverse=True))
+        log.info(f'Startup took {time.perf_counter() - start:.2f}s: {breakdown}')
+        if import_profiler.installed:
+            # Everything startup needs is imported by now, later imports are lazy loads worth paying for
+            log.info(import_profiler.report())
+            import_profiler.uninstall()
+
+    async def _load_extension_timed(self, ext: str, timings: Dict[str, float]) -> None:
+        start = time.perf_counter()
+        await self.load_extension(extensions_dir.format(ext))
+        timings[ext] = time.perf_counter() - start
+        log.info('Loaded extension: %s', ext)
+
+    async def _load_users(self, timings: Dict[str, float]) -> None:
+        from load_users import load_users_from_json
+
+        start = time.perf_counter()
+        await load_users_from_json(self.db_pool)
+        timings['users.json'] = time.perf_counter() - start
+
+    async def _start_events(self, timings: Dict[str, float]) -> None:
+        start = time.perf_counter()
+        await self.events.start()
+        await self.identities.reload()
+        timings['events + identities'] = time.perf_counter() - start
+
+    def _command_tree_hash(self, guild: discord.abc.Snowflake) -> str:
+        """ Hash of the payload tree.sync would upload, so syncing can be skipped when nothing changed. """
+        payload = sorted((command.to_dict(self.tree) for command in self.tree.get_commands(guild=guild)),
+                         key=lambda command: (command.get('type', 1), command['name']))
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+    async def _sync_commands_if_changed(self, guild: discord.abc.Snowflake) -> None:
+        """ Sync is a slow, rate limited call, only make it when the command tree differs from the last sync. """
+        self.tree.copy_global_to(guild=guild)
+        tree_hash = self._command_tree_hash(guild)
+        state = BotStateDb(self.db_pool)
+        key = f'command_tree_hash:{guild.id}'
+        try:
+            synced_hash = await state.get(key)
+        except Exception:
+            log.exception('Could not read the last synced command tree hash, syncing anyway')
+            synced_hash = None
+        if synced_hash == tree_hash:
+            log.info(f'Commands for {guild.id} unchanged since last sync, skipping')
+            return
+
+        log.info(f'Syncing global commands to {guild.id}')
+        await self.tree.sync(guild=guild)
+        log.info(f'Finished syncing global commands')
+        try:
+            await state.set(key, tree_hash)
+        except Exception:
+            log.exception('Could not store the synced command tree hash')
+
+    async def close(self) -> None:
+        await self.events.stop()
+        await super().close()
 
     async def _run(self):
         await self.start(config.DISCORD_BOT_TOKEN)
\ No newline at end of file
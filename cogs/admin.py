@@ -1,10 +1,12 @@
 import discord
 from discord.ext import commands
 import logging
-import subprocess
 import config
 import datetime
 from bot import Zhenpai
+from .helpers.db_instrumentation import SLOW_QUERY_SECONDS, profiler
+from .helpers.log_pipeline import log_buffer
+from .helpers.metrics import metrics
 
 from typing import Optional
 
@@ -64,17 +66,87 @@ class Admin(commands.Cog):
 
     @commands.command(hidden=True)
     @commands.is_owner()
-    async def logs(self, ctx: commands.Context, lines: Optional[int]):
-        num_lines = str(lines) if lines else '20'
+    async def logs(self, ctx: commands.Context, lines: Optional[int], level: str = 'INFO'):
+        """Recent log lines from memory, optionally only WARNING/ERROR and up: !logs 50 warning"""
+        levelno = logging.getLevelName(level.upper())
+        if not isinstance(levelno, int):
+            await ctx.send(f'Unknown level {level}.')
+            return
+
+        recent = log_buffer.tail(lines or 20, levelno)
+        # keep the newest lines that fit in one message
+        logs_str = ''
+        for line in reversed(recent):
+            line = line if len(line) <= 500 else line[:497] + '...'
+            if len(logs_str) + len(line) + 1 > 1900:
+                break
+            logs_str = f'{line}\n{logs_str}'
+        if not logs_str:
+            await ctx.send('No log lines buffered.')
+            return
+        # yaml formatting for some random colorations :shrug:
+        await ctx.send(f'```yaml\n{logs_str}```')
 
-        try:
-            logs = subprocess.check_output(['tail', '-n', num_lines, 'info.log'], stderr=subprocess.STDOUT)
-            logs_str = logs.decode('utf-8')
-            # yaml formatting for some random colorations :shrug:
-            await ctx.send(f'```yaml\n{logs_str}```')
-        except subprocess.CalledProcessError as e:
-            await ctx.send(f'Error retrieving logs: {e.output.decode("utf-8")}')
+    @commands.command(hidden=True)
+    @commands.is_owner()
+    async def perf(self, ctx: commands.Context, kind: Optional[str] = None, limit: int = 15):
+        """Slowest commands/listeners/loops/handlers/db queries by p95, optionally only one kind"""
+        rows = metrics.top(kind, max(1, min(limit, 20)))
+        if not rows:
+            await ctx.send('No samples recorded yet.')
+            return
+
+        lines = [f'{"kind":<12}{"name":<28}{"count":>7}{"err":>5}{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}']
+        for series, (p50, p95, p99) in rows:
+            lines.append(f'{series.kind:<12}{series.name[:27]:<28}{series.count:>7}{series.errors:>5}'
+                         f'{p50 * 1000:>9.1f}{p95 * 1000:>9.1f}{p99 * 1000:>9.1f}')
+        await ctx.send('```\n' + '\n'.join(lines) + '\n```')
 
+    @commands.group(invoke_without_command=True, hidden=True)
+    @commands.is_owner()
+    async def dbprof(self, ctx: commands.Context, limit: int = 10):
+        """Db methods by total query time over the last hour"""
+        profiles = profiler.top(max(1, min(limit, 20)))
+        if not profiles:
+            await ctx.send('No queries recorded in the last hour.')
+            return
+
+        lines = [f'{"method":<40}{"count":>7}{"total s":>9}{"avg ms":>9}{"max ms":>9}']
+        for profile in profiles:
+            slow = '*' if profile.caller in profiler.slow else ' '
+            lines.append(f'{slow}{profile.caller[:38]:<39}{profile.count:>7}{profile.total_seconds:>9.2f}'
+                         f'{profile.average_seconds * 1000:>9.1f}{profile.max_seconds * 1000:>9.1f}')
+        lines.append(f'* had a query over {SLOW_QUERY_SECONDS * 1000:.0f}ms, see !dbprof plan <method>')
+        await ctx.send('```\n' + '\n'.join(lines) + '\n```')
+
+    @dbprof.command(name='plan')
+    @commands.is_owner()
+    async def dbprof_plan(self, ctx: commands.Context, caller: str):
+        """Latest slow query and its EXPLAIN plan for a Db method"""
+        slow = profiler.slow.get(caller)
+        if not slow:
+            await ctx.send(f'No slow queries recorded for {caller}.')
+            return
+        plan = slow.plan or '(EXPLAIN pending or not available)'
+        await ctx.send(f'{caller} took {slow.seconds * 1000:.0f}ms at {slow.seen_at:%Y-%m-%d %H:%M:%S} UTC'
+                       f'```sql\n{slow.query[:700]}```\n```\n{plan[:1000]}```')
+
+    @dbprof.command(name='reset')
+    @commands.is_owner()
+    async def dbprof_reset(self, ctx: commands.Context):
+        profiler.reset()
+        await ctx.send('Query profile cleared.')
+
+    @commands.command(hidden=True)
+    @commands.is_owner()
+    async def handlers(self, ctx: commands.Context):
+        """Per-handler stats for the on_message pipeline"""
+        lines = [f'{"handler":<20}{"calls":>8}{"skipped":>9}{"errors":>7}{"avg ms":>9}{"max ms":>9}']
+        for handler in self.bot.message_pipeline.handlers.values():
+            stats = handler.stats
+            lines.append(f'{handler.name:<20}{stats.calls:>8}{stats.skipped:>9}{stats.errors:>7}'
+                         f'{stats.average_seconds * 1000:>9.2f}{stats.max_seconds * 1000:>9.2f}')
+        await ctx.send('```\n' + '\n'.join(lines) + '\n```')
 
     @commands.group(invoke_without_command=True, hidden=True)
     @commands.is_owner()
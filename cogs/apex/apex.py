@@ -2,14 +2,18 @@ from discord.ext import commands
 import discord
 import logging
 import datetime
+import time
 import config
 from bot import Zhenpai
 from .apex_embed_builder import ApexEmbedBuilder
-from .players import DEFAULT_PLAYERS, fetch_player_data, parse_player_info
+from .players import DEFAULT_PLAYERS, configure_api_limits, fetch_all_players, parse_player_info
 
 log: logging.Logger = logging.getLogger(__name__)
 
 API_URL = "https://api.mozambiquehe.re/maprotation?version=2"
+PROGRESS_EDIT_INTERVAL_SECONDS = 2
+# Only shown to the minute, and the end timestamp is preferred when present
+MAP_CACHE_TTL_SECONDS = 30
 
 
 class Apex(commands.Cog):
@@ -17,6 +21,7 @@ class Apex(commands.Cog):
 
     def __init__(self, bot: Zhenpai):
         self.bot = bot
+        configure_api_limits(bot)
 
     @commands.command()
     async def map(self, ctx: commands.Context):
@@ -26,15 +31,15 @@ class Apex(commands.Cog):
             return
 
         try:
-            async with self.bot.http_client.get(
-                API_URL, headers={"Authorization": api_key}
-            ) as resp:
-                if resp.status != 200:
-                    await ctx.send(
-                        f"Failed to fetch map rotation (status {resp.status})."
-                    )
-                    return
-                data = await resp.json()
+            resp = await self.bot.http_service.get(
+                API_URL, headers={"Authorization": api_key}, cache_ttl=MAP_CACHE_TTL_SECONDS
+            )
+            if resp.status != 200:
+                await ctx.send(
+                    f"Failed to fetch map rotation (status {resp.status})."
+                )
+                return
+            data = resp.json()
         except Exception as e:
             log.exception("Error fetching Apex map rotation: %s", e)
             await ctx.send("Error fetching map rotation.")
@@ -47,16 +52,15 @@ class Apex(commands.Cog):
         current_map_name = current.get("map") or "Unknown"
         next_map_name = next_map_info.get("map") or "Unknown"
 
-        remaining_secs = current.get("remainingSecs")
-        if remaining_secs is None:
-            end_ts = current.get("end")
-            if isinstance(end_ts, int):
-                now_seconds = int(
-                    datetime.datetime.now(datetime.timezone.utc).timestamp()
-                )
-                remaining_secs = max(0, end_ts - now_seconds)
-            else:
-                remaining_secs = 0
+        # Prefer the end timestamp, remainingSecs goes stale while the response is cached
+        end_ts = current.get("end")
+        if isinstance(end_ts, int):
+            now_seconds = int(
+                datetime.datetime.now(datetime.timezone.utc).timestamp()
+            )
+            remaining_secs = max(0, end_ts - now_seconds)
+        else:
+            remaining_secs = current.get("remainingSecs") or 0
 
         hours_remaining = remaining_secs // 3600
         minutes_remaining = (remaining_secs % 3600) // 60
@@ -92,42 +96,37 @@ class Apex(commands.Cog):
         message = await ctx.send(
             embed=ApexEmbedBuilder.create_progress_embed(processed, total_players)
         )
+        last_edit = time.monotonic()
 
-        try:
-            for i, player_uid in enumerate(DEFAULT_PLAYERS):
-                try:
-                    log.debug(
-                        "Fetching data for player UID %s (%d/%d)",
-                        player_uid,
-                        i + 1,
-                        total_players,
-                    )
-
-                    player_data = await fetch_player_data(self.bot, api_key, player_uid)
-                    if not player_data:
-                        log.warning("No data returned for player UID %s", player_uid)
-                        players_offline.append(player_uid)
-                        continue
-
-                    if isinstance(player_data, dict) and "error" in player_data:
-                        log.warning("API error for player UID %s", player_uid)
-                        players_offline.append(player_uid)
-                        continue
-
-                    player_info = parse_player_info(player_data, player_uid)
-                    if player_info["status"] == "in_game":
-                        players_in_game.append(player_info)
-                    elif player_info["status"] in ["online", "invite"]:
-                        players_online.append(player_info)
-                    else:
-                        players_offline.append(player_info)
-
-                except Exception as e:
-                    log.exception("Error processing player UID %s: %s", player_uid, e)
+        for fetch in fetch_all_players(self.bot, api_key, DEFAULT_PLAYERS):
+            player_uid, player_data = await fetch
+            try:
+                if not player_data:
+                    log.warning("No data returned for player UID %s", player_uid)
+                    players_offline.append(player_uid)
+                    continue
+
+                if isinstance(player_data, dict) and "error" in player_data:
+                    log.warning("API error for player UID %s", player_uid)
                     players_offline.append(player_uid)
-                finally:
-                    processed += 1
-                    # Update progress based on processed players
+                    continue
+
+                player_info = parse_player_info(player_data, player_uid)
+                if player_info["status"] == "in_game":
+                    players_in_game.append(player_info)
+                elif player_info["status"] in ["online", "invite"]:
+                    players_online.append(player_info)
+                else:
+                    players_offline.append(player_info)
+
+            except Exception as e:
+                log.exception("Error processing player UID %s: %s", player_uid, e)
+                players_offline.append(player_uid)
+            finally:
+                processed += 1
+                # Only edit the progress embed every so often, the final embed replaces it anyway
+                if processed < total_players and time.monotonic() - last_edit >= PROGRESS_EDIT_INTERVAL_SECONDS:
+                    last_edit = time.monotonic()
                     try:
                         await message.edit(
                             embed=ApexEmbedBuilder.create_progress_embed(
@@ -137,8 +136,6 @@ class Apex(commands.Cog):
                     except Exception:
                         # If message edit fails (deleted or perms), continue silently
                         pass
-        except Exception:
-            raise
 
         # Create and edit message with final embed
         try:
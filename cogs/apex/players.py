@@ -1,11 +1,19 @@
+import asyncio
 import logging
 from typing import Dict, Optional
 from bot import Zhenpai
 
 log: logging.Logger = logging.getLogger(__name__)
 
+API_HOST = "api.mozambiquehe.re"
 PLAYER_STATUS_URL = "https://api.mozambiquehe.re/bridge?version=5&platform=PC&uid={uid}"
 
+# mozambiquehe.re allows 2 requests per second on a default key
+API_REQUESTS_PER_SECOND = 2
+MAX_RATE_LIMIT_RETRIES = 3
+# Statuses are near-realtime on their end anyway, a short cache keeps repeated !playing calls free
+STATUS_CACHE_TTL_SECONDS = 30
+
 # These are their Origin UIDs. Just be mindful of rate limits if we have
 # a lot of players on this list
 DEFAULT_PLAYERS = [
@@ -29,31 +37,36 @@ DEFAULT_PLAYERS = [
 ]
 
 
-async def fetch_player_data(
-    bot: Zhenpai, api_key: str, player_uid: str
-) -> Optional[Dict]:
+async def fetch_player_data(bot: Zhenpai, api_key: str, player_uid: str) -> Optional[Dict]:
+    """Fetch a player's status. Rate limiting, 429 retries and the short status
+    cache are handled by the shared http service."""
     url = PLAYER_STATUS_URL.format(uid=player_uid)
 
     try:
         log.debug("Making API request to %s for player UID %s", url, player_uid)
-        async with bot.http_client.get(url, headers={"Authorization": api_key}) as resp:
-            if resp.status == 404:
-                log.info("Player UID %s not found", player_uid)
-                return None
-            elif resp.status == 429:
-                log.warning("Rate limited for player UID %s (429)", player_uid)
-                return {"error": "rate_limited", "message": "API rate limit exceeded"}
-            elif resp.status != 200:
-                log.warning(
-                    "HTTP error for player UID %s (status %s)",
-                    player_uid,
-                    resp.status,
-                )
-                return {"error": "http_error", "message": f"HTTP {resp.status}"}
-
-            data = await resp.json()
-            log.debug("Successfully fetched data for player UID %s", player_uid)
-            return data
+        resp = await bot.http_service.get(
+            url,
+            headers={"Authorization": api_key},
+            retries=MAX_RATE_LIMIT_RETRIES,
+            cache_ttl=STATUS_CACHE_TTL_SECONDS,
+        )
+        if resp.status == 404:
+            log.info("Player UID %s not found", player_uid)
+            return None
+        elif resp.status == 429:
+            log.warning("Rate limited for player UID %s (429)", player_uid)
+            return {"error": "rate_limited", "message": "API rate limit exceeded"}
+        elif resp.status != 200:
+            log.warning(
+                "HTTP error for player UID %s (status %s)",
+                player_uid,
+                resp.status,
+            )
+            return {"error": "http_error", "message": f"HTTP {resp.status}"}
+
+        data = resp.json()
+        log.debug("Successfully fetched data for player UID %s", player_uid)
+        return data
     except Exception as e:
         log.exception(
             "Network error fetching player data for UID %s: %s", player_uid, e
@@ -61,6 +74,24 @@ async def fetch_player_data(
         return {"error": "connection_error", "message": str(e)}
 
 
+def configure_api_limits(bot: Zhenpai) -> None:
+    bot.http_service.configure_host(
+        API_HOST, rate=API_REQUESTS_PER_SECOND, burst=API_REQUESTS_PER_SECOND
+    )
+
+
+def fetch_all_players(bot: Zhenpai, api_key: str, player_uids):
+    """Start fetches for every UID at once, the API rate limit paces them.
+    Yields (uid, data) awaitables in completion order, they never raise so the UID is always known."""
+    async def fetch_one(uid):
+        try:
+            return uid, await fetch_player_data(bot, api_key, uid)
+        except Exception as e:
+            log.exception("Unexpected error fetching player data for UID %s", uid)
+            return uid, {"error": "unexpected_error", "message": str(e)}
+    return asyncio.as_completed([fetch_one(uid) for uid in player_uids])
+
+
 def parse_player_info(data: Dict, player_name: str) -> Dict:
     global_info = data.get("global", {})
     realtime_info = data.get("realtime", {})
@@ -1,5 +1,4 @@
 import asyncio
-from aiohttp import web
 from datetime import datetime
 from config import LIVE_MATCH_CHANNEL_ID, GUELO_TEAMS_JSON_URL, FLASK_APP_HOST, FLASK_APP_PROTOCOL
 import logging
@@ -7,6 +6,8 @@ import discord
 from discord.ext import commands, tasks
 from typing import List, Dict, Any, Optional, Tuple
 from bot import Zhenpai
+from cogs.helpers.events import BetSettled, LiveTrackingRequested, MatchReplicated, PointsChanged
+from cogs.helpers.log_pipeline import SAMPLED
 from .db import CS2MySQLDb, CS2PostgresDb
 from .views import LiveMatchView
 
@@ -18,14 +19,17 @@ class CS2(commands.Cog):
     def __init__(self, bot: Zhenpai):
         self.bot = bot
         self.mysql_db = CS2MySQLDb()
-        self.postgres_db = CS2PostgresDb(bot.db_pool)
+        self.postgres_db = CS2PostgresDb(bot.db_pool, bot.identities)
         self.last_processed_match_id = 0
-        self.internal_port = 8081
         self.live_tracking_tasks = {}  # Store active tracking tasks
         self.live_messages = {}  # Store message references
 
     async def cog_load(self):
-        """Initialize database connections and start polling task."""
+        """Initialize database connections and start polling task, on the primary shard's process only."""
+        if not self.bot.is_primary:
+            log.info("CS2 replication and live matches run on the primary shard's process")
+            return
+        self.bot.events.subscribe(LiveTrackingRequested, self.start_live_tracking)
         try:
             await self.mysql_db.connect()
             log.info(f"CS2 cog loaded and mysql connected.")
@@ -37,6 +41,7 @@ class CS2(commands.Cog):
 
     async def cog_unload(self):
         """Clean up database connections and stop polling task."""
+        self.bot.events.unsubscribe(LiveTrackingRequested, self.start_live_tracking)
         self.poll_matches.cancel()
         
         # Cancel all live tracking tasks
@@ -48,40 +53,19 @@ class CS2(commands.Cog):
         await self.mysql_db.close()
         log.info("CS2 cog unloaded")
 
-    async def start_internal_server(self):
-        """Start internal HTTP server for communication with flask server"""
-        app = web.Application()
-        app.router.add_post('/start-live-tracking', self.start_live_tracking)
-        
-        runner = web.AppRunner(app)
-        await runner.setup()
-        
-        # Internal server on different port
-        site = web.TCPSite(runner, '127.0.0.1', self.internal_port)
-        await site.start()
-        
-        log.info(f"Internal server started on http://127.0.0.1:{self.internal_port}")
-
-    @commands.Cog.listener()
-    async def on_ready(self):
-        await self.start_internal_server()
-
 # region live tracking
-    async def start_live_tracking(self, request):
+    async def start_live_tracking(self, event: LiveTrackingRequested):
         """
-        Entry point that gets hit when guelo locks in a new match start.
+        Entry point that gets hit when guelo locks in a new match start, published by the flask app's /guelo_start.
         - Posts an embed to match channel.
         - Polls for the next new matchzy match from mysql
         - Polls and edits embed with live match score
         """
         try:
-            # Parse image URL from request
-            request_data = {}
-            if request.content_type == 'application/json':
-                request_data = await request.json()
-            image_url = request_data.get('image_url')
+            image_url = event.image_url
             
-            channel = self.bot.get_channel(LIVE_MATCH_CHANNEL_ID)
+            # The channel's guild may be on another process's shard, sending only needs the id
+            channel = self.bot.get_channel(LIVE_MATCH_CHANNEL_ID) or self.bot.get_partial_messageable(LIVE_MATCH_CHANNEL_ID)
             if channel:
                 if not image_url:
                     log.warning("didn't get image_url")
@@ -92,49 +76,45 @@ class CS2(commands.Cog):
                 team_win_odds = None
                 team_names = None
 
-                async with self.bot.http_client.get(GUELO_TEAMS_JSON_URL) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
+                resp = await self.bot.http_service.get(GUELO_TEAMS_JSON_URL)
+                if resp.status == 200:
+                    data = resp.json()
 
-                        # Extract team names and steamids from team data
-                        try:
-                            if 'team1' in data and 'players' in data['team1'] and 'name' in data['team1']:
-                                team1_name = data['team1']['name']
-                                team1_players = data['team1']['players']
-                                if isinstance(team1_players, dict):
-                                    team1_steamids = [int(steamid64) for steamid64 in team1_players.keys() if steamid64.isdigit()]
-                            else:
-                                log.warning("No team1 players found in data")
-
-                            if 'team2' in data and 'players' in data['team2'] and 'name' in data['team2']:
-                                team2_name = data['team2']['name']
-                                team2_players = data['team2']['players']
-                                if isinstance(team2_players, dict):
-                                    team2_steamids = [int(steamid64) for steamid64 in team2_players.keys() if steamid64.isdigit()]
-                            else:
-                                log.warning("No team2 players found in data")
-                            team_names = (team1_name, team2_name)
-
-                            # Calculate odds if we have enough players
-                            if len(team1_steamids) == 5 and len(team2_steamids) == 5:
-                                odds_data = await self.postgres_db.calculate_team_odds(team1_steamids, team2_steamids)
-                                team_win_odds = (odds_data['team1_odds'] / 100.0, odds_data['team2_odds'] / 100.0)
-                            else:
-                                log.warning("Not enough players to calculate odds, defaulting to 50/50")
-                                team_win_odds = (0.5, 0.5)
-                        except Exception as e:
-                            log.warning(f"Could not calculate odds: {e}")
-                    else:
-                        log.warning(f"Failed to fetch from {GUELO_TEAMS_JSON_URL} guelo teams json: {resp.status}")
-                        log.warning("can't do shit without team data")
+                    # Extract team names and steamids from team data
+                    try:
+                        if 'team1' in data and 'players' in data['team1'] and 'name' in data['team1']:
+                            team1_name = data['team1']['name']
+                            team1_players = data['team1']['players']
+                            if isinstance(team1_players, dict):
+                                team1_steamids = [int(steamid64) for steamid64 in team1_players.keys() if steamid64.isdigit()]
+                        else:
+                            log.warning("No team1 players found in data")
+
+                        if 'team2' in data and 'players' in data['team2'] and 'name' in data['team2']:
+                            team2_name = data['team2']['name']
+                            team2_players = data['team2']['players']
+                            if isinstance(team2_players, dict):
+                                team2_steamids = [int(steamid64) for steamid64 in team2_players.keys() if steamid64.isdigit()]
+                        else:
+                            log.warning("No team2 players found in data")
+                        team_names = (team1_name, team2_name)
+
+                        # Calculate odds if we have enough players
+                        if len(team1_steamids) == 5 and len(team2_steamids) == 5:
+                            odds_data = await self.postgres_db.calculate_team_odds(team1_steamids, team2_steamids)
+                            team_win_odds = (odds_data['team1_odds'] / 100.0, odds_data['team2_odds'] / 100.0)
+                        else:
+                            log.warning("Not enough players to calculate odds, defaulting to 50/50")
+                            team_win_odds = (0.5, 0.5)
+                    except Exception as e:
+                        log.warning(f"Could not calculate odds: {e}")
+                else:
+                    log.warning(f"Failed to fetch from {GUELO_TEAMS_JSON_URL} guelo teams json: {resp.status}")
+                    log.warning("can't do shit without team data")
 
                 # Convert steamids to discord_ids for team rosters
-                team1_discord_ids = []
-                team2_discord_ids = []
-                if team1_steamids:
-                    team1_discord_ids = await self.postgres_db.get_discord_ids_from_steamids(team1_steamids)
-                if team2_steamids:
-                    team2_discord_ids = await self.postgres_db.get_discord_ids_from_steamids(team2_steamids)
+                team1_discord_ids = self.bot.identities.discord_ids_for(team1_steamids)
+                team2_discord_ids = self.bot.identities.discord_ids_for(team2_steamids)
                 team_rosters = (team1_discord_ids, team2_discord_ids)
 
                 # get the next match id that will be created
@@ -164,11 +144,8 @@ class CS2(commands.Cog):
                 task = asyncio.create_task(self.poll_live_match(tracking_id, live_view))
                 self.live_tracking_tasks[tracking_id] = task
                 log.info(f"Started live tracking task: {tracking_id}")
-
-            return web.Response(text='')
         except Exception as e:
-            print(f"Discord action error: {e}")
-            return web.Response(text='Error', status=500)
+            log.error(f"Discord action error: {e}")
         
     async def poll_live_match(self, tracking_id: str, live_view: 'LiveMatchView'):
         """Poll for new matches and start score tracking when found."""
@@ -340,7 +317,7 @@ class CS2(commands.Cog):
         """Poll the MatchZy MySQL for new matches and replicate to PostgreSQL."""
         try:
             last_processed_id = await self.postgres_db.get_last_processed_match_id()
-            log.info(f"Last processed CS2 matchid: {last_processed_id}")
+            log.info(f"Last processed CS2 matchid: {last_processed_id}", extra=SAMPLED)
 
             # Get new matches from MySQL
             new_matches = await self.mysql_db.get_matches_greater_than_matchid(last_processed_id)
@@ -380,9 +357,12 @@ class CS2(commands.Cog):
                         log.warning(f"Not 10 players for {matchid}")
 
                     await self.postgres_db.process_matchzy_data_transaction(match_data, match_players)
+                    # points rewards the players as soon as this arrives
+                    await self.bot.events.publish(MatchReplicated(matchid, match_data['winner']))
 
                     # Process bets for this completed match, but should this be part of the loop in points.py?
                     await self.postgres_db.process_cs2_match_bets(matchid, match_data['winner'])
+                    await self.bot.events.publish(BetSettled(matchid, match_data['winner']))
 
                     processed_count += 1
                     
@@ -450,74 +430,74 @@ class CS2(commands.Cog):
     async def testodds(self, ctx: commands.Context):
         """Test command for odds calculation - DELETE AFTER TESTING"""
         try:
-            async with self.bot.http_client.get(GUELO_TEAMS_JSON_URL) as resp:
-                if resp.status != 200:
-                    await ctx.send(f"❌ Failed to fetch team data: {resp.status}")
-                    return
+            resp = await self.bot.http_service.get(GUELO_TEAMS_JSON_URL)
+            if resp.status != 200:
+                await ctx.send(f"❌ Failed to fetch team data: {resp.status}")
+                return
 
-                data = await resp.json()
+            data = resp.json()
 
-                # Extract steamids from team data
-                team1_steamids = []
-                team2_steamids = []
+            # Extract steamids from team data
+            team1_steamids = []
+            team2_steamids = []
 
-                if 'team1' in data and 'players' in data['team1']:
-                    team1_players = data['team1']['players']
-                    if isinstance(team1_players, dict):
-                        team1_steamids = [int(steamid64) for steamid64 in team1_players.keys() if steamid64.isdigit()]
-
-                if 'team2' in data and 'players' in data['team2']:
-                    team2_players = data['team2']['players']
-                    if isinstance(team2_players, dict):
-                        team2_steamids = [int(steamid64) for steamid64 in team2_players.keys() if steamid64.isdigit()]
-
-                if len(team1_steamids) == 0 or len(team2_steamids) == 0:
-                    await ctx.send("❌ Could not extract team steamids from data")
-                    return
-
-                # Calculate odds
-                odds_data = await self.postgres_db.calculate_team_odds(team1_steamids, team2_steamids)
-                team1_name = data.get('team1', {}).get('name', 'Team 1')
-                team2_name = data.get('team2', {}).get('name', 'Team 2')
-
-                # Create test embed
-                embed = discord.Embed(
-                    title="🎯 Odds Test Results",
-                    color=discord.Color.blue()
-                )
+            if 'team1' in data and 'players' in data['team1']:
+                team1_players = data['team1']['players']
+                if isinstance(team1_players, dict):
+                    team1_steamids = [int(steamid64) for steamid64 in team1_players.keys() if steamid64.isdigit()]
 
-                embed.add_field(
-                    name="Team Data",
-                    value=f"**{team1_name}:** {len(team1_steamids)} players\n**{team2_name}:** {len(team2_steamids)} players",
-                    inline=False
-                )
+            if 'team2' in data and 'players' in data['team2']:
+                team2_players = data['team2']['players']
+                if isinstance(team2_players, dict):
+                    team2_steamids = [int(steamid64) for steamid64 in team2_players.keys() if steamid64.isdigit()]
 
-                embed.add_field(
-                    name="Raw ADR Totals",
-                    value=f"**{team1_name}:** {odds_data['team1_adr']:.1f}\n**{team2_name}:** {odds_data['team2_adr']:.1f}",
-                    inline=True
-                )
+            if len(team1_steamids) == 0 or len(team2_steamids) == 0:
+                await ctx.send("❌ Could not extract team steamids from data")
+                return
 
-                embed.add_field(
-                    name="Normalized Sums",
-                    value=f"**{team1_name}:** {odds_data['team1_normalized_sum']:.1f}\n**{team2_name}:** {odds_data['team2_normalized_sum']:.1f}",
-                    inline=True
-                )
+            # Calculate odds
+            odds_data = await self.postgres_db.calculate_team_odds(team1_steamids, team2_steamids)
+            team1_name = data.get('team1', {}).get('name', 'Team 1')
+            team2_name = data.get('team2', {}).get('name', 'Team 2')
 
-                embed.add_field(
-                    name="Win Odds",
-                    value=f"**{team1_name}:** {odds_data['team1_odds']:.2f}%\n**{team2_name}:** {odds_data['team2_odds']:.2f}%",
-                    inline=True
-                )
+            # Create test embed
+            embed = discord.Embed(
+                title="🎯 Odds Test Results",
+                color=discord.Color.blue()
+            )
 
-                embed.add_field(
-                    name="Debug Info",
-                    value=f"Average ADR: {odds_data['average_adr']:.1f}\nADR Difference: {odds_data['team1_normalized_sum'] - odds_data['team2_normalized_sum']:.1f}",
-                    inline=False
-                )
+            embed.add_field(
+                name="Team Data",
+                value=f"**{team1_name}:** {len(team1_steamids)} players\n**{team2_name}:** {len(team2_steamids)} players",
+                inline=False
+            )
 
-                embed.set_footer(text="DELETE THIS COMMAND AFTER TESTING")
-                await ctx.send(embed=embed)
+            embed.add_field(
+                name="Raw ADR Totals",
+                value=f"**{team1_name}:** {odds_data['team1_adr']:.1f}\n**{team2_name}:** {odds_data['team2_adr']:.1f}",
+                inline=True
+            )
+
+            embed.add_field(
+                name="Normalized Sums",
+                value=f"**{team1_name}:** {odds_data['team1_normalized_sum']:.1f}\n**{team2_name}:** {odds_data['team2_normalized_sum']:.1f}",
+                inline=True
+            )
+
+            embed.add_field(
+                name="Win Odds",
+                value=f"**{team1_name}:** {odds_data['team1_odds']:.2f}%\n**{team2_name}:** {odds_data['team2_odds']:.2f}%",
+                inline=True
+            )
+
+            embed.add_field(
+                name="Debug Info",
+                value=f"Average ADR: {odds_data['average_adr']:.1f}\nADR Difference: {odds_data['team1_normalized_sum'] - odds_data['team2_normalized_sum']:.1f}",
+                inline=False
+            )
+
+            embed.set_footer(text="DELETE THIS COMMAND AFTER TESTING")
+            await ctx.send(embed=embed)
 
         except Exception as e:
             log.error(f"Error in testodds command: {e}")
@@ -729,7 +709,10 @@ class CS2(commands.Cog):
         Example: !refundbets 123
         """
         try:
-            refunded_count = await self.postgres_db.refund_match_bets(match_id)
+            refunded_ids = await self.postgres_db.refund_match_bets(match_id)
+            refunded_count = len(refunded_ids)
+            if refunded_ids:
+                await self.bot.events.publish(PointsChanged(sorted(set(refunded_ids)), "cs2 bet refund"))
 
             if refunded_count == 0:
                 await ctx.send(f"No active bets found for match {match_id}.")
@@ -1,8 +1,15 @@
-import aiomysql
 import logging
+import time
 from typing import List, Dict, Any, Optional, Tuple
 import config
 from asyncpg import Pool, Connection
+from ..helpers.db_instrumentation import calling_method, profiler
+from ..helpers.identity import IdentityMap
+from ..helpers.imports import lazy_import
+from ..helpers.metrics import metrics
+
+# Only loaded once the MySQL pool is actually created
+aiomysql = lazy_import('aiomysql')
 
 log: logging.Logger = logging.getLogger(__name__)
 
@@ -65,10 +72,23 @@ class CS2MySQLDb:
 
     async def execute_query(self, query: str, params: Tuple[Any, ...] = ()) -> List[Dict[str, Any]]:
         """Execute a query and return the results."""
+        caller = calling_method(skip=1)
+        start = time.perf_counter()
+        try:
+            with metrics.timer('db', caller):
+                async with self.pool.acquire() as conn:
+                    async with conn.cursor(aiomysql.DictCursor) as cursor:
+                        await cursor.execute(query, params)
+                        return await cursor.fetchall()
+        finally:
+            profiler.record(caller, query, time.perf_counter() - start, lambda: self._explain(query, params))
+
+    async def _explain(self, query: str, params: Tuple[Any, ...]) -> str:
         async with self.pool.acquire() as conn:
             async with conn.cursor(aiomysql.DictCursor) as cursor:
-                await cursor.execute(query, params)
-                return await cursor.fetchall()
+                await cursor.execute(f"EXPLAIN {query}", params)
+                rows = await cursor.fetchall()
+        return '\n'.join(', '.join(f"{key}={value}" for key, value in row.items()) for row in rows)
     
     async def get_latest_match_id(self) -> int:
         """Get the latest match ID from the matches table."""
@@ -88,8 +108,20 @@ class CS2PostgresDb:
     CS2_MATCHES = "cs2_matches"
     CS2_PLAYER_STATS = "cs2_player_stats"
 
-    def __init__(self, pool: Pool):
+    def __init__(self, pool: Pool, identities: IdentityMap):
         self.pool = pool
+        # Needed by the player stats and bet listing methods, which name players from it instead of joining users
+        self.identities = identities
+
+    def _with_identities(self, rows) -> List[Dict[str, Any]]:
+        """ Rows keyed by steamid64 as dicts with the player's display_name and discord_id added. """
+        players = []
+        for row in rows:
+            player = dict(row)
+            player['display_name'] = self.identities.name_for_steamid64(player['steamid64'])
+            player['discord_id'] = self.identities.discord_id_for(player['steamid64'])
+            players.append(player)
+        return players
     
     async def get_last_processed_match_id(self) -> Optional[int]:
         """Get the highest matchid from our PostgreSQL table."""
@@ -335,15 +367,12 @@ class CS2PostgresDb:
                 ps.wins,
                 ps.losses,
                 ps.total_matches,
-                ps.winrate,
-                COALESCE(u.discord_username, 'Unknown Player') as display_name,
-                u.discord_id
+                ps.winrate
             FROM player_stats ps
-            LEFT JOIN users u ON ps.steamid64 = u.steamid64
             ORDER BY ps.winrate DESC, ps.wins DESC
         """
         rows = await self.pool.fetch(query)
-        return [dict(row) for row in rows]
+        return self._with_identities(rows)
 
     async def get_comprehensive_player_stats(self, all_time: bool = False) -> List[Dict[str, Any]]:
         """Get comprehensive statistics for all players, grouped by steamid64.
@@ -470,15 +499,12 @@ class CS2PostgresDb:
                 ps.total_kills,
                 ps.total_deaths,
                 ps.total_assists,
-                ps.total_damage,
-                COALESCE(u.discord_username, 'Unknown Player') as display_name,
-                u.discord_id
+                ps.total_damage
             FROM player_stats ps
-            LEFT JOIN users u ON ps.steamid64 = u.steamid64
             ORDER BY ps.avg_damage_per_round DESC, ps.kda_ratio DESC
         """
         rows = await self.pool.fetch(query)
-        return [dict(row) for row in rows]
+        return self._with_identities(rows)
 
     async def calculate_team_odds(self, team1_steamids: List[int], team2_steamids: List[int]) -> Dict[str, Any]:
         """Calculate match odds based on team ADR sums, normalized by subtracting average ADR.
@@ -699,34 +725,24 @@ class CS2PostgresDb:
         result = await self.pool.fetchval(query, user_id)
         return result if result is not None else 0
 
-    async def get_discord_ids_from_steamids(self, steamids: List[int]) -> List[int]:
-        """Convert a list of steamid64s to discord_ids."""
-        query = """
-            SELECT discord_id
-            FROM users
-            WHERE steamid64 = ANY($1)
-        """
-        rows = await self.pool.fetch(query, steamids)
-        return [row['discord_id'] for row in rows]
-
     async def get_all_match_bets(self, cs_match_id: int) -> List[Dict[str, Any]]:
         """Get all bets (active and inactive) for a specific match with usernames."""
         query = """
-            SELECT
-                b.*,
-                u.discord_username
-            FROM cs2_match_bets b
-            LEFT JOIN users u ON b.user_id = u.discord_id
-            WHERE b.cs_match_id = $1
-            ORDER BY b.id
+            SELECT *
+            FROM cs2_match_bets
+            WHERE cs_match_id = $1
+            ORDER BY id
         """
         rows = await self.pool.fetch(query, cs_match_id)
-        return [dict(row) for row in rows]
+        bets = [dict(row) for row in rows]
+        for bet in bets:
+            bet['discord_username'] = self.identities.username_for(bet['user_id'])
+        return bets
 
-    async def refund_match_bets(self, cs_match_id: int) -> int:
+    async def refund_match_bets(self, cs_match_id: int) -> List[int]:
         """
         Refund all active bets for a specific match.
-        Returns the number of bets refunded.
+        Returns the discord ids of the refunded bets, one per bet.
         """
         async with self.pool.acquire() as conn:
             async with conn.transaction():
@@ -738,7 +754,7 @@ class CS2PostgresDb:
                 bets = await conn.fetch(bets_query, cs_match_id)
 
                 if not bets:
-                    return 0
+                    return []
 
                 for bet in bets:
                     # Refund the bet amount (not payout, just original bet)
@@ -783,4 +799,4 @@ class CS2PostgresDb:
                     await conn.execute(update_bet_query, bet['id'])
 
                 log.info(f"Refunded {len(bets)} bets for match {cs_match_id}")
-                return len(bets)
\ No newline at end of file
+                return [bet['user_id'] for bet in bets]
\ No newline at end of file
@@ -1,8 +1,12 @@
 from __future__ import annotations
 
+import logging
 from discord import ui
 import discord
 from .db import CS2PostgresDb
+from ..helpers.events import PointsChanged
+
+log: logging.Logger = logging.getLogger(__name__)
 
 
 class MakeBetModal(ui.Modal):
@@ -61,7 +65,7 @@ class MakeBetModal(ui.Modal):
         # record the bet in the database
         try:
             db_pool = interaction.client.db_pool
-            db = CS2PostgresDb(db_pool)
+            db = CS2PostgresDb(db_pool, interaction.client.identities)
 
             await db.insert_match_bet(
                 cs_match_id=self.__view.match_id,
@@ -74,6 +78,12 @@ class MakeBetModal(ui.Modal):
             await interaction.response.send_message(f"Failed to record bet: {e}", ephemeral=True)
             return
 
+        # the bet came out of their balance, so cached leaderboards are stale
+        try:
+            await interaction.client.events.publish(PointsChanged([interaction.user.id], "cs2 bet"))
+        except Exception:
+            log.exception("Could not publish points_changed for a cs2 bet")
+
         # update the bet totals
         if self.team_index == 0:
             self.__view.team1_total_bet += bet_amount
@@ -106,7 +116,7 @@ class LiveMatchButtons(ui.ActionRow):
     async def button_1(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
         # Query user's current balance
         db_pool = interaction.client.db_pool
-        db = CS2PostgresDb(db_pool)
+        db = CS2PostgresDb(db_pool, interaction.client.identities)
         user_points = await db.get_user_balance(interaction.user.id)
 
         team_name = self.__view.team_names[0]
@@ -117,7 +127,7 @@ class LiveMatchButtons(ui.ActionRow):
     async def button_2(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
         # Query user's current balance
         db_pool = interaction.client.db_pool
-        db = CS2PostgresDb(db_pool)
+        db = CS2PostgresDb(db_pool, interaction.client.identities)
         user_points = await db.get_user_balance(interaction.user.id)
 
         team_name = self.__view.team_names[1]
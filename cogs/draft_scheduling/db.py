@@ -52,7 +52,7 @@ class DraftSession:
 
 @dataclass
 class DraftResponse:
-    id: int
+    id: Optional[int]  # None until read back from the db
     session_id: int
     user_id: int
     is_out: bool
@@ -139,6 +139,11 @@ class DraftSchedulingDb:
             "SELECT * FROM draft_responses WHERE session_id = $1 ORDER BY updated_at", session_id)
         return [DraftResponse.from_row(r) for r in rows]
 
+    async def get_responses_for_sessions(self, session_ids: List[int]) -> List[DraftResponse]:
+        rows = await self.pool.fetch(
+            "SELECT * FROM draft_responses WHERE session_id = ANY($1::int[]) ORDER BY updated_at", session_ids)
+        return [DraftResponse.from_row(r) for r in rows]
+
     async def upsert_availability(self, session_id: int, user_id: int,
                                   availability: Dict[str, List[int]], note: Optional[str]):
         query = """
@@ -1,12 +1,13 @@
+import asyncio
 import logging
 import re
 from datetime import datetime, date, timedelta
-from typing import Dict, List, Optional, Set, Tuple
+from typing import Dict, List, Optional, Set
 
 import discord
 import pytz
 from discord import app_commands
-from discord.ext import commands, tasks
+from discord.ext import commands
 
 from bot import Zhenpai
 from .constants import (
@@ -32,11 +33,16 @@ from .constants import (
     utc_to_local,
 )
 from .db import DraftResponse, DraftSchedulingDb, DraftSession
+from .grid import AvailabilityGrid, Slot
+from .store import DraftStore
 from .views import AnnouncementView, OrganizerDecisionView
 
 log: logging.Logger = logging.getLogger(__name__)
 
-POLLING_INTERVAL_MINUTES = 5
+# Upper bound on how long the scheduler sleeps, only guards against wall clock jumps; waking costs no queries
+MAX_SCHEDULER_SLEEP_SECONDS = 60 * 60
+# Back-off when something is still due right after processing it, e.g. it raised
+RETRY_DUE_SECONDS = 60
 ACTIVE_STATUSES = ['collecting', 'needs_organizer', 'decided']
 
 
@@ -50,20 +56,29 @@ class DraftScheduling(commands.Cog):
     def __init__(self, bot: Zhenpai):
         self.bot = bot
         self.db = DraftSchedulingDb(self.bot.db_pool)
-        self.tick.start()
+        self.store = DraftStore(self.db, self.bot.owns_guild)
+        self.store.on_session_change = self._reschedule
+        self._wakeup = asyncio.Event()
+        self._scheduler_task: Optional[asyncio.Task] = None
+        # {session_id: user ids the DM reminders couldn't reach}, listed in the organizer summary
+        self.unreachable: Dict[int, Set[int]] = {}
 
     async def cog_load(self):
+        await self.store.load()
         # Re-register persistent announcement buttons for sessions still collecting.
-        sessions = await self.db.get_sessions_by_status(['collecting'])
+        sessions = self.store.get_sessions_by_status(['collecting'])
         for session in sessions:
             if session.announcement_message_id:
                 self.bot.add_view(AnnouncementView(self, session.id),
                                   message_id=session.announcement_message_id)
         if sessions:
             log.info('Re-registered announcement views for %d active draft sessions', len(sessions))
+        self._scheduler_task = asyncio.create_task(self._run_scheduler())
 
-    def cog_unload(self):
-        self.tick.cancel()
+    async def cog_unload(self):
+        if self._scheduler_task:
+            self._scheduler_task.cancel()
+        await self.store.close()
 
     # ---------- session resolution (multiple can be active per channel) ----------
 
@@ -71,7 +86,7 @@ class DraftScheduling(commands.Cog):
                                    current: str) -> List[app_commands.Choice[str]]:
         if not interaction.guild:
             return []
-        sessions = await self.db.get_sessions_in_channel(
+        sessions = self.store.get_sessions_in_channel(
             interaction.guild.id, interaction.channel.id, ACTIVE_STATUSES)
         current = current.lower()
         choices = []
@@ -84,7 +99,7 @@ class DraftScheduling(commands.Cog):
     async def _resolve_session(self, interaction: discord.Interaction, draft: Optional[str],
                                statuses: List[str]) -> Optional[DraftSession]:
         """ Find the targeted session, replying with an error if it's ambiguous or missing. """
-        sessions = await self.db.get_sessions_in_channel(
+        sessions = self.store.get_sessions_in_channel(
             interaction.guild.id, interaction.channel.id, statuses)
         if not sessions:
             await interaction.response.send_message('No active draft in this channel.', ephemeral=True)
@@ -161,10 +176,10 @@ class DraftScheduling(commands.Cog):
 
         await interaction.response.defer(ephemeral=True)
 
-        session_id = await self.db.create_session(
+        session = await self.store.create_session(
             interaction.guild.id, interaction.channel.id, interaction.user.id, role.id,
             session_name, candidate_days, h_start, h_end, deadline)
-        session = await self.db.get_session(session_id)
+        session_id = session.id
 
         expected = len([m for m in role.members if not m.bot])
         embed = self._announcement_embed(session, [], waiting_count=expected)
@@ -175,7 +190,7 @@ class DraftScheduling(commands.Cog):
             view=view,
             allowed_mentions=discord.AllowedMentions(roles=True),
         )
-        await self.db.set_announcement_message(session_id, message.id)
+        self.store.set_announcement_message(session_id, message.id)
         self.bot.add_view(view, message_id=message.id)
 
         await interaction.followup.send(
@@ -189,8 +204,8 @@ class DraftScheduling(commands.Cog):
         session = await self._resolve_session(interaction, draft, ACTIVE_STATUSES)
         if not session:
             return
-        responses = await self.db.get_responses(session.id)
-        non_responders = await self._non_responders(session)
+        responses = self.store.get_responses(session.id)
+        non_responders = self._non_responders(session)
         embed = self._grid_embed(session, responses, non_responders)
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
@@ -239,23 +254,23 @@ class DraftScheduling(commands.Cog):
         """ Called at deadline, or early once everyone in the role has responded.
             Never announces on its own: proposes a slot (if one works for every
             responder and enough are in) and waits for the organizer to confirm. """
-        responses = await self.db.get_responses(session.id)
-        responders, grid = self._build_grid(responses)
+        responses = self.store.get_responses(session.id)
+        grid = self.store.get_grid(session.id)
 
-        universal = [slot for slot, users in grid.items() if len(users) == len(responders)]
+        universal = grid.universal_slots()
         proposed = None
-        if responders and len(responders) >= MIN_PLAYERS and universal:
-            proposed = min(universal)  # earliest day, earliest hour
+        if grid.responder_count >= MIN_PLAYERS and universal:
+            proposed = universal[0]  # earliest day, earliest hour
 
         log.info('Session %d: handing to organizer (%d responders, %d universal slots, proposed=%s)',
-                 session.id, len(responders), len(universal), proposed)
-        await self.db.set_status(session.id, 'needs_organizer')
-        await self._send_organizer_summary(session, responses, grid, len(responders), proposed)
+                 session.id, grid.responder_count, len(universal), proposed)
+        self.store.set_status(session.id, 'needs_organizer')
+        await self._send_organizer_summary(session, responses, grid, proposed)
 
     async def maybe_decide_early(self, session_id: int):
         """ Called after every response: if everyone in the role has now responded,
             don't wait for the deadline. """
-        session = await self.db.get_session(session_id)
+        session = self.store.get_session(session_id)
         if not session or session.status != 'collecting':
             return
         guild = self.bot.get_guild(session.guild_id)
@@ -265,19 +280,18 @@ class DraftScheduling(commands.Cog):
         expected = {m.id for m in role.members if not m.bot}
         if not expected:
             return
-        responses = await self.db.get_responses(session.id)
+        responses = self.store.get_responses(session.id)
         if expected - {r.user_id for r in responses}:
             return
         log.info('Session %d: everyone responded, deciding early', session.id)
         await self.run_decision(session)
 
     async def finalize(self, session: DraftSession, day_iso: str, hour: int, auto: bool):
-        responses = await self.db.get_responses(session.id)
-        attendees = [r.user_id for r in responses
-                     if not r.is_out and hour in r.availability.get(day_iso, [])]
+        attendees = self.store.get_grid(session.id).users_at((day_iso, hour))
 
         slot_utc = local_slot_to_utc(date.fromisoformat(day_iso), hour)
-        await self.db.set_picked(session.id, slot_utc)
+        self.store.set_picked(session.id, slot_utc)
+        self.unreachable.pop(session.id, None)
         await self._disable_announcement_buttons(session)
 
         mentions = ' '.join(f'<@{uid}>' for uid in attendees) or '(nobody?!)'
@@ -292,7 +306,8 @@ class DraftScheduling(commands.Cog):
         await self._create_scheduled_event(session, slot_utc)
 
     async def cancel_session(self, session: DraftSession, announce: bool):
-        await self.db.set_status(session.id, 'cancelled')
+        self.store.set_status(session.id, 'cancelled')
+        self.unreachable.pop(session.id, None)
         await self._disable_announcement_buttons(session)
         if announce:
             channel = self.bot.get_channel(session.channel_id)
@@ -300,14 +315,14 @@ class DraftScheduling(commands.Cog):
                 await channel.send(f'**{session.name}** is off — scheduling was cancelled. See you next time!')
 
     async def _send_organizer_summary(self, session: DraftSession, responses: List[DraftResponse],
-                                      grid: Dict[Tuple[str, int], Set[int]], responder_count: int,
-                                      proposed: Optional[Tuple[str, int]]):
+                                      grid: AvailabilityGrid, proposed: Optional[Slot]):
+        responder_count = grid.responder_count
         organizer = self.bot.get_user(session.organizer_id)
         if not organizer:
             log.warning('Session %d: could not find organizer %d', session.id, session.organizer_id)
             return
 
-        non_responders = await self._non_responders(session)
+        non_responders = self._non_responders(session)
         lead = ('All responses are in' if not non_responders
                 else f'Deadline hit ({len(non_responders)} never responded)')
         if proposed:
@@ -324,12 +339,11 @@ class DraftScheduling(commands.Cog):
         embed = self._grid_embed(session, responses, non_responders)
 
         # Top slots by attendance for the quick-pick dropdown.
-        ranked = sorted(grid.items(), key=lambda kv: (-len(kv[1]), kv[0]))[:25]
         options = [
             discord.SelectOption(
-                label=f'{fmt_day(date.fromisoformat(d))} {fmt_hour(h)} — {len(users)} in',
+                label=f'{fmt_day(date.fromisoformat(d))} {fmt_hour(h)} — {count} in',
                 value=f'{d}|{h}')
-            for (d, h), users in ranked
+            for (d, h), count in grid.ranked(25)
         ]
         view = OrganizerDecisionView(self, session.id, options, proposed)
         try:
@@ -369,26 +383,77 @@ class DraftScheduling(commands.Cog):
         except discord.HTTPException as e:
             log.warning('Session %d: failed to create scheduled event: %s', session.id, e)
 
-    # ---------- reminders / polling ----------
+    # ---------- reminders / deadline scheduler ----------
+
+    def _next_due(self, session: DraftSession) -> Optional[datetime]:
+        """ Next instant the session needs attention: a DM reminder stage, last call,
+            the deadline, or the day-of reminder. None if nothing is left to do. """
+        if session.status == 'collecting':
+            due = [session.deadline]
+            if session.reminder_stage < 3:
+                due.append(session.deadline - timedelta(hours=LAST_CALL_HOURS_BEFORE_DEADLINE))
+            if session.reminder_stage < 2:
+                due.append(session.created_at + timedelta(hours=SECOND_DM_HOURS))
+            if session.reminder_stage < 1:
+                due.append(session.created_at + timedelta(hours=FIRST_DM_HOURS))
+            return min(due)
+        if session.status == 'decided' and session.picked_slot and not session.day_of_reminder_sent:
+            if session.picked_slot <= datetime.utcnow():
+                return None
+            return session.picked_slot - timedelta(hours=DAY_OF_REMINDER_HOURS_BEFORE)
+        return None
 
-    @tasks.loop(minutes=POLLING_INTERVAL_MINUTES)
-    async def tick(self):
-        now = datetime.utcnow()
-        try:
-            for session in await self.db.get_sessions_by_status(['collecting']):
-                if now >= session.deadline:
+    def _reschedule(self):
+        """ Wake the scheduler so it recomputes the earliest due instant. """
+        self._wakeup.set()
+
+    async def _process_due(self, now: datetime):
+        for session in self.store.get_sessions_by_status(['collecting', 'decided']):
+            due = self._next_due(session)
+            if due is None or due > now:
+                continue
+            try:
+                if session.status == 'decided':
+                    await self._maybe_day_of_reminder(session, now)
+                elif now >= session.deadline:
                     await self.run_decision(session)
                 else:
                     await self._maybe_remind(session, now)
-            for session in await self.db.get_sessions_by_status(['decided']):
-                await self._maybe_day_of_reminder(session, now)
-        except Exception:
-            log.exception('Error in draft scheduling tick')
+            except Exception:
+                log.exception('Session %d: error handling due reminder/deadline', session.id)
 
-    @tick.before_loop
-    async def before_tick(self):
+    async def _scheduler_pass(self) -> float:
+        """ Handle everything due now, returns how long to sleep until the next due instant. """
+        now = datetime.utcnow()
+        await self._process_due(now)
+
+        pending = [due for due in map(self._next_due, self.store.sessions.values()) if due]
+        timeout = MAX_SCHEDULER_SLEEP_SECONDS
+        if pending:
+            next_due = min(pending)
+            timeout = (next_due - datetime.utcnow()).total_seconds()
+            if next_due <= now:
+                timeout = RETRY_DUE_SECONDS
+            timeout = min(max(timeout, 0), MAX_SCHEDULER_SLEEP_SECONDS)
+        return timeout
+
+    async def _run_scheduler(self):
+        """ Sleeps until the earliest due instant across all sessions instead of polling,
+            and is woken early whenever a session is created or changes state. """
         await self.bot.wait_until_ready()
-        log.info('Starting %s update loop', __name__)
+        log.info('Starting %s deadline scheduler', __name__)
+        while True:
+            self._wakeup.clear()
+            try:
+                timeout = await self._scheduler_pass()
+            except Exception:
+                # keep the scheduler alive, a dead task would silently stop every reminder and deadline
+                log.exception('Draft scheduler pass failed, retrying in %ds', RETRY_DUE_SECONDS)
+                timeout = RETRY_DUE_SECONDS
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
 
     async def _maybe_remind(self, session: DraftSession, now: datetime):
         elapsed = now - session.created_at
@@ -396,22 +461,22 @@ class DraftScheduling(commands.Cog):
 
         if session.reminder_stage < 3 and remaining <= timedelta(hours=LAST_CALL_HOURS_BEFORE_DEADLINE):
             await self._send_last_call(session)
-            await self.db.set_reminder_stage(session.id, 3)
+            self.store.set_reminder_stage(session.id, 3)
         elif session.reminder_stage < 2 and elapsed >= timedelta(hours=SECOND_DM_HOURS):
             await self._send_dm_reminders(session)
-            await self.db.set_reminder_stage(session.id, 2)
+            self.store.set_reminder_stage(session.id, 2)
         elif session.reminder_stage < 1 and elapsed >= timedelta(hours=FIRST_DM_HOURS):
             await self._send_dm_reminders(session)
-            await self.db.set_reminder_stage(session.id, 1)
+            self.store.set_reminder_stage(session.id, 1)
 
-    async def _non_responders(self, session: DraftSession) -> List[discord.Member]:
+    def _non_responders(self, session: DraftSession) -> List[discord.Member]:
         guild = self.bot.get_guild(session.guild_id)
         if not guild:
             return []
         role = guild.get_role(session.role_id)
         if not role:
             return []
-        responses = await self.db.get_responses(session.id)
+        responses = self.store.get_responses(session.id)
         responded_ids = {r.user_id for r in responses}
         return [m for m in role.members if not m.bot and m.id not in responded_ids]
 
@@ -420,20 +485,18 @@ class DraftScheduling(commands.Cog):
                 f'{session.channel_id}/{session.announcement_message_id}')
 
     async def _send_dm_reminders(self, session: DraftSession):
-        members = await self._non_responders(session)
+        members = self._non_responders(session)
         log.info('Session %d: DM reminding %d non-responders', session.id, len(members))
-        for member in members:
-            try:
-                await member.send(
-                    f'Friendly reminder to set your availability for **{session.name}** '
-                    f'(deciding {discord_timestamp(session.deadline, "R")}): {self._jump_url(session)}')
-            except discord.Forbidden:
-                log.info('Session %d: cannot DM %d', session.id, member.id)
-            except discord.HTTPException as e:
-                log.warning('Session %d: DM to %d failed: %s', session.id, member.id, e)
+        result = await self.bot.dms.broadcast(
+            members,
+            f'Friendly reminder to set your availability for **{session.name}** '
+            f'(deciding {discord_timestamp(session.deadline, "R")}): {self._jump_url(session)}')
+        if result.unreachable:
+            log.info('Session %d: cannot DM %s', session.id, result.unreachable)
+            self.unreachable.setdefault(session.id, set()).update(result.unreachable)
 
     async def _send_last_call(self, session: DraftSession):
-        members = await self._non_responders(session)
+        members = self._non_responders(session)
         if not members:
             return
         channel = self.bot.get_channel(session.channel_id)
@@ -450,18 +513,15 @@ class DraftScheduling(commands.Cog):
             return
         if not (timedelta(0) < session.picked_slot - now <= timedelta(hours=DAY_OF_REMINDER_HOURS_BEFORE)):
             return
-        responses = await self.db.get_responses(session.id)
         local = utc_to_local(session.picked_slot)
-        day_iso, hour = local.date().isoformat(), local.hour
-        attendees = [r.user_id for r in responses
-                     if not r.is_out and hour in r.availability.get(day_iso, [])]
+        attendees = self.store.get_grid(session.id).users_at((local.date().isoformat(), local.hour))
         channel = self.bot.get_channel(session.channel_id)
         if channel and attendees:
             mentions = ' '.join(f'<@{uid}>' for uid in attendees)
             await channel.send(
                 f'**{session.name}** starts {discord_timestamp(session.picked_slot, "R")}! {mentions}',
                 allowed_mentions=discord.AllowedMentions(users=True))
-        await self.db.set_day_of_reminder_sent(session.id)
+        self.store.set_day_of_reminder_sent(session.id)
 
     # ---------- helpers ----------
 
@@ -501,17 +561,6 @@ class DraftScheduling(commands.Cog):
         member = interaction.guild.get_member(interaction.user.id)
         return bool(member and member.guild_permissions.manage_guild)
 
-    @staticmethod
-    def _build_grid(responses: List[DraftResponse]):
-        """ Returns (responders, grid) where grid maps (day_iso, hour) -> set of user ids. """
-        responders = [r for r in responses if not r.is_out and r.availability]
-        grid: Dict[Tuple[str, int], Set[int]] = {}
-        for r in responders:
-            for day_iso, hours in r.availability.items():
-                for h in hours:
-                    grid.setdefault((day_iso, h), set()).add(r.user_id)
-        return responders, grid
-
     def _announcement_embed(self, session: DraftSession, responses: List[DraftResponse],
                             waiting_count: Optional[int] = None) -> discord.Embed:
         responders = [r for r in responses if not r.is_out and r.availability]
@@ -538,7 +587,8 @@ class DraftScheduling(commands.Cog):
 
     def _grid_embed(self, session: DraftSession, responses: List[DraftResponse],
                     non_responders: Optional[List[discord.Member]] = None) -> discord.Embed:
-        responders, grid = self._build_grid(responses)
+        grid = self.store.get_grid(session.id)
+        responders = grid.responders
         outs = [r for r in responses if r.is_out]
         guild = self.bot.get_guild(session.guild_id)
 
@@ -547,11 +597,15 @@ class DraftScheduling(commands.Cog):
             return member.display_name if member else f'<{uid}>'
 
         description = ''
-        if grid:
-            (day_iso, hour), users = sorted(grid.items(), key=lambda kv: (-len(kv[1]), kv[0]))[0]
-            everyone = ' — works for everyone' if len(users) == len(responders) else ''
+        best = grid.best()
+        if best:
+            (day_iso, hour), count = best
+            everyone = ' — works for everyone' if count == len(responders) else ''
             description = (f'Best slot: **{fmt_day(date.fromisoformat(day_iso))} {fmt_hour(hour)}** '
-                           f'({len(users)}/{len(responders)} responders{everyone})')
+                           f'({count}/{len(responders)} responders{everyone})')
+            missing = grid.missing_at((day_iso, hour))
+            if missing:
+                description += f'\nMissing: {", ".join(name(uid) for uid in missing)}'
 
         embed = discord.Embed(
             title=f'{session.name} — {len(responders)} in, {len(outs)} out',
@@ -576,13 +630,17 @@ class DraftScheduling(commands.Cog):
             names = ', '.join(sorted(m.display_name for m in non_responders))
             embed.add_field(name=f'No response ({len(non_responders)})',
                             value=names[:1024], inline=False)
+            unreachable = [m for m in non_responders if m.id in self.unreachable.get(session.id, ())]
+            if unreachable:
+                embed.add_field(name=f"Couldn't DM ({len(unreachable)})",
+                                value=', '.join(sorted(m.display_name for m in unreachable))[:1024], inline=False)
         if session.status == 'decided' and session.picked_slot:
             embed.add_field(name='Locked in', value=discord_timestamp(session.picked_slot), inline=False)
         return embed
 
     async def update_announcement(self, session_id: int):
         """ Best-effort refresh of the responded/out counts on the announcement embed. """
-        session = await self.db.get_session(session_id)
+        session = self.store.get_session(session_id)
         if not session or not session.announcement_message_id:
             return
         try:
@@ -590,8 +648,8 @@ class DraftScheduling(commands.Cog):
             if not channel:
                 return
             message = await channel.fetch_message(session.announcement_message_id)
-            responses = await self.db.get_responses(session_id)
-            waiting = len(await self._non_responders(session))
+            responses = self.store.get_responses(session_id)
+            waiting = len(self._non_responders(session))
             await message.edit(embed=self._announcement_embed(session, responses, waiting_count=waiting))
         except discord.HTTPException as e:
             log.warning('Session %d: failed to update announcement: %s', session_id, e)
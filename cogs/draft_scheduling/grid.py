@@ -0,0 +1,99 @@
+import heapq
+from typing import Dict, List, Optional, Tuple
+
+from .db import DraftResponse, DraftSession
+
+Slot = Tuple[str, int]  # (day_iso, local start hour)
+
+
+def _popcount(mask: int) -> int:
+    return bin(mask).count('1')
+
+
+def _bits(mask: int) -> List[int]:
+    """ Indices of the set bits, lowest first. """
+    indices = []
+    while mask:
+        low = mask & -mask
+        indices.append(low.bit_length() - 1)
+        mask ^= low
+    return indices
+
+
+class AvailabilityGrid:
+    """ A session's availability as bitmasks over its (day x hour) slots.
+
+        Every slot gets a bit index (day-major, then hour), and every responder a
+        bit index in response order. user_masks[u] has a bit per slot user u can
+        make; slot_masks[s] has a bit per user who can make slot s. Universal
+        slots, attendance counts and "who's missing" then come from AND/popcount
+        instead of rescanning a {(day, hour): set(user_ids)} dict. Built once per
+        session and cached by the store until the next response. """
+
+    def __init__(self, session: DraftSession, responses: List[DraftResponse]):
+        self.slots: List[Slot] = [
+            (day.isoformat(), hour)
+            for day in session.candidate_days
+            for hour in range(session.hour_start, session.hour_end + 1)
+        ]
+        self.slot_index: Dict[Slot, int] = {slot: i for i, slot in enumerate(self.slots)}
+
+        # same definition of a responder as before: not out and picked at least one day
+        self.responders = [r for r in responses if not r.is_out and r.availability]
+        self.user_ids = [r.user_id for r in self.responders]
+        self.all_users = (1 << len(self.user_ids)) - 1
+
+        self.user_masks: List[int] = []
+        slot_masks = [0] * len(self.slots)
+        for u, response in enumerate(self.responders):
+            mask = 0
+            for day_iso, hours in response.availability.items():
+                for hour in hours:
+                    s = self.slot_index.get((day_iso, hour))
+                    if s is not None:
+                        mask |= 1 << s
+                        slot_masks[s] |= 1 << u
+            self.user_masks.append(mask)
+        self.slot_masks = slot_masks
+        self.counts = [_popcount(mask) for mask in slot_masks]
+
+    @property
+    def responder_count(self) -> int:
+        return len(self.user_ids)
+
+    def universal_slots(self) -> List[Slot]:
+        """ Slots every responder can make, earliest first. """
+        if not self.user_masks:
+            return []
+        common = self.user_masks[0]
+        for mask in self.user_masks[1:]:
+            common &= mask
+        return [self.slots[s] for s in _bits(common)]
+
+    def ranked(self, k: int) -> List[Tuple[Slot, int]]:
+        """ Top k slots anyone can make as (slot, attendee count), most attended first, ties earliest first. """
+        best = heapq.nsmallest(
+            k, (s for s in range(len(self.slots)) if self.counts[s]),
+            key=lambda s: (-self.counts[s], s))
+        return [(self.slots[s], self.counts[s]) for s in best]
+
+    def best(self) -> Optional[Tuple[Slot, int]]:
+        ranked = self.ranked(1)
+        return ranked[0] if ranked else None
+
+    def count(self, slot: Slot) -> int:
+        s = self.slot_index.get(slot)
+        return self.counts[s] if s is not None else 0
+
+    def users_at(self, slot: Slot) -> List[int]:
+        """ Responders who can make the slot, in response order. """
+        s = self.slot_index.get(slot)
+        if s is None:
+            return []
+        return [self.user_ids[u] for u in _bits(self.slot_masks[s])]
+
+    def missing_at(self, slot: Slot) -> List[int]:
+        """ Responders who can't make the slot, in response order. """
+        s = self.slot_index.get(slot)
+        mask = self.slot_masks[s] if s is not None else 0
+        return [self.user_ids[u] for u in _bits(self.all_users & ~mask)]
@@ -0,0 +1,182 @@
+import asyncio
+import logging
+from dataclasses import replace
+from datetime import date, datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .db import DraftResponse, DraftSchedulingDb, DraftSession
+from .grid import AvailabilityGrid
+
+log: logging.Logger = logging.getLogger(__name__)
+
+# Sessions in these statuses are kept in memory, anything else is finished and dropped
+STORED_STATUSES = ('collecting', 'needs_organizer', 'decided')
+
+
+class DraftStore:
+    """ In-memory copy of every active draft session and its responses.
+
+        Reads never touch the db, so slash commands, autocomplete and button
+        handlers are served from memory. Writes update memory first and are
+        persisted write-behind by a single writer task, in the order they were
+        made. Creating a session is the one synchronous write since the db
+        hands out the id. """
+
+    def __init__(self, db: DraftSchedulingDb, owns_guild: Callable[[int], bool] = lambda guild_id: True):
+        self.db = db
+        # With sharding, only the sessions of guilds on this process's shards are loaded
+        self.owns_guild = owns_guild
+        self.sessions: Dict[int, DraftSession] = {}
+        self.responses: Dict[int, Dict[int, DraftResponse]] = {}  # session_id -> user_id -> response
+        self._grids: Dict[int, AvailabilityGrid] = {}  # session_id -> grid, dropped on every response
+        # Called whenever a session is created or changed, e.g. so the cog can reschedule its timers
+        self.on_session_change: Optional[Callable[[], None]] = None
+        self._writes: 'asyncio.Queue[Tuple[str, Callable[[], Awaitable]]]' = asyncio.Queue()
+        self._writer: Optional[asyncio.Task] = None
+
+    async def load(self):
+        sessions = [session for session in await self.db.get_sessions_by_status(list(STORED_STATUSES))
+                    if self.owns_guild(session.guild_id)]
+        for session in sessions:
+            self.sessions[session.id] = session
+            self.responses[session.id] = {}
+        if sessions:
+            for response in await self.db.get_responses_for_sessions(list(self.sessions)):
+                self.responses[response.session_id][response.user_id] = response
+        self._writer = asyncio.create_task(self._write_loop())
+        log.info('Loaded %d draft sessions into memory', len(self.sessions))
+
+    async def close(self):
+        """ Persist everything still queued, then stop the writer. """
+        if self._writer is None:
+            return
+        await self._writes.join()
+        self._writer.cancel()
+        self._writer = None
+
+    # ---------- write-behind ----------
+
+    def _persist(self, description: str, write: Callable[[], Awaitable]):
+        self._writes.put_nowait((description, write))
+
+    async def _write_loop(self):
+        while True:
+            description, write = await self._writes.get()
+            try:
+                await write()
+            except Exception:
+                log.exception('Failed to persist draft change: %s', description)
+            finally:
+                self._writes.task_done()
+
+    # ---------- sessions ----------
+
+    def get_session(self, session_id: int) -> Optional[DraftSession]:
+        return self.sessions.get(session_id)
+
+    def get_sessions_by_status(self, statuses: List[str]) -> List[DraftSession]:
+        return [s for _, s in sorted(self.sessions.items()) if s.status in statuses]
+
+    def get_sessions_in_channel(self, guild_id: int, channel_id: int,
+                                statuses: List[str]) -> List[DraftSession]:
+        """ Newest first, like the db query it replaces. """
+        return [s for _, s in sorted(self.sessions.items(), reverse=True)
+                if s.guild_id == guild_id and s.channel_id == channel_id and s.status in statuses]
+
+    async def create_session(self, guild_id: int, channel_id: int, organizer_id: int, role_id: int,
+                             name: str, candidate_days: List[date], hour_start: int,
+                             hour_end: int, deadline: datetime) -> DraftSession:
+        session_id = await self.db.create_session(
+            guild_id, channel_id, organizer_id, role_id, name, candidate_days,
+            hour_start, hour_end, deadline)
+        session = await self.db.get_session(session_id)
+        self.sessions[session.id] = session
+        self.responses[session.id] = {}
+        self._session_changed()
+        return session
+
+    def _session_changed(self):
+        if self.on_session_change:
+            self.on_session_change()
+
+    def _update_session(self, session_id: int, **changes):
+        session = self.sessions.get(session_id)
+        if session is None:
+            return
+        for field, value in changes.items():
+            setattr(session, field, value)
+        if session.status not in STORED_STATUSES:
+            del self.sessions[session_id]
+            self.responses.pop(session_id, None)
+            self._grids.pop(session_id, None)
+        self._session_changed()
+
+    def set_announcement_message(self, session_id: int, message_id: int):
+        self._update_session(session_id, announcement_message_id=message_id)
+        self._persist(f'announcement message of session {session_id}',
+                      lambda: self.db.set_announcement_message(session_id, message_id))
+
+    def set_status(self, session_id: int, status: str):
+        self._update_session(session_id, status=status)
+        self._persist(f'status of session {session_id}',
+                      lambda: self.db.set_status(session_id, status))
+
+    def set_reminder_stage(self, session_id: int, stage: int):
+        self._update_session(session_id, reminder_stage=stage)
+        self._persist(f'reminder stage of session {session_id}',
+                      lambda: self.db.set_reminder_stage(session_id, stage))
+
+    def set_picked(self, session_id: int, picked_slot_utc: datetime):
+        self._update_session(session_id, status='decided', picked_slot=picked_slot_utc)
+        self._persist(f'picked slot of session {session_id}',
+                      lambda: self.db.set_picked(session_id, picked_slot_utc))
+
+    def set_day_of_reminder_sent(self, session_id: int):
+        self._update_session(session_id, day_of_reminder_sent=True)
+        self._persist(f'day of reminder of session {session_id}',
+                      lambda: self.db.set_day_of_reminder_sent(session_id))
+
+    # ---------- responses ----------
+
+    def get_response(self, session_id: int, user_id: int) -> Optional[DraftResponse]:
+        return self.responses.get(session_id, {}).get(user_id)
+
+    def get_responses(self, session_id: int) -> List[DraftResponse]:
+        """ Oldest update first, like the db query it replaces. """
+        return sorted(self.responses.get(session_id, {}).values(), key=lambda r: r.updated_at)
+
+    def get_grid(self, session_id: int) -> Optional[AvailabilityGrid]:
+        """ Bitmask availability grid for a session, rebuilt lazily after responses change. """
+        grid = self._grids.get(session_id)
+        if grid is None:
+            session = self.sessions.get(session_id)
+            if session is None:
+                return None
+            grid = self._grids[session_id] = AvailabilityGrid(session, self.get_responses(session_id))
+        return grid
+
+    def _put_response(self, session_id: int, user_id: int, **fields):
+        responses = self.responses.get(session_id)
+        if responses is None:
+            return
+        self._grids.pop(session_id, None)
+        existing = responses.get(user_id)
+        if existing:
+            responses[user_id] = replace(existing, updated_at=datetime.utcnow(), **fields)
+        else:
+            responses[user_id] = DraftResponse(id=None, session_id=session_id, user_id=user_id,
+                                               updated_at=datetime.utcnow(), **fields)
+
+    def upsert_availability(self, session_id: int, user_id: int,
+                            availability: Dict[str, List[int]], note: Optional[str]):
+        self._put_response(session_id, user_id, is_out=False, availability=dict(availability), note=note)
+        self._persist(f'availability of {user_id} in session {session_id}',
+                      lambda: self.db.upsert_availability(session_id, user_id, availability, note))
+
+    def upsert_out(self, session_id: int, user_id: int):
+        existing = self.get_response(session_id, user_id)
+        # the db upsert keeps an existing note, mirror that
+        note = existing.note if existing else None
+        self._put_response(session_id, user_id, is_out=True, availability={}, note=note)
+        self._persist(f'out of {user_id} in session {session_id}',
+                      lambda: self.db.upsert_out(session_id, user_id))
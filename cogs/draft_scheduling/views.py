@@ -42,7 +42,7 @@ class AnnouncementView(ui.View):
         self.add_item(out_button)
 
     async def _get_open_session(self, interaction: discord.Interaction) -> Optional[DraftSession]:
-        session = await self.cog.db.get_session(self.session_id)
+        session = self.cog.store.get_session(self.session_id)
         if not session or session.status != 'collecting':
             await interaction.response.send_message(
                 "Scheduling for this draft is closed.", ephemeral=True)
@@ -53,7 +53,7 @@ class AnnouncementView(ui.View):
         session = await self._get_open_session(interaction)
         if not session:
             return
-        existing = await self.cog.db.get_response(session.id, interaction.user.id)
+        existing = self.cog.store.get_response(session.id, interaction.user.id)
         picker = AvailabilityPicker(self.cog, session, existing)
         await interaction.response.send_message(
             content=picker.instructions(), view=picker, ephemeral=True)
@@ -62,7 +62,7 @@ class AnnouncementView(ui.View):
         session = await self._get_open_session(interaction)
         if not session:
             return
-        await self.cog.db.upsert_out(session.id, interaction.user.id)
+        self.cog.store.upsert_out(session.id, interaction.user.id)
         await interaction.response.send_message(
             "Got it, you're marked as out this week. Click **Set availability** if that changes.",
             ephemeral=True)
@@ -186,7 +186,7 @@ class AvailabilityPicker(ui.View):
 
     @ui.button(label='Submit', style=discord.ButtonStyle.success, row=4)
     async def submit(self, interaction: discord.Interaction, button: ui.Button):
-        session = await self.cog.db.get_session(self.session.id)
+        session = self.cog.store.get_session(self.session.id)
         if not session or session.status != 'collecting':
             await interaction.response.edit_message(
                 content="Scheduling for this draft has closed in the meantime, sorry!", view=None)
@@ -199,7 +199,7 @@ class AvailabilityPicker(ui.View):
                 ephemeral=True)
             return
 
-        await self.cog.db.upsert_availability(
+        self.cog.store.upsert_availability(
             self.session.id, interaction.user.id, availability, self.note)
         note_line = f"\nNote: *{self.note}*" if self.note else ""
         await interaction.response.edit_message(
@@ -251,7 +251,7 @@ class OrganizerDecisionView(ui.View):
             self.add_item(SlotSelect(self, slot_options))
 
     async def _get_pending_session(self, interaction: discord.Interaction) -> Optional[DraftSession]:
-        session = await self.cog.db.get_session(self.session_id)
+        session = self.cog.store.get_session(self.session_id)
         if not session or session.status != 'needs_organizer':
             await interaction.response.send_message(
                 "This session was already resolved.", ephemeral=True)
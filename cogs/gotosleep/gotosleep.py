@@ -9,6 +9,7 @@ import logging
 import datetime
 import re
 from .db import GoToSleepDb
+from ..helpers.log_pipeline import SAMPLED
 
 log: logging.Logger = logging.getLogger(__name__)
 
@@ -130,7 +131,7 @@ class GoToSleep(commands.Cog):
         """
         try:
             the_entire_table = await self.db.get_all_users()
-            log.info(f'Scanned the entire gotosleep table. Found {len(the_entire_table)} records.')
+            log.info(f'Scanned the entire gotosleep table. Found {len(the_entire_table)} records.', extra=SAMPLED)
         except Exception as e:
             log.error(f'Error scanning gotosleep table. {e}')
             return
@@ -149,7 +150,7 @@ class GoToSleep(commands.Cog):
             except Exception as e:
                 log.error(f'Error in gotosleep update_roles loop: {e}')
                 log.error(f'Related Record: {record}')
-        log.info("People who should be asleep: " + str(people_who_should_be_asleep))
+        log.info("People who should be asleep: " + str(people_who_should_be_asleep), extra=SAMPLED)
         # check voice channels
         visible_guilds = [guild for guild in self.bot.guilds if not guild.unavailable]
         for guild in visible_guilds:
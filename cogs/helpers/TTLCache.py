@@ -1,43 +1,148 @@
+import asyncio
 import time
 import heapq
+import itertools
 from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+_MISSING = object()
+
+
+@dataclass
+class CacheStats:
+    """ Counters for a TTLCache, cumulative since creation. """
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0  # dropped to stay under capacity
+    expirations: int = 0  # dropped because their ttl ran out
+    loads: int = 0  # loader calls made by get_or_load
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
 
 class TTLCache:
     """
-    Cache implementation based on OrderedDict that has a max capacity and TTL.
+    Bounded cache with per-key TTL and LRU eviction.
+
+    Entries live in an OrderedDict in least -> most recently used order, so eviction at capacity
+    pops the front. Expiry times are tracked in a min-heap of (expires_at, seq, key); re-setting a key
+    leaves its old heap entry behind, which is skipped when popped because it no longer matches
+    the key's current expiry. get/set/delete are O(log n) amortized.
     """
-    def __init__(self, capacity: int = 1000, ttl_seconds: int = 86400):
-        self.cache = OrderedDict()
-        self.expiration_queue = [] # (expiration_time, key)
+    def __init__(self, capacity: int = 1000, ttl_seconds: float = 86400):
+        self.cache: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict() # key -> (value, expires_at)
+        self.expiration_queue: List[Tuple[float, int, Hashable]] = [] # (expires_at, seq, key)
+        self._seq = itertools.count() # tie breaker so keys never need to be comparable
         self.capacity = capacity
         self.default_ttl_seconds = ttl_seconds
-
-    def _is_key_expired(self, expiration: int):
-        return expiration < time.time()
+        self.stats = CacheStats()
+        self._inflight: Dict[Hashable, "asyncio.Future"] = {}
 
     def _clear_expired(self):
-        # while top of queue is expired, pop and del
-        while self.expiration_queue and self._is_key_expired(self.expiration_queue[0][0]):
-            del self.cache[self.expiration_queue[0][1]]
-            heapq.heappop(self.expiration_queue)
+        now = time.monotonic()
+        # while top of queue is expired, pop it and drop the key if the entry is still the one it refers to
+        while self.expiration_queue and self.expiration_queue[0][0] <= now:
+            expires_at, _, key = heapq.heappop(self.expiration_queue)
+            entry = self.cache.get(key)
+            if entry is not None and entry[1] == expires_at:
+                del self.cache[key]
+                self.stats.expirations += 1
+
+    def _compact_queue(self):
+        # stale heap entries pile up when the same keys are re-set, rebuild once they dominate
+        if len(self.expiration_queue) > 2 * len(self.cache) + 64:
+            self.expiration_queue = [(expires_at, next(self._seq), key) for key, (_, expires_at) in self.cache.items()]
+            heapq.heapify(self.expiration_queue)
+
+    def __len__(self):
+        self._clear_expired()
+        return len(self.cache)
 
     def __contains__(self, key):
         self._clear_expired()
         return key in self.cache
-    
+
     def __getitem__(self, key):
-        self._clear_expired()
-        if key in self.cache:
-            return self.cache[key][0]
-        return None
+        # None when missing or expired, like before the rewrite, rather than a KeyError
+        return self.get(key)
 
     def __setitem__(self, key, value):
+        self.set(key, value)
+
+    def __delitem__(self, key):
+        if self.pop(key, _MISSING) is _MISSING:
+            raise KeyError(key)
+
+    def get(self, key, default=None):
+        """ Value for `key`, marking it most recently used, or `default` if missing/expired. """
+        self._clear_expired()
+        entry = self.cache.get(key)
+        if entry is None:
+            self.stats.misses += 1
+            return default
+        self.cache.move_to_end(key)
+        self.stats.hits += 1
+        return entry[0]
+
+    def set(self, key, value, ttl_seconds: Optional[float] = None) -> None:
+        """ Insert or replace `key`, evicting the least recently used entries if over capacity. """
+        self._clear_expired()
+        ttl = self.default_ttl_seconds if ttl_seconds is None else ttl_seconds
+        expires_at = time.monotonic() + ttl
+        self.cache[key] = (value, expires_at)
+        self.cache.move_to_end(key)
+        heapq.heappush(self.expiration_queue, (expires_at, next(self._seq), key))
+
+        while len(self.cache) > self.capacity:
+            self.cache.popitem(last=False)
+            self.stats.evictions += 1
+        self._compact_queue()
+
+    def pop(self, key, default=None):
         self._clear_expired()
-        if len(self.cache) >= self.capacity:
-            # raise exception instead?
-            return False
-
-        ttl = time.time() + self.default_ttl_seconds
-        self.cache[key] = value
-        heapq.heappush(self.expiration_queue, (ttl, key))
-        return True
\ No newline at end of file
+        entry = self.cache.pop(key, None)
+        if entry is None:
+            return default
+        return entry[0]
+
+    def clear(self) -> None:
+        self.cache.clear()
+        self.expiration_queue.clear()
+
+    async def get_or_load(self, key, loader: Callable[[], Awaitable[Any]], ttl_seconds: Optional[float] = None):
+        """ Cached value for `key`, calling `loader` on a miss.
+
+        Loads are single-flight: concurrent callers missing on the same key share one loader call
+        instead of each hitting the underlying API. Exceptions propagate to every waiter and
+        nothing is cached.
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            self.stats.loads += 1
+            value = await loader()
+            self.set(key, value, ttl_seconds)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # mark retrieved so a load nobody else waited on doesn't log "exception never retrieved"
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
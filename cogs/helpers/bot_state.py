@@ -0,0 +1,27 @@
+from asyncpg import Pool
+from typing import Optional
+import logging
+
+log: logging.Logger = logging.getLogger(__name__)
+
+class BotStateDb():
+    """ Key/value state for the bot itself rather than any one cog. """
+
+    def __init__(self, pool: Pool):
+        self.pool = pool
+
+    async def get(self, key: str) -> Optional[str]:
+        query = """
+            SELECT value FROM bot_state WHERE key = $1
+        """
+        return await self.pool.fetchval(query, key)
+
+    async def set(self, key: str, value: str) -> None:
+        query = """
+            INSERT INTO bot_state (key, value, updated_at)
+            VALUES ($1, $2, NOW())
+            ON CONFLICT (key) DO UPDATE SET
+                value = EXCLUDED.value,
+                updated_at = EXCLUDED.updated_at
+        """
+        await self.pool.execute(query, key, value)
@@ -0,0 +1,228 @@
+import asyncio
+import logging
+import sys
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from .metrics import metrics
+
+log: logging.Logger = logging.getLogger(__name__)
+
+# Queries slower than this get logged along with their EXPLAIN plan
+SLOW_QUERY_SECONDS = 0.25
+# Don't EXPLAIN the same caller more often than this, a slow query tends to stay slow
+EXPLAIN_COOLDOWN_SECONDS = 10 * 60
+# The top-N table covers this much recent history
+PROFILE_WINDOW_SECONDS = 60 * 60
+PROFILE_MAX_SAMPLES = 20000
+EXPLAINABLE_VERBS = {'SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH'}
+
+Explainer = Callable[[], Awaitable[str]]
+
+
+def calling_method(skip: int = 0) -> str:
+    """ "Class.method" (or "module.function") of the first caller outside this module,
+    skipping `skip` more frames, e.g. for a shared execute helper. """
+    frame = sys._getframe(1)
+    while frame is not None and frame.f_globals.get('__name__') == __name__:
+        frame = frame.f_back
+    for _ in range(skip):
+        if frame is not None:
+            frame = frame.f_back
+    if frame is None:
+        return '?'
+    owner = frame.f_locals.get('self')
+    if owner is not None:
+        return f"{type(owner).__name__}.{frame.f_code.co_name}"
+    return f"{frame.f_globals.get('__name__', '?').rsplit('.', 1)[-1]}.{frame.f_code.co_name}"
+
+
+def _one_line(query: str) -> str:
+    return ' '.join(query.split())
+
+
+@dataclass
+class CallerProfile:
+    """ One row of the top-N table: everything one method queried within the window. """
+    caller: str
+    count: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+
+    @property
+    def average_seconds(self) -> float:
+        return self.total_seconds / self.count if self.count else 0.0
+
+
+@dataclass
+class SlowQuery:
+    caller: str
+    query: str
+    seconds: float
+    seen_at: datetime
+    plan: Optional[str] = None
+
+
+class QueryProfiler:
+    """
+    Collects per-query timings tagged with the calling Db method. Keeps a rolling window of samples
+    for the top-N table, and for queries over SLOW_QUERY_SECONDS logs a warning and captures the
+    EXPLAIN plan in the background, at most once per caller per cooldown.
+    """
+
+    def __init__(self):
+        self.samples: Deque[Tuple[float, str, float]] = deque(maxlen=PROFILE_MAX_SAMPLES)  # (at, caller, seconds)
+        self.slow: Dict[str, SlowQuery] = {}  # latest slow query per caller
+        self._explained_at: Dict[str, float] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    def record(self, caller: str, query: str, seconds: float, explain: Optional[Explainer] = None) -> None:
+        now = time.monotonic()
+        self.samples.append((now, caller, seconds))
+        if seconds < SLOW_QUERY_SECONDS:
+            return
+
+        slow = SlowQuery(caller, _one_line(query), seconds, datetime.utcnow())
+        previous = self.slow.get(caller)
+        self.slow[caller] = slow
+        verb = slow.query.split(' ', 1)[0].upper()
+        explained_at = self._explained_at.get(caller)
+        cooling_down = explained_at is not None and now - explained_at < EXPLAIN_COOLDOWN_SECONDS
+        if explain is None or verb not in EXPLAINABLE_VERBS or cooling_down:
+            if previous is not None:
+                slow.plan = previous.plan
+            log.warning(f"Slow query in {caller} took {seconds * 1000:.0f}ms: {slow.query[:500]}")
+            return
+
+        self._explained_at[caller] = now
+        task = asyncio.create_task(self._explain(slow, explain))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _explain(self, slow: SlowQuery, explain: Explainer) -> None:
+        try:
+            slow.plan = await explain()
+        except Exception as e:
+            slow.plan = f"EXPLAIN failed: {e}"
+        log.warning(f"Slow query in {slow.caller} took {slow.seconds * 1000:.0f}ms: {slow.query[:500]}\n{slow.plan}")
+
+    def top(self, limit: int = 10, window_seconds: float = PROFILE_WINDOW_SECONDS) -> List[CallerProfile]:
+        """ Callers by total query time within the window, most expensive first. """
+        cutoff = time.monotonic() - window_seconds
+        profiles: Dict[str, CallerProfile] = {}
+        for at, caller, seconds in self.samples:
+            if at < cutoff:
+                continue
+            profile = profiles.get(caller)
+            if profile is None:
+                profile = profiles[caller] = CallerProfile(caller)
+            profile.count += 1
+            profile.total_seconds += seconds
+            profile.max_seconds = max(profile.max_seconds, seconds)
+        return sorted(profiles.values(), key=lambda p: p.total_seconds, reverse=True)[:limit]
+
+    def reset(self) -> None:
+        self.samples.clear()
+        self.slow.clear()
+        self._explained_at.clear()
+
+
+# Shared by every pool wrapper and the aiomysql helper in cs2
+profiler = QueryProfiler()
+
+
+def _first_args(method: str, args: Tuple) -> Tuple:
+    """ Arguments to EXPLAIN with: executemany takes an iterable of argument tuples, use the first. """
+    if method != 'executemany':
+        return args
+    for records in args[:1]:
+        for record in records:
+            return tuple(record)
+    return ()
+
+
+class _Instrumented:
+    """ Proxies an asyncpg pool or connection, timing the query methods and passing everything else through. """
+
+    def __init__(self, target: Any, explain_pool: Any = None):
+        self._target = target
+        # EXPLAIN runs on the pool, never on a connection that may be mid-transaction
+        self._explain_pool = explain_pool if explain_pool is not None else target
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._target, name)
+
+    async def _timed(self, method: str, query: str, *args, **kwargs) -> Any:
+        caller = calling_method()
+        start = time.perf_counter()
+        try:
+            with metrics.timer('db', caller):
+                return await getattr(self._target, method)(query, *args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            explain: Optional[Callable[[], Awaitable[str]]] = None
+            if elapsed >= SLOW_QUERY_SECONDS:
+                explain_args = _first_args(method, args)
+
+                async def run_explain() -> str:
+                    rows = await self._explain_pool.fetch(f"EXPLAIN {query}", *explain_args)
+                    return '\n'.join(row[0] for row in rows)
+
+                explain = run_explain
+            profiler.record(caller, query, elapsed, explain)
+
+    async def execute(self, query: str, *args, **kwargs):
+        return await self._timed('execute', query, *args, **kwargs)
+
+    async def executemany(self, query: str, *args, **kwargs):
+        return await self._timed('executemany', query, *args, **kwargs)
+
+    async def fetch(self, query: str, *args, **kwargs):
+        return await self._timed('fetch', query, *args, **kwargs)
+
+    async def fetchrow(self, query: str, *args, **kwargs):
+        return await self._timed('fetchrow', query, *args, **kwargs)
+
+    async def fetchval(self, query: str, *args, **kwargs):
+        return await self._timed('fetchval', query, *args, **kwargs)
+
+
+class InstrumentedConnection(_Instrumented):
+    pass
+
+
+class _AcquireContext:
+    """ Wraps asyncpg's PoolAcquireContext so both `async with pool.acquire()` and
+    `await pool.acquire()` hand out instrumented connections. """
+
+    def __init__(self, context: Any, pool: Any):
+        self._context = context
+        self._pool = pool
+
+    async def __aenter__(self) -> InstrumentedConnection:
+        return InstrumentedConnection(await self._context.__aenter__(), self._pool)
+
+    async def __aexit__(self, *exc_info):
+        return await self._context.__aexit__(*exc_info)
+
+    def __await__(self):
+        async def acquire():
+            return InstrumentedConnection(await self._context, self._pool)
+        return acquire().__await__()
+
+
+class InstrumentedPool(_Instrumented):
+    """ Drop-in for the asyncpg pool on the bot. Every query, including ones on acquired connections,
+    is tagged with the Db method that made it, recorded in `metrics` under kind "db" and fed to
+    `profiler`. """
+
+    def acquire(self, *args, **kwargs) -> _AcquireContext:
+        return _AcquireContext(self._target.acquire(*args, **kwargs), self._target)
+
+    async def release(self, connection: Any, *args, **kwargs):
+        if isinstance(connection, InstrumentedConnection):
+            connection = connection._target
+        return await self._target.release(connection, *args, **kwargs)
@@ -0,0 +1,76 @@
+import asyncio
+import discord
+import logging
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, List, Union
+
+from .TTLCache import TTLCache
+
+log: logging.Logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 5
+# Users whose DMs were closed are skipped for this long instead of being retried on every reminder
+DEFAULT_FAILURE_COOLDOWN_SECONDS = 12 * 60 * 60
+
+DmContent = Union[str, Callable[[discord.abc.User], str]]
+
+
+@dataclass
+class BroadcastResult:
+    """ Outcome of a DM broadcast, as user ids. """
+    sent: List[int] = field(default_factory=list)
+    unreachable: List[int] = field(default_factory=list)  # DMs closed, now or within the cooldown
+    failed: List[int] = field(default_factory=list)  # any other error, worth retrying later
+
+    @property
+    def undelivered(self) -> List[int]:
+        return self.unreachable + self.failed
+
+
+class DmBroadcaster:
+    """
+    Sends DMs to many users at once with at most `concurrency` in flight; discord.py still handles the
+    per-route rate limits underneath. Users who can't be DMed (Forbidden) are remembered in a TTL cache
+    and skipped without an API call until their cooldown runs out. One instance lives on the bot so
+    every cog shares the same cooldowns.
+    """
+    def __init__(self, concurrency: int = DEFAULT_CONCURRENCY,
+                 failure_cooldown_seconds: float = DEFAULT_FAILURE_COOLDOWN_SECONDS):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.unreachable = TTLCache(capacity=10000, ttl_seconds=failure_cooldown_seconds)
+
+    def is_unreachable(self, user_id: int) -> bool:
+        return user_id in self.unreachable
+
+    async def _send(self, user: discord.abc.User, content: str, result: BroadcastResult, **kwargs) -> None:
+        if self.is_unreachable(user.id):
+            result.unreachable.append(user.id)
+            return
+        async with self.semaphore:
+            try:
+                await user.send(content, **kwargs)
+                result.sent.append(user.id)
+            except discord.Forbidden:
+                self.unreachable.set(user.id, True)
+                result.unreachable.append(user.id)
+            except discord.HTTPException as e:
+                log.warning(f"DM to {user.id} failed: {e}")
+                result.failed.append(user.id)
+
+    async def send(self, user: discord.abc.User, content: str, **kwargs) -> BroadcastResult:
+        """ DM a single user, going through the same cooldown and concurrency limit as broadcasts. """
+        return await self.broadcast([user], content, **kwargs)
+
+    async def broadcast(self, users: Iterable[discord.abc.User], content: DmContent, **kwargs) -> BroadcastResult:
+        """ DM every user, `content` is either the message or a function of the user returning it.
+        Extra kwargs are passed to `send`. Never raises for an individual failed DM. """
+        result = BroadcastResult()
+        sends = []
+        for user in users:
+            message = content(user) if callable(content) else content
+            sends.append(self._send(user, message, result, **kwargs))
+        await asyncio.gather(*sends)
+        if result.undelivered:
+            log.info(f"DM broadcast: {len(result.sent)} sent, {len(result.unreachable)} unreachable, "
+                     f"{len(result.failed)} failed")
+        return result
@@ -0,0 +1,216 @@
+import asyncio
+import json
+import logging
+import time
+from dataclasses import asdict, dataclass, fields
+from typing import Any, Awaitable, Callable, ClassVar, Dict, List, Optional, Set, Type, TypeVar
+
+from .metrics import metrics
+
+log: logging.Logger = logging.getLogger(__name__)
+
+# Every event goes over this one channel as {"type": ..., "data": {...}}, see encode_event
+EVENT_CHANNEL = 'zhenpai_events'
+RECONNECT_DELAY_SECONDS = 5
+# Postgres rejects NOTIFY payloads of 8000 bytes or more, events should carry ids rather than content
+MAX_PAYLOAD_BYTES = 7999
+
+
+@dataclass(frozen=True)
+class Event:
+    type: ClassVar[str] = ''
+
+
+@dataclass(frozen=True)
+class MatchReplicated(Event):
+    """ A completed cs2 match was copied from MatchZy into cs2_matches / cs2_player_stats. """
+    type: ClassVar[str] = 'match_replicated'
+    matchid: int
+    winner: str
+
+
+@dataclass(frozen=True)
+class PointsChanged(Event):
+    type: ClassVar[str] = 'points_changed'
+    discord_ids: List[int]
+    reason: str
+
+
+@dataclass(frozen=True)
+class UserUpdated(Event):
+    """ Published by the users table trigger (V24), `op` is INSERT, UPDATE or DELETE. """
+    type: ClassVar[str] = 'user_updated'
+    op: str
+    discord_id: int
+    discord_username: str
+    steamid64: Optional[int]
+
+
+@dataclass(frozen=True)
+class BetSettled(Event):
+    """ Bets on a cs2 match were paid out or lost. """
+    type: ClassVar[str] = 'bet_settled'
+    cs_match_id: int
+    winning_team: str
+
+
+@dataclass(frozen=True)
+class LiveTrackingRequested(Event):
+    """ Published by the Flask app's /guelo_start for the cs2 cog to post a live match message. """
+    type: ClassVar[str] = 'live_tracking_requested'
+    image_url: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class TagChanged(Event):
+    """ A tag was saved, updated or deleted (`op`), subscribers re-read it so the content stays out of the payload. """
+    type: ClassVar[str] = 'tag_changed'
+    tag_name: str
+    op: str
+
+
+EVENT_TYPES: Dict[str, Type[Event]] = {
+    event_type.type: event_type
+    for event_type in (MatchReplicated, PointsChanged, UserUpdated, BetSettled, LiveTrackingRequested, TagChanged)
+}
+
+E = TypeVar('E', bound=Event)
+Subscriber = Callable[[Any], Awaitable[None]]
+ReconnectCallback = Callable[[], Awaitable[None]]
+
+
+def encode_event(event: Event) -> str:
+    """ NOTIFY payload for `event`, for publishers outside the bot such as the Flask app. """
+    return json.dumps({'type': event.type, 'data': asdict(event)})
+
+
+def decode_event(payload: str) -> Event:
+    message = json.loads(payload)
+    event_type = EVENT_TYPES[message['type']]
+    names = {field.name for field in fields(event_type)}
+    return event_type(**{key: value for key, value in message['data'].items() if key in names})
+
+
+class EventBus:
+    """
+    Cross-cog (and cross-process) events over Postgres LISTEN/NOTIFY, available as `bot.events`.
+
+    Cogs subscribe to an event type in cog_load and unsubscribe in cog_unload; subscribers run as
+    their own tasks, like message pipeline handlers. Everything published, by this process or any
+    other, arrives through the listening connection, so there's one delivery path. NOTIFY is
+    transactional, so publishing on a connection inside a transaction only delivers on commit.
+
+    Delivery is at most once: notifications sent while the listening connection is down are lost.
+    After reconnecting, the `on_reconnect` callbacks run so consumers can resync, and anything that
+    matters should keep a slow safety sweep.
+    """
+
+    def __init__(self, pool: Any):
+        self.pool = pool
+        self.subscribers: Dict[Type[Event], List[Subscriber]] = {}
+        self.reconnect_callbacks: List[ReconnectCallback] = []
+        self._connection = None
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._closed = False
+
+    def subscribe(self, event_type: Type[E], callback: Callable[[E], Awaitable[None]]) -> None:
+        self.subscribers.setdefault(event_type, []).append(callback)
+
+    def unsubscribe(self, event_type: Type[E], callback: Callable[[E], Awaitable[None]]) -> None:
+        callbacks = self.subscribers.get(event_type, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+
+    def on_reconnect(self, callback: ReconnectCallback) -> None:
+        self.reconnect_callbacks.append(callback)
+
+    def remove_reconnect(self, callback: ReconnectCallback) -> None:
+        if callback in self.reconnect_callbacks:
+            self.reconnect_callbacks.remove(callback)
+
+    async def publish(self, event: Event, connection: Any = None) -> None:
+        """ Publish on `connection` if given, e.g. to tie the event to a transaction's commit.
+        Raises ValueError, before sending anything, if the event is too big for a NOTIFY. """
+        payload = encode_event(event)
+        size = len(payload.encode('utf-8'))
+        if size > MAX_PAYLOAD_BYTES:
+            raise ValueError(f"{event.type} payload is {size} bytes, over the {MAX_PAYLOAD_BYTES} byte NOTIFY limit")
+        await (connection or self.pool).execute("SELECT pg_notify($1, $2)", EVENT_CHANNEL, payload)
+
+    async def start(self) -> None:
+        self._connection = await self.pool.acquire()
+        await self._connection.add_listener(EVENT_CHANNEL, self._on_notify)
+        self._connection.add_termination_listener(self._on_terminated)
+
+    async def stop(self) -> None:
+        self._closed = True
+        if self._reconnect_task:
+            self._reconnect_task.cancel()
+        await self._release()
+
+    async def _release(self) -> None:
+        connection, self._connection = self._connection, None
+        if connection is None:
+            return
+        try:
+            connection.remove_termination_listener(self._on_terminated)
+            if not connection.is_closed():
+                await connection.remove_listener(EVENT_CHANNEL, self._on_notify)
+        except Exception:
+            log.exception("Could not stop listening for events")
+        try:
+            await self.pool.release(connection)
+        except Exception:
+            log.exception("Could not release the event listener connection")
+
+    def _on_terminated(self, connection) -> None:
+        if self._closed or (self._reconnect_task and not self._reconnect_task.done()):
+            return
+        log.warning("Event listener connection closed, reconnecting")
+        self._reconnect_task = asyncio.create_task(self._reconnect())
+
+    async def _reconnect(self) -> None:
+        await self._release()
+        while not self._closed:
+            try:
+                await self.start()
+                break
+            except Exception:
+                log.exception(f"Could not restart the event listener, retrying in {RECONNECT_DELAY_SECONDS}s")
+                await self._release()
+                await asyncio.sleep(RECONNECT_DELAY_SECONDS)
+        for callback in self.reconnect_callbacks:
+            self._spawn(self._resync(callback), 'event-resync')
+
+    def _on_notify(self, connection, pid: int, channel: str, payload: str) -> None:
+        try:
+            event = decode_event(payload)
+        except Exception:
+            log.exception(f"Bad {EVENT_CHANNEL} notification: {payload[:500]}")
+            return
+        for callback in self.subscribers.get(type(event), []):
+            self._spawn(self._run(callback, event), f"event:{event.type}")
+
+    def _spawn(self, coro: Awaitable[None], name: str) -> None:
+        task = asyncio.create_task(coro, name=name)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _resync(self, callback: ReconnectCallback) -> None:
+        try:
+            await callback()
+        except Exception:
+            log.exception(f"{getattr(callback, '__qualname__', callback)} failed resyncing after reconnect")
+
+    async def _run(self, callback: Subscriber, event: Event) -> None:
+        name = getattr(callback, '__qualname__', repr(callback))
+        start = time.perf_counter()
+        error = False
+        try:
+            await callback(event)
+        except Exception:
+            error = True
+            log.exception(f"{name} failed handling {event}")
+        finally:
+            metrics.observe('event', f"{event.type}:{name}", time.perf_counter() - start, error)
@@ -0,0 +1,186 @@
+import asyncio
+import json
+import logging
+import random
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, Mapping, Optional, Tuple
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from .ratelimit import TokenBucket
+from .TTLCache import TTLCache
+
+log: logging.Logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT_SECONDS = 10
+DEFAULT_RETRIES = 2
+DEFAULT_HOST_CONCURRENCY = 4
+RETRY_BASE_SECONDS = 0.5
+RETRY_MAX_SECONDS = 10
+# Responses with an ETag/Last-Modified are kept this long past their ttl so they can be revalidated
+REVALIDATE_WINDOW_SECONDS = 60 * 60
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+@dataclass
+class HttpResponse:
+    """ A fully read response, detached from the connection so it can be cached and shared. """
+    status: int
+    headers: Mapping[str, str]
+    body: bytes
+    url: str
+    from_cache: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 300
+
+    def text(self, encoding: str = 'utf-8') -> str:
+        return self.body.decode(encoding, errors='replace')
+
+    def json(self) -> Any:
+        return json.loads(self.body)
+
+
+@dataclass
+class _CacheEntry:
+    response: HttpResponse
+    fresh_until: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+@dataclass
+class _HostLimits:
+    semaphore: asyncio.Semaphore
+    bucket: Optional[TokenBucket] = None
+
+
+@dataclass
+class HttpStats:
+    requests: int = 0
+    cache_hits: int = 0
+    revalidated: int = 0  # 304s served from cache
+    retries: int = 0
+    failures: int = 0
+    per_host: Dict[str, int] = field(default_factory=dict)
+
+
+class HttpService:
+    """
+    Shared wrapper around the bot's aiohttp ClientSession, available as `bot.http_service`.
+
+    Every GET goes through per-host limits (max requests in flight, plus an optional token bucket for
+    APIs with a requests-per-second cap), a timeout, and retries with jittered exponential backoff on
+    connection errors, timeouts, 429 and 5xx. A 429/503 Retry-After pauses the host's bucket for every
+    caller. Successful responses are cached in memory for `cache_ttl` seconds; past that, responses
+    that came with an ETag or Last-Modified are revalidated with a conditional request and a 304
+    serves the cached body.
+    """
+    def __init__(self, session: aiohttp.ClientSession, cache_capacity: int = 500):
+        self.session = session
+        self.cache = TTLCache(capacity=cache_capacity, ttl_seconds=REVALIDATE_WINDOW_SECONDS)
+        self.hosts: Dict[str, _HostLimits] = {}
+        self.stats = HttpStats()
+
+    def configure_host(self, host: str, concurrency: int = DEFAULT_HOST_CONCURRENCY,
+                       rate: Optional[float] = None, burst: Optional[float] = None) -> None:
+        """ Set limits for a host, `rate` in requests per second. Unconfigured hosts only get the
+        default concurrency limit. """
+        bucket = TokenBucket(rate, burst or rate) if rate else None
+        self.hosts[host] = _HostLimits(asyncio.Semaphore(concurrency), bucket)
+
+    def _limits(self, host: str) -> _HostLimits:
+        limits = self.hosts.get(host)
+        if limits is None:
+            limits = self.hosts[host] = _HostLimits(asyncio.Semaphore(DEFAULT_HOST_CONCURRENCY))
+        return limits
+
+    @staticmethod
+    def _cache_key(url: str, params: Optional[Mapping], headers: Optional[Mapping]) -> Tuple:
+        return (url, tuple(sorted((params or {}).items())), tuple(sorted((headers or {}).items())))
+
+    @staticmethod
+    def _retry_delay(attempt: int, retry_after: Optional[str]) -> float:
+        if retry_after:
+            try:
+                return min(max(float(retry_after), 0), RETRY_MAX_SECONDS)
+            except ValueError:
+                pass
+        # full jitter so concurrent callers don't retry in lockstep
+        return random.uniform(0, min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** attempt))
+
+    async def get(self, url: str, *, params: Optional[Mapping] = None, headers: Optional[Mapping] = None,
+                  timeout: float = DEFAULT_TIMEOUT_SECONDS, retries: int = DEFAULT_RETRIES,
+                  cache_ttl: float = 0) -> HttpResponse:
+        """
+        GET `url`, returning the response whatever its status once retries are used up.
+        Raises aiohttp.ClientError / asyncio.TimeoutError if the last attempt couldn't connect.
+
+        Args:
+            cache_ttl: Serve a cached 200 for this many seconds without any request.
+        """
+        loop = asyncio.get_running_loop()
+        key = self._cache_key(url, params, headers)
+        entry: Optional[_CacheEntry] = self.cache.get(key)
+        if entry is not None and loop.time() < entry.fresh_until:
+            self.stats.cache_hits += 1
+            return replace(entry.response, from_cache=True)
+
+        request_headers = dict(headers or {})
+        if entry is not None:
+            if entry.etag:
+                request_headers['If-None-Match'] = entry.etag
+            if entry.last_modified:
+                request_headers['If-Modified-Since'] = entry.last_modified
+
+        response = await self._request(url, params, request_headers, timeout, retries)
+
+        if response.status == 304 and entry is not None:
+            self.stats.revalidated += 1
+            entry.fresh_until = loop.time() + cache_ttl
+            self.cache.set(key, entry)
+            return replace(entry.response, from_cache=True)
+
+        if response.status == 200:
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            if cache_ttl > 0 or etag or last_modified:
+                self.cache.set(key, _CacheEntry(response, loop.time() + cache_ttl, etag, last_modified),
+                               ttl_seconds=cache_ttl + REVALIDATE_WINDOW_SECONDS)
+        return response
+
+    async def _request(self, url: str, params: Optional[Mapping], headers: Dict[str, str],
+                       timeout: float, retries: int) -> HttpResponse:
+        host = urlsplit(url).hostname or ''
+        limits = self._limits(host)
+        client_timeout = aiohttp.ClientTimeout(total=timeout)
+
+        for attempt in range(retries + 1):
+            self.stats.requests += 1
+            self.stats.per_host[host] = self.stats.per_host.get(host, 0) + 1
+            try:
+                async with limits.semaphore:
+                    if limits.bucket:
+                        await limits.bucket.acquire()
+                    async with self.session.get(url, params=params, headers=headers, timeout=client_timeout) as resp:
+                        response = HttpResponse(resp.status, resp.headers.copy(), await resp.read(), str(resp.url))
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == retries:
+                    self.stats.failures += 1
+                    raise
+                delay = self._retry_delay(attempt, None)
+                log.warning(f"GET {url} failed ({e!r}), retry {attempt + 1}/{retries} in {delay:.1f}s")
+            else:
+                if response.status not in RETRY_STATUSES or attempt == retries:
+                    if response.status >= 400:
+                        self.stats.failures += 1
+                    return response
+                retry_after = response.headers.get('Retry-After')
+                delay = self._retry_delay(attempt, retry_after)
+                if retry_after and limits.bucket:
+                    limits.bucket.pause(delay)
+                log.warning(f"GET {url} returned {response.status}, retry {attempt + 1}/{retries} in {delay:.1f}s")
+            self.stats.retries += 1
+            await asyncio.sleep(delay)
@@ -0,0 +1,97 @@
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .events import EventBus, UserUpdated
+
+log: logging.Logger = logging.getLogger(__name__)
+
+UNKNOWN_PLAYER = 'Unknown Player'
+
+
+@dataclass(frozen=True)
+class Identity:
+    discord_id: int
+    discord_username: str
+    steamid64: Optional[int]
+
+
+class IdentityMap:
+    """
+    In-memory copy of the users table, available as `bot.identities`, for resolving steamid64s
+    and discord ids without a query or a join. Loaded once in setup_hook and kept current by the
+    user_updated events the users table trigger publishes, so rows written by UsersDb, users.json
+    loads or a standalone load_users.py run all show up. Reloads the whole table whenever the event
+    bus reconnects, since events sent in between are lost.
+    """
+
+    def __init__(self, pool: Any, events: EventBus):
+        self.pool = pool
+        self.by_discord_id: Dict[int, Identity] = {}
+        self.by_steamid64: Dict[int, Identity] = {}
+        # Changes that arrive while reload is reading the table, replayed onto its snapshot
+        self._changes_during_reload: Optional[List[Tuple[str, Identity]]] = None
+        events.subscribe(UserUpdated, self._on_user_updated)
+        events.on_reconnect(self.reload)
+
+    async def reload(self) -> None:
+        """ Call after the event bus is listening, so nothing written in between is missed. Changes
+        that arrive while the table is being read are replayed onto the snapshot, in order, so
+        concurrent writes such as a users.json load aren't lost when it's swapped in. """
+        self._changes_during_reload = changes = []
+        try:
+            rows = await self.pool.fetch("SELECT discord_id, discord_username, steamid64 FROM users")
+        finally:
+            self._changes_during_reload = None
+        by_discord_id: Dict[int, Identity] = {}
+        by_steamid64: Dict[int, Identity] = {}
+        for row in rows:
+            identity = Identity(row['discord_id'], row['discord_username'], row['steamid64'])
+            by_discord_id[identity.discord_id] = identity
+            if identity.steamid64:
+                by_steamid64[identity.steamid64] = identity
+        for op, identity in changes:
+            self._apply_to(by_discord_id, by_steamid64, op, identity)
+        self.by_discord_id = by_discord_id
+        self.by_steamid64 = by_steamid64
+        log.info(f"Loaded {len(by_discord_id)} user identities")
+
+    async def _on_user_updated(self, event: UserUpdated) -> None:
+        self.apply(event.op, Identity(event.discord_id, event.discord_username, event.steamid64))
+
+    def apply(self, op: str, identity: Identity) -> None:
+        """ Apply one row change, `op` being the trigger's TG_OP. """
+        if self._changes_during_reload is not None:
+            self._changes_during_reload.append((op, identity))
+        self._apply_to(self.by_discord_id, self.by_steamid64, op, identity)
+
+    @staticmethod
+    def _apply_to(by_discord_id: Dict[int, Identity], by_steamid64: Dict[int, Identity], op: str, identity: Identity) -> None:
+        previous = by_discord_id.pop(identity.discord_id, None)
+        if previous and previous.steamid64 and by_steamid64.get(previous.steamid64) == previous:
+            del by_steamid64[previous.steamid64]
+        if op == 'DELETE':
+            return
+        by_discord_id[identity.discord_id] = identity
+        if identity.steamid64:
+            by_steamid64[identity.steamid64] = identity
+
+    def discord_id_for(self, steamid64: int) -> Optional[int]:
+        identity = self.by_steamid64.get(steamid64)
+        return identity.discord_id if identity else None
+
+    def steamid64_for(self, discord_id: int) -> Optional[int]:
+        identity = self.by_discord_id.get(discord_id)
+        return identity.steamid64 if identity else None
+
+    def discord_ids_for(self, steamid64s: Iterable[int]) -> List[int]:
+        """ Discord ids of the known players among `steamid64s`, unknown ones are dropped. """
+        return [identity.discord_id for identity in map(self.by_steamid64.get, steamid64s) if identity]
+
+    def username_for(self, discord_id: int, default: Optional[str] = None) -> Optional[str]:
+        identity = self.by_discord_id.get(discord_id)
+        return identity.discord_username if identity else default
+
+    def name_for_steamid64(self, steamid64: int, default: str = UNKNOWN_PLAYER) -> str:
+        identity = self.by_steamid64.get(steamid64)
+        return identity.discord_username if identity else default
@@ -0,0 +1,127 @@
+import importlib.abc
+import importlib.util
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from types import ModuleType
+from typing import Any, List
+
+
+def lazy_import(name: str) -> ModuleType:
+    """
+    Module object for `name` that is only executed on first attribute access, for heavy
+    dependencies that most boots never touch, e.g. `pdt = lazy_import('parsedatetime')`.
+    Finding the module still happens now, so a missing dependency fails at import time as usual.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+@dataclass
+class ImportTiming:
+    name: str
+    self_seconds: float  # executing the module's own body
+    total_seconds: float  # including the imports it triggered
+
+
+class _TimedLoader:
+    """ Stands in for a module's loader, passing everything through and timing exec_module. """
+
+    def __init__(self, loader: Any, profiler: 'ImportProfiler'):
+        self._loader = loader
+        self._profiler = profiler
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module: ModuleType) -> None:
+        self._profiler._enter()
+        start = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profiler._exit(module.__name__, time.perf_counter() - start)
+
+
+class ImportProfiler(importlib.abc.MetaPathFinder):
+    """
+    Built-in equivalent of `python -X importtime`: while installed, every module imported from
+    any thread is timed, with self time separated from the time spent in its own imports the same
+    way importtime reports it. Install as early as possible, before the heavy imports happen.
+    """
+
+    def __init__(self):
+        self.timings: List[ImportTiming] = []
+        # wall time of imports that weren't nested in another timed import
+        self.total_seconds = 0.0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @property
+    def installed(self) -> bool:
+        return self in sys.meta_path
+
+    def install(self) -> None:
+        if not self.installed:
+            sys.meta_path.insert(0, self)
+
+    def uninstall(self) -> None:
+        if self.installed:
+            sys.meta_path.remove(self)
+
+    def find_spec(self, fullname: str, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+                    spec.loader = _TimedLoader(spec.loader, self)
+                return spec
+        return None
+
+    def _enter(self) -> None:
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        # seconds spent in nested imports so far
+        stack.append(0.0)
+
+    def _exit(self, name: str, seconds: float) -> None:
+        stack = self._local.stack
+        nested = stack.pop()
+        with self._lock:
+            if stack:
+                stack[-1] += seconds
+            else:
+                self.total_seconds += seconds
+            self.timings.append(ImportTiming(name, seconds - nested, seconds))
+
+    def report(self, limit: int = 15) -> str:
+        """ The `limit` slowest modules by self time, as a table. """
+        with self._lock:
+            timings = sorted(self.timings, key=lambda timing: timing.self_seconds, reverse=True)[:limit]
+            count = len(self.timings)
+        lines = [f"{count} modules imported in {self.total_seconds:.2f}s, slowest by self time:",
+                 f"{'self ms':>9} {'total ms':>9}  module"]
+        for timing in timings:
+            lines.append(f"{timing.self_seconds * 1000:9.1f} {timing.total_seconds * 1000:9.1f}  {timing.name}")
+        return '\n'.join(lines)
+
+
+# Installed by start.py before anything heavy is imported
+import_profiler = ImportProfiler()
@@ -0,0 +1,153 @@
+import json
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from logging.handlers import QueueHandler, QueueListener
+from typing import Deque, Dict, List, Optional, Tuple
+
+# Per opted-in call site, INFO and below: a burst of this many records, then one per SAMPLE_REFILL_SECONDS
+SAMPLE_BURST = 10
+SAMPLE_REFILL_SECONDS = 30
+RING_BUFFER_LINES = 2000
+
+# Pass as `extra` to opt a call site into sampling, e.g. log.info('polled', extra=SAMPLED)
+SAMPLED = {'sample': True}
+
+TEXT_FORMAT = '[{asctime}] [{levelname:<7}] {name}: {message}'
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+class JsonFormatter(logging.Formatter):
+    """ One JSON object per record, for the log file. """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': self.formatTime(record, DATE_FORMAT),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'module': record.module,
+            'line': record.lineno,
+            'thread': record.threadName,
+        }
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            entry['suppressed'] = suppressed
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """ The usual one-line format, noting how many similar records sampling dropped before this one. """
+
+    def __init__(self):
+        super().__init__(TEXT_FORMAT, DATE_FORMAT, style='{')
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        text = super().formatMessage(record)
+        suppressed = getattr(record, 'suppressed', 0)
+        return f'{text} [+{suppressed} similar suppressed]' if suppressed else text
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Rate limits chatty call sites, e.g. a poll loop's per-iteration INFO line. Only records logged
+    with `extra=SAMPLED` are sampled, everything else passes untouched. Each such call site gets a
+    token bucket; once it's empty, records below WARNING are dropped and counted, and the next
+    record let through carries the count as `suppressed`. Warnings and errors always pass.
+    """
+
+    def __init__(self, burst: int = SAMPLE_BURST, refill_seconds: float = SAMPLE_REFILL_SECONDS):
+        super().__init__()
+        self.burst = burst
+        self.refill_seconds = refill_seconds
+        self._sites: Dict[Tuple[str, int], List[float]] = {}  # site -> [tokens, updated_at, suppressed]
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not getattr(record, 'sample', False):
+            return True
+        now = time.monotonic()
+        site = (record.pathname, record.lineno)
+        with self._lock:
+            state = self._sites.get(site)
+            if state is None:
+                state = self._sites[site] = [float(self.burst), now, 0]
+            tokens = min(self.burst, state[0] + (now - state[1]) / self.refill_seconds)
+            state[1] = now
+            if tokens < 1:
+                state[0] = tokens
+                state[2] += 1
+                return False
+            state[0] = tokens - 1
+            record.suppressed, state[2] = int(state[2]), 0
+        return True
+
+
+class RingBufferHandler(logging.Handler):
+    """ Keeps the last `capacity` formatted records in memory for !logs. """
+
+    def __init__(self, capacity: int = RING_BUFFER_LINES):
+        super().__init__()
+        self.lines: Deque[Tuple[int, str]] = deque(maxlen=capacity)  # (levelno, formatted)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self.lines.append((record.levelno, self.format(record)))
+        except Exception:
+            self.handleError(record)
+
+    def tail(self, count: int, level: int = logging.NOTSET) -> List[str]:
+        """ The last `count` lines at `level` or above, oldest first. """
+        with self.lock:
+            lines = [line for levelno, line in self.lines if levelno >= level]
+        return lines[-count:] if count > 0 else []
+
+
+class _QueueHandler(QueueHandler):
+    """ Like QueueHandler, but leaves exc_info on the record instead of folding the traceback into the
+    message, so the JSON formatter can put it in its own field. The listener is in the same process,
+    so the record doesn't need to be picklable; args are still merged now as they may be mutated later. """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+# Shared by start.setup_logging and admin's !logs
+log_buffer = RingBufferHandler()
+
+
+class LogPipeline:
+    """
+    Moves log I/O off the calling thread. The root logger gets a single QueueHandler, which samples
+    and enqueues; a QueueListener thread does the formatting and the console, file and ring buffer
+    writes, so logging on the event loop never blocks on a disk write.
+    """
+
+    def __init__(self, handlers: List[logging.Handler], sampling: Optional[SamplingFilter] = None):
+        self.queue: 'queue.SimpleQueue[logging.LogRecord]' = queue.SimpleQueue()
+        self.queue_handler = _QueueHandler(self.queue)
+        if sampling is not None:
+            self.queue_handler.addFilter(sampling)
+        self.handlers = handlers
+        self.listener = QueueListener(self.queue, *handlers, respect_handler_level=True)
+
+    def start(self, logger: logging.Logger) -> None:
+        for handler in logger.handlers[:]:
+            logger.removeHandler(handler)
+        logger.addHandler(self.queue_handler)
+        self.listener.start()
+
+    def stop(self, logger: logging.Logger) -> None:
+        """ Flushes whatever is still queued, then closes the handlers. """
+        logger.removeHandler(self.queue_handler)
+        self.listener.stop()
+        for handler in self.handlers:
+            handler.close()
@@ -0,0 +1,136 @@
+import asyncio
+import discord
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from .metrics import metrics
+
+log: logging.Logger = logging.getLogger(__name__)
+
+URL_PATTERN = re.compile(r"https?://[^\s<>|]+", re.IGNORECASE)
+
+
+class ParsedMessage:
+    """ A message plus everything handlers commonly derive from it, each computed at most once. """
+
+    def __init__(self, message: discord.Message, prefix: str):
+        self.message = message
+        self.content = message.content or ""
+        self.is_bot = message.author.bot
+        self.guild_id: Optional[int] = message.guild.id if message.guild else None
+        self.channel_id: int = message.channel.id
+        self.prefix = prefix
+
+    @property
+    def channel_key(self) -> Optional[Tuple[int, int]]:
+        """ (guild_id, channel_id), None in DMs. """
+        return (self.guild_id, self.channel_id) if self.guild_id else None
+
+    @cached_property
+    def command_token(self) -> Optional[str]:
+        """ First word after the command prefix, e.g. "tag" for "!tag foo", None if unprefixed. """
+        if not self.content.startswith(self.prefix):
+            return None
+        return self.content.split(" ")[0][len(self.prefix):]
+
+    @cached_property
+    def lower(self) -> str:
+        return self.content.lower()
+
+    @cached_property
+    def words(self) -> List[str]:
+        return self.lower.split()
+
+    @cached_property
+    def urls(self) -> List[str]:
+        return URL_PATTERN.findall(self.content) if "://" in self.content else []
+
+
+MessageCallback = Callable[[ParsedMessage], Awaitable[None]]
+Prefilter = Callable[[ParsedMessage], bool]
+
+
+@dataclass
+class HandlerStats:
+    calls: int = 0
+    skipped: int = 0  # prefilter said no
+    errors: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+
+    @property
+    def average_seconds(self) -> float:
+        return self.total_seconds / self.calls if self.calls else 0.0
+
+
+@dataclass
+class MessageHandler:
+    name: str
+    callback: MessageCallback
+    prefilter: Optional[Prefilter] = None
+    include_bots: bool = False
+    stats: HandlerStats = field(default_factory=HandlerStats)
+
+
+class MessagePipeline:
+    """
+    Single on_message entry point for cogs. Each message is parsed once into a ParsedMessage, every
+    registered handler's prefilter runs synchronously against it, and only handlers that match are
+    scheduled, each as its own task like discord.py listeners so a slow one can't hold up the others
+    or command processing. Per-handler call counts and timings are kept in `stats`.
+
+    Cogs register in cog_load and unregister in cog_unload; prefilters should be cheap checks
+    against the parsed fields or in-memory state, never I/O.
+    """
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self.handlers: Dict[str, MessageHandler] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    def register(self, name: str, callback: MessageCallback, prefilter: Optional[Prefilter] = None,
+                 include_bots: bool = False) -> None:
+        if name in self.handlers:
+            log.warning(f"Replacing message handler {name}")
+        self.handlers[name] = MessageHandler(name, callback, prefilter, include_bots)
+
+    def unregister(self, name: str) -> None:
+        self.handlers.pop(name, None)
+
+    def dispatch(self, message: discord.Message) -> ParsedMessage:
+        parsed = ParsedMessage(message, self.prefix)
+        for handler in self.handlers.values():
+            if parsed.is_bot and not handler.include_bots:
+                continue
+            try:
+                matched = handler.prefilter is None or handler.prefilter(parsed)
+            except Exception:
+                log.exception(f"Prefilter for message handler {handler.name} failed")
+                handler.stats.errors += 1
+                continue
+            if not matched:
+                handler.stats.skipped += 1
+                continue
+            task = asyncio.create_task(self._run(handler, parsed), name=f"message-handler:{handler.name}")
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return parsed
+
+    async def _run(self, handler: MessageHandler, parsed: ParsedMessage) -> None:
+        start = time.perf_counter()
+        error = False
+        try:
+            await handler.callback(parsed)
+        except Exception:
+            error = True
+            handler.stats.errors += 1
+            log.exception(f"Message handler {handler.name} failed on message {parsed.message.id}")
+        finally:
+            elapsed = time.perf_counter() - start
+            handler.stats.calls += 1
+            handler.stats.total_seconds += elapsed
+            handler.stats.max_seconds = max(handler.stats.max_seconds, elapsed)
+            metrics.observe('handler', handler.name, elapsed, error)
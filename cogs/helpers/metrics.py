@@ -0,0 +1,110 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+
+# Prometheus-style cumulative buckets, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Percentiles come from the most recent samples rather than the buckets, so they track current behavior
+RECENT_SAMPLES = 1024
+
+SeriesKey = Tuple[str, str]  # (kind, name), e.g. ("command", "tft") or ("db", "TagsDb.get_all_tags")
+
+
+class LatencySeries:
+    """ Latency histogram and error count for one kind/name pair. """
+
+    def __init__(self, kind: str, name: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.kind = kind
+        self.name = name
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.total_seconds = 0.0
+        self.errors = 0
+        self.recent: Deque[float] = deque(maxlen=RECENT_SAMPLES)
+
+    def observe(self, seconds: float, error: bool = False) -> None:
+        self.count += 1
+        self.total_seconds += seconds
+        if error:
+            self.errors += 1
+        self.recent.append(seconds)
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                self.bucket_counts[i] += 1
+                break
+
+    def percentiles(self, *quantiles: float) -> List[float]:
+        samples = sorted(self.recent)
+        if not samples:
+            return [0.0 for _ in quantiles]
+        return [samples[min(len(samples) - 1, int(q * len(samples)))] for q in quantiles]
+
+
+def _escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Metrics:
+    """
+    In-process latency registry. Observations come from the bot's event loop, and the Flask
+    thread reads them for /metrics, so every access goes through one lock; observe is a few
+    list operations, so contention isn't a concern at this bot's volume.
+    """
+
+    def __init__(self):
+        self.series: Dict[SeriesKey, LatencySeries] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, kind: str, name: str, seconds: float, error: bool = False) -> None:
+        with self._lock:
+            series = self.series.get((kind, name))
+            if series is None:
+                series = self.series[(kind, name)] = LatencySeries(kind, name)
+            series.observe(seconds, error)
+
+    @contextmanager
+    def timer(self, kind: str, name: str) -> Iterator[None]:
+        """ Time the body, counting it as an error if it raises. Works around awaits. """
+        start = time.perf_counter()
+        error = False
+        try:
+            yield
+        except Exception:
+            error = True
+            raise
+        finally:
+            self.observe(kind, name, time.perf_counter() - start, error)
+
+    def top(self, kind: Optional[str] = None, limit: int = 10) -> List[Tuple[LatencySeries, List[float]]]:
+        """ Slowest series by p95, with their (p50, p95, p99). """
+        with self._lock:
+            rows = [(series, series.percentiles(0.5, 0.95, 0.99))
+                    for series in self.series.values() if kind is None or series.kind == kind]
+        rows.sort(key=lambda row: row[1][1], reverse=True)
+        return rows[:limit]
+
+    def render_prometheus(self) -> str:
+        """ All series in the Prometheus text exposition format. """
+        latency = ['# HELP zhenpai_latency_seconds Latency of commands, listeners, loops and queries',
+                   '# TYPE zhenpai_latency_seconds histogram']
+        errors = ['# HELP zhenpai_errors_total Failed commands, listeners, loops and queries',
+                  '# TYPE zhenpai_errors_total counter']
+        with self._lock:
+            for (kind, name), series in sorted(self.series.items()):
+                labels = f'kind="{_escape_label(kind)}",name="{_escape_label(name)}"'
+                cumulative = 0
+                for bound, count in zip(series.buckets, series.bucket_counts):
+                    cumulative += count
+                    latency.append(f'zhenpai_latency_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                latency.append(f'zhenpai_latency_seconds_bucket{{{labels},le="+Inf"}} {series.count}')
+                latency.append(f'zhenpai_latency_seconds_sum{{{labels}}} {series.total_seconds}')
+                latency.append(f'zhenpai_latency_seconds_count{{{labels}}} {series.count}')
+                errors.append(f'zhenpai_errors_total{{{labels}}} {series.errors}')
+        return '\n'.join(latency + errors) + '\n'
+
+
+# Shared by the bot and the Flask thread
+metrics = Metrics()
@@ -0,0 +1,164 @@
+import discord
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Iterable, List, Optional, Union
+
+log: logging.Logger = logging.getLogger(__name__)
+
+BULK_DELETE_LIMIT = 100
+# Discord rejects bulk deletes of anything older than 14 days, leave a little margin
+BULK_DELETE_MAX_AGE = timedelta(days=14) - timedelta(minutes=5)
+
+
+@dataclass
+class PurgeResult:
+    """ Running totals for a purge. """
+    deleted: int = 0
+    bulk_calls: int = 0
+    single_calls: int = 0
+
+    @property
+    def api_calls(self) -> int:
+        return self.bulk_calls + self.single_calls
+
+
+ProgressCallback = Callable[[PurgeResult], Awaitable[None]]
+HistoryBound = Optional[Union[discord.abc.Snowflake, datetime]]
+
+
+class Purger:
+    """
+    Deletes messages from one channel as ids are fed in, 100 per bulk delete call. Messages past
+    the 14 day bulk delete limit are deleted one by one. Forbidden is raised to the caller,
+    messages that are already gone are skipped.
+    """
+    def __init__(self, channel: discord.abc.Messageable, progress: Optional[ProgressCallback] = None):
+        self.channel = channel
+        self.progress = progress
+        self.result = PurgeResult()
+        # ids known to be gone, deleted here or already deleted by someone else
+        self.removed: List[int] = []
+        self._batch: List[int] = []
+        self._bulk_cutoff = discord.utils.utcnow() - BULK_DELETE_MAX_AGE
+
+    async def add(self, message_id: int) -> None:
+        if discord.utils.snowflake_time(message_id) <= self._bulk_cutoff:
+            await self._delete_single(message_id)
+            return
+        self._batch.append(message_id)
+        if len(self._batch) >= BULK_DELETE_LIMIT:
+            await self.flush()
+
+    async def flush(self) -> None:
+        if not self._batch:
+            return
+        batch, self._batch = self._batch, []
+
+        self.result.bulk_calls += 1
+        try:
+            # delete_messages does a single delete on its own for a batch of 1
+            await self.channel.delete_messages([discord.Object(id=m) for m in batch])
+            self.result.deleted += len(batch)
+            self.removed.extend(batch)
+        except discord.NotFound:
+            self.removed.extend(batch)
+        except discord.Forbidden:
+            # put the batch back, it's still there
+            self._batch = batch + self._batch
+            raise
+        except discord.HTTPException as e:
+            # e.g. one of them aged out mid-batch, do these one by one instead
+            log.warning(f"Bulk delete failed in channel {self.channel.id}, falling back to single deletes: {e}")
+            for message_id in batch:
+                await self._delete_single(message_id)
+            return
+
+        if self.progress:
+            await self.progress(self.result)
+
+    async def _delete_single(self, message_id: int) -> None:
+        self.result.single_calls += 1
+        try:
+            await self.channel.get_partial_message(message_id).delete()
+            self.result.deleted += 1
+        except discord.NotFound:
+            # already deleted by someone else
+            pass
+        self.removed.append(message_id)
+
+
+async def purge_messages(
+    channel: discord.abc.Messageable,
+    message_ids: Iterable[int],
+    progress: Optional[ProgressCallback] = None
+) -> PurgeResult:
+    """ Delete the given messages from a channel in as few API calls as possible. """
+    purger = Purger(channel, progress)
+    for message_id in message_ids:
+        await purger.add(message_id)
+    await purger.flush()
+    return purger.result
+
+
+async def purge_history(
+    channel: discord.abc.Messageable,
+    *,
+    after: HistoryBound = None,
+    before: HistoryBound = None,
+    limit: Optional[int] = None,
+    scan_limit: Optional[int] = None,
+    check: Optional[Callable[[discord.Message], bool]] = None,
+    progress: Optional[ProgressCallback] = None
+) -> PurgeResult:
+    """ Stream a channel's history between `after` and `before` (both exclusive, bounded server side)
+    and delete messages as they come in, never holding more than one batch in memory.
+
+    Args:
+        limit: Stop after this many messages matched `check`, None for no limit.
+        scan_limit: Stop after reading this many messages whether or not they matched, None for no
+            limit. Bound the scan with this or `after` when `check` may rarely match.
+        check: Only delete messages this returns True for, None for every message.
+    """
+    purger = Purger(channel, progress)
+    matched = 0
+    async for message in channel.history(limit=scan_limit, after=after, before=before):
+        if limit is not None and matched >= limit:
+            break
+        if check is not None and not check(message):
+            continue
+        matched += 1
+        await purger.add(message.id)
+    await purger.flush()
+    return purger.result
+
+
+class ProgressMessage:
+    """ Progress callback that posts one status message in a channel and edits it as a purge
+    goes on, at most once every `every` deleted messages. """
+    def __init__(self, channel: discord.abc.Messageable, total: Optional[int] = None, every: int = 200):
+        self.channel = channel
+        self.total = total
+        self.every = every
+        self.message: Optional[discord.Message] = None
+        self._last_reported = 0
+
+    async def __call__(self, result: PurgeResult) -> None:
+        if result.deleted - self._last_reported < self.every:
+            return
+        self._last_reported = result.deleted
+        total = f"/{self.total}" if self.total else ""
+        content = f"🧹 Deleted {result.deleted}{total} messages so far..."
+        if self.message is None:
+            self.message = await self.channel.send(content)
+        else:
+            await self.message.edit(content=content)
+
+    async def finish(self, content: str, always: bool = False, delete_after: float = 5) -> None:
+        """ Replace the status message with a final one. Without `always`, purges too small to
+        have posted any progress stay silent. """
+        if self.message is not None:
+            await self.message.edit(content=content)
+            await self.message.delete(delay=delete_after)
+        elif always:
+            await self.channel.send(content, delete_after=delete_after)
@@ -0,0 +1,41 @@
+import asyncio
+import time
+
+
+class TokenBucket:
+    """
+    Async token bucket: holds up to `capacity` tokens, refilled at `rate` tokens per second.
+    `acquire` waits until a token is available, so callers can fire off requests concurrently and
+    still stay under an API's requests-per-second limit. `pause` empties the bucket for a while,
+    e.g. after a 429 with Retry-After, so every waiter backs off rather than only the one that got it.
+    """
+    def __init__(self, rate: float, capacity: float = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        start = max(self.updated_at, self.paused_until)
+        if now > start:
+            self.tokens = min(self.capacity, self.tokens + (now - start) * self.rate)
+        self.updated_at = max(now, self.updated_at)
+
+    async def acquire(self) -> None:
+        # the lock keeps waiters in FIFO order so nobody starves
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self.paused_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = max(self.paused_until - now, (1 - self.tokens) / self.rate)
+                await asyncio.sleep(max(wait, 0.01))
+
+    def pause(self, seconds: float) -> None:
+        """ Hand out no tokens for `seconds`, then refill from empty. """
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0
@@ -0,0 +1,39 @@
+from typing import List, Optional, Sequence
+
+
+def parse_shard_ids(spec: Optional[str]) -> Optional[List[int]]:
+    """ "0-3,6" -> [0, 1, 2, 3, 6], None/empty -> None (every shard). """
+    if not spec or not spec.strip():
+        return None
+    shard_ids = set()
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        start, _, end = part.partition('-')
+        first, last = int(start), int(end or start)
+        if first > last:
+            raise ValueError(f"Bad shard range {part}")
+        shard_ids.update(range(first, last + 1))
+    return sorted(shard_ids)
+
+
+def shard_for_guild(guild_id: int, shard_count: int) -> int:
+    """ The shard Discord routes a guild's events to. """
+    return (guild_id >> 22) % shard_count
+
+
+def owned_guild_sql(column: str, shard_count_param: str, shard_ids_param: str) -> str:
+    """ SQL condition matching rows whose guild belongs to one of the shards, the same formula as
+    shard_for_guild. Pass the shard count and an int array of shard ids as the named params. """
+    return f"(({column} >> 22) % {shard_count_param}) = ANY({shard_ids_param})"
+
+
+def validate_sharding(shard_count: Optional[int], shard_ids: Optional[Sequence[int]]) -> None:
+    if shard_ids is None:
+        return
+    if shard_count is None:
+        raise ValueError("SHARD_IDS needs SHARD_COUNT")
+    invalid = [shard_id for shard_id in shard_ids if not 0 <= shard_id < shard_count]
+    if invalid:
+        raise ValueError(f"Shard ids {invalid} are outside 0-{shard_count - 1}")
@@ -0,0 +1,108 @@
+from typing import Dict, List, Optional, Tuple
+
+
+class _TrieNode:
+    __slots__ = ("children", "terminal")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.terminal: bool = False
+
+
+class Trie:
+    """
+    Prefix tree over strings. Supports prefix completion and fuzzy (edit distance) lookups,
+    used for "did you mean" style suggestions.
+    """
+    def __init__(self, words: Optional[List[str]] = None):
+        self.root = _TrieNode()
+        self.size = 0
+        for word in words or []:
+            self.insert(word)
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, word: str):
+        node = self._find(word)
+        return node is not None and node.terminal
+
+    def _find(self, prefix: str) -> Optional[_TrieNode]:
+        node = self.root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return None
+        return node
+
+    def insert(self, word: str) -> None:
+        node = self.root
+        for char in word:
+            node = node.children.setdefault(char, _TrieNode())
+        if not node.terminal:
+            node.terminal = True
+            self.size += 1
+
+    def remove(self, word: str) -> bool:
+        """ Remove a word, pruning any branches left empty. Returns False if it wasn't present. """
+        path = [self.root]
+        for char in word:
+            node = path[-1].children.get(char)
+            if node is None:
+                return False
+            path.append(node)
+        if not path[-1].terminal:
+            return False
+
+        path[-1].terminal = False
+        self.size -= 1
+        for i in range(len(word) - 1, -1, -1):
+            node = path[i + 1]
+            if node.terminal or node.children:
+                break
+            del path[i].children[word[i]]
+        return True
+
+    def starts_with(self, prefix: str, limit: int = 25) -> List[str]:
+        """ Words beginning with `prefix`, in lexicographic order. """
+        node = self._find(prefix)
+        if node is None:
+            return []
+
+        results = []
+        stack = [(node, prefix)]
+        while stack and len(results) < limit:
+            node, word = stack.pop()
+            if node.terminal:
+                results.append(word)
+            # push in reverse so the smallest child is popped first
+            for char in sorted(node.children, reverse=True):
+                stack.append((node.children[char], word + char))
+        return results
+
+    def fuzzy(self, word: str, max_distance: int = 2, limit: int = 5) -> List[str]:
+        """ Words within `max_distance` edits (Levenshtein) of `word`, closest first.
+
+        Walks the trie once, carrying one row of the edit distance table per node so shared
+        prefixes are only computed once, and prunes any branch whose best cell exceeds the limit.
+        """
+        matches: List[Tuple[int, str]] = []
+        first_row = list(range(len(word) + 1))
+
+        def _walk(node: _TrieNode, char: str, prefix: str, prev_row: List[int]):
+            row = [prev_row[0] + 1]
+            for i in range(1, len(word) + 1):
+                cost = 0 if word[i - 1] == char else 1
+                row.append(min(row[i - 1] + 1, prev_row[i] + 1, prev_row[i - 1] + cost))
+
+            if node.terminal and row[-1] <= max_distance:
+                matches.append((row[-1], prefix))
+            if min(row) <= max_distance:
+                for next_char, child in node.children.items():
+                    _walk(child, next_char, prefix + next_char, row)
+
+        for char, child in self.root.children.items():
+            _walk(child, char, char, first_row)
+
+        matches.sort()
+        return [match for _, match in matches[:limit]]
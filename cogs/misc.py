@@ -5,21 +5,40 @@ import datetime
 import pytz
 import time
 import asyncio
-import parsedatetime as pdt
+import contextlib
+from functools import cached_property
 from discord import app_commands
 from discord.ext import commands
 from bot import Zhenpai
+from .helpers import purge
+from .helpers.imports import lazy_import
+from .helpers.message_pipeline import ParsedMessage
 
 import logging
 
 log: logging.Logger = logging.getLogger(__name__)
 
+# Only !timestamp needs it
+pdt = lazy_import('parsedatetime')
+
+# !deletelast N @user looks through at most this many recent messages for the user's
+DELETELAST_USER_SCAN_LIMIT = 500
+
+# (target phrase, exclusion phrases, response), the message pipeline only calls in when a target is in the message
+CALL_AND_RESPONSES = [
+    # ("based", ["based on", "based off"], "on what?"),
+    ("buy the dip", ["buy the dip with"], "with what?"),
+]
+
 class Misc(commands.Cog):
     """Miscellaneous commands."""
 
     def __init__(self, bot: Zhenpai):
         self.bot = bot
-        self.pdtcal = pdt.Calendar()
+
+    @cached_property
+    def pdtcal(self):
+        return pdt.Calendar()
 
     @commands.command()
     async def ping(self, ctx: commands.Context):
@@ -57,6 +76,9 @@ class Misc(commands.Cog):
           !deletelast N @user - Delete last N messages from specific user
           Reply to a message - Delete up to and including that message
         """
+        # Everything up to and including the command message, but nothing we post while deleting
+        before = discord.Object(id=ctx.message.id + 1)
+        progress = purge.ProgressMessage(ctx.channel)
 
         # Delete based on reply
         if ctx.message.reference and ctx.message.reference.message_id:
@@ -71,24 +93,16 @@ class Misc(commands.Cog):
                 await ctx.send("❌ No permission to access that message.")
                 return
 
-            # Count messages from target to now (including the target message)
-            messages_to_delete = [ctx.message]  # Include the command message
-            async for message in ctx.channel.history(after=target_message, limit=None):
-                if message.id != ctx.message.id:  # Don't double-count command message
-                    messages_to_delete.append(message)
-
-            # Add the target message itself
-            messages_to_delete.append(target_message)
-
-            message_count = len(messages_to_delete)
-
-            if message_count > 200:
-                await ctx.send(f"❌ Cannot delete {message_count} messages (max 200). Target message is too far back that's kinda scary.")
-                return
-
             try:
-                await ctx.channel.delete_messages(messages_to_delete)
-                log.info(f"User {ctx.author} deleted {message_count} messages up to message {target_message_id} in {ctx.channel}")
+                # after is exclusive, step back one id so the target itself is included
+                result = await purge.purge_history(
+                    ctx.channel,
+                    after=discord.Object(id=target_message.id - 1),
+                    before=before,
+                    progress=progress
+                )
+                log.info(f"User {ctx.author} deleted {result.deleted} messages up to message {target_message_id} in {ctx.channel} ({result.api_calls} API calls)")
+                await progress.finish(f"🧹 Deleted {result.deleted} messages.")
             except discord.Forbidden:
                 await ctx.send("❌ Missing permissions to delete messages.")
             except Exception as e:
@@ -104,43 +118,31 @@ class Misc(commands.Cog):
                 await ctx.send("❌ Please provide a valid number greater than 0.")
                 return
 
-            if n > 100:
-                await ctx.send("bruh aint no way you tryna delete that much sounds kinda sus do it in batches of 100 so you dont wipe the entire channel")
+            try:
+                if user:
+                    # Only the user's messages from before the command, the command message goes once something matched
+                    result = await purge.purge_history(
+                        ctx.channel, before=ctx.message, limit=n, scan_limit=DELETELAST_USER_SCAN_LIMIT,
+                        check=lambda message: message.author.id == user.id, progress=progress)
+                    if result.deleted == 0:
+                        await ctx.send(f"❌ No messages found from {user.display_name}.")
+                        return
+                    with contextlib.suppress(discord.NotFound):
+                        await ctx.message.delete()
+                        result.deleted += 1
+                else:
+                    # the +1 is the command message
+                    result = await purge.purge_history(ctx.channel, before=before, limit=n + 1, progress=progress)
+            except discord.Forbidden:
+                await ctx.send("❌ Missing permissions to delete messages.")
+                return
+            except Exception as e:
+                await ctx.send(f"❌ Error deleting messages: {e}")
+                log.error(f"Error in deletelast command: {e}")
                 return
 
-            # Delete with optional user filter
-            if user:
-                # Delete last N messages from specific user
-                messages_to_delete = [ctx.message]  # Include command message
-                count = 0
-                async for message in ctx.channel.history(limit=500):
-                    if message.id != ctx.message.id and message.author.id == user.id:
-                        messages_to_delete.append(message)
-                        count += 1
-                        if count >= n:
-                            break
-
-                if len(messages_to_delete) == 1:
-                    await ctx.send(f"❌ No messages found from {user.display_name}.")
-                    return
-
-                try:
-                    await ctx.channel.delete_messages(messages_to_delete)
-                    log.info(f"User {ctx.author} deleted {len(messages_to_delete)} messages from user {user.id} in {ctx.channel}")
-                except discord.Forbidden:
-                    await ctx.send("❌ Missing permissions to delete messages.")
-                except Exception as e:
-                    await ctx.send(f"❌ Error deleting messages: {e}")
-                    log.error(f"Error in deletelast user command: {e}")
-
-            else:
-                # Delete last N messages (original behavior)
-                messages = []
-                async for message in ctx.channel.history(limit=n + 1):
-                    messages.append(message)
-
-                await ctx.channel.delete_messages(messages)
-                log.info(f"User {ctx.author} deleted {len(messages)} messages in {ctx.channel}")
+            log.info(f"User {ctx.author} deleted {result.deleted} messages{f' from user {user.id}' if user else ''} in {ctx.channel} ({result.api_calls} API calls)")
+            await progress.finish(f"🧹 Deleted {result.deleted} messages.")
 
     @commands.command()
     async def nuke(self, ctx: commands.Context, minutes: int):
@@ -162,22 +164,19 @@ class Misc(commands.Cog):
         # Calculate cutoff time
         cutoff_time = datetime.datetime.now(pytz.utc) - datetime.timedelta(minutes=minutes)
 
-        # Count messages within the time frame
-        messages_to_delete = []
-        async for message in ctx.channel.history(limit=1000):
-            if message.created_at >= cutoff_time:
-                messages_to_delete.append(message)
+        # Count messages within the time frame, bounded server side so nothing older is fetched
+        message_ids = [
+            message.id async for message in ctx.channel.history(
+                limit=None, after=cutoff_time, before=discord.Object(id=ctx.message.id + 1)
+            )
+        ]
 
-        message_count = len(messages_to_delete)
+        message_count = len(message_ids)
 
         if message_count == 0:
             await ctx.send(f"❌ No messages found in the last {minutes} minute{'s' if minutes != 1 else ''}.")
             return
 
-        if message_count > 500:
-            await ctx.send(f"❌ Found {message_count} messages in the last {minutes} minutes (max 500). Try a shorter time period.")
-            return
-
         # Send confirmation message
         confirm_msg = await ctx.send(
             f"⚠️ **NUKE CONFIRMATION** ⚠️\n"
@@ -204,29 +203,14 @@ class Misc(commands.Cog):
                 # User confirmed - delete messages
                 await confirm_msg.delete()
 
-                # Delete in batches if needed (Discord limits bulk delete to 100 messages at a time)
-                deleted_count = 0
-                batch_size = 100
-
-                for i in range(0, len(messages_to_delete), batch_size):
-                    batch = messages_to_delete[i:i + batch_size]
-
-                    # Discord bulk delete only works for messages less than 14 days old
-                    fourteen_days_ago = datetime.datetime.now(pytz.utc) - datetime.timedelta(days=14)
-                    recent = [m for m in batch if m.created_at > fourteen_days_ago]
+                progress = purge.ProgressMessage(ctx.channel, total=message_count)
+                result = await purge.purge_messages(ctx.channel, message_ids, progress=progress)
+                deleted_count = result.deleted
 
-                    if len(recent) == 1:
-                        await recent[0].delete()
-                        deleted_count += 1
-                    elif len(recent) > 1:
-                        await ctx.channel.delete_messages(recent)
-                        deleted_count += len(recent)
-
-                log.info(f"User {ctx.author} nuked {deleted_count} messages from last {minutes} minutes in {ctx.channel}")
+                log.info(f"User {ctx.author} nuked {deleted_count} messages from last {minutes} minutes in {ctx.channel} ({result.api_calls} API calls)")
 
                 # Send completion message (will auto-delete after 5 seconds)
-                completion_msg = await ctx.send(f"💥 Nuked {deleted_count} message{'s' if deleted_count != 1 else ''}!")
-                await completion_msg.delete(delay=5)
+                await progress.finish(f"💥 Nuked {deleted_count} message{'s' if deleted_count != 1 else ''}!", always=True)
 
             else:
                 # User cancelled
@@ -323,27 +307,31 @@ class Misc(commands.Cog):
         is_working, message = is_ben_working(content)
         await ctx.send(message)
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message):
-        if message.author.bot:
-            return
+    async def cog_load(self):
+        self.bot.message_pipeline.register(
+            'call_and_response', self.on_call_and_response,
+            lambda parsed: any(target in parsed.lower for target, _, _ in CALL_AND_RESPONSES))
+
+    async def cog_unload(self):
+        self.bot.message_pipeline.unregister('call_and_response')
 
-        # await self._call_and_response(message, "based", ["based on", "based off"], "on what?")
-        await self._call_and_response(message, "buy the dip", ["buy the dip with"], "with what?")
+    async def on_call_and_response(self, parsed: ParsedMessage):
+        for target, exclusions, response in CALL_AND_RESPONSES:
+            await self._call_and_response(parsed, target, exclusions, response)
 
-    async def _call_and_response(self, message: discord.Message, target: str, exclusions: List[str], response: str):
+    async def _call_and_response(self, parsed: ParsedMessage, target: str, exclusions: List[str], response: str):
         """Send `response` when `target` phrase exists and no exclusion matches."""
         def _has_phrase(words: List[str], phrase: List[str]) -> bool:
             n = len(phrase)
             return any(words[i:i + n] == phrase for i in range(len(words) - n + 1))
 
-        words = message.content.lower().split()
+        words = parsed.words
         if not _has_phrase(words, target.lower().split()):
             return
         if any(_has_phrase(words, ex.lower().split()) for ex in exclusions):
             return
 
-        await message.channel.send(response)
+        await parsed.message.channel.send(response)
 
 async def setup(bot: Zhenpai):
     await bot.add_cog(Misc(bot))
\ No newline at end of file
@@ -7,12 +7,17 @@ import logging
 import os
 import asyncio
 
-from cogs.users.db import UsersDb
 from .db import PointsDb
 from bot import Zhenpai
+from cogs.helpers.events import BetSettled, MatchReplicated, PointsChanged
+from cogs.helpers.TTLCache import TTLCache
 
 log: logging.Logger = logging.getLogger(__name__)
 
+# Dropped on points_changed / bet_settled, which every balance write publishes, the ttl only bounds
+# staleness from events lost while the event bus reconnects
+LEADERBOARD_CACHE_SECONDS = 5 * 60
+
 class Points(commands.Cog):
     """Commands for managing and betting points"""
 
@@ -21,16 +26,32 @@ class Points(commands.Cog):
     def __init__(self, bot: Zhenpai):
         self.bot = bot
         self.db = PointsDb(self.bot.db_pool)
-        self.user_db = UsersDb(self.bot.db_pool)
+        self.leaderboard_cache = TTLCache(capacity=1, ttl_seconds=LEADERBOARD_CACHE_SECONDS)
+        # match_replicated events and the safety sweep can overlap, only one may reward a match
+        self.cs2_rewards_lock = asyncio.Lock()
 
     async def cog_load(self):
-        if not self.poll_events.is_running():
-            self.poll_events.start()
+        self.bot.events.subscribe(PointsChanged, self.on_points_changed)
+        self.bot.events.subscribe(BetSettled, self.on_points_changed)
+        # Every process caches the leaderboard, but only one rewards matches
+        if self.bot.is_primary:
+            self.bot.events.subscribe(MatchReplicated, self.on_match_replicated)
+            if not self.poll_events.is_running():
+                self.poll_events.start()
 
     async def cog_unload(self):
+        self.bot.events.unsubscribe(MatchReplicated, self.on_match_replicated)
+        self.bot.events.unsubscribe(PointsChanged, self.on_points_changed)
+        self.bot.events.unsubscribe(BetSettled, self.on_points_changed)
         if self.poll_events.is_running():
             self.poll_events.cancel()
 
+    async def on_match_replicated(self, event: MatchReplicated) -> None:
+        await self._process_cs2_matches()
+
+    async def on_points_changed(self, event) -> None:
+        self.leaderboard_cache.clear()
+
     @commands.command()
     async def leaderboard(self, ctx: commands.Context):
         """Gets the points leaderboard"""
@@ -48,7 +69,7 @@ class Points(commands.Cog):
         message = await ctx.send(embed=loading_embed)
 
         # this is a table scan so it could take a while
-        leaderboard = await self.db.get_points_leaderboard()
+        leaderboard = await self.leaderboard_cache.get_or_load('leaderboard', self.db.get_points_leaderboard)
         
         if not leaderboard:
             embed = discord.Embed(
@@ -356,6 +377,7 @@ class Points(commands.Cog):
             
             # Add the points reward/penalty to the database
             await self.db.add_points_reward(user.id, amount, reason)
+            await self.bot.events.publish(PointsChanged([user.id], reason))
             
             # Get updated total for the user
             new_total = await self.db.get_total_points_by_discord_id(user.id)
@@ -551,6 +573,9 @@ class Points(commands.Cog):
                         log.error(f"Failed to reward {points} points to user {user.id}: {e}")
                         failed += 1
 
+                if results:
+                    await self.bot.events.publish(PointsChanged([user.id for user, _, _ in results], "bulk reward"))
+
                 # Send final confirmation
                 result_embed = discord.Embed(
                     title="✅ Bulk Reward Complete",
@@ -651,6 +676,7 @@ class Points(commands.Cog):
                 ctx.author.display_name, 
                 user.display_name
             )
+            await self.bot.events.publish(PointsChanged([ctx.author.id, user.id], "transfer"))
             
             # Get updated balances
             sender_new_balance = await self.db.get_total_points_by_discord_id(ctx.author.id)
@@ -805,8 +831,9 @@ class Points(commands.Cog):
             log.error(f"Unexpected error in rewardbulk command: {error}")
             await ctx.send("❌ An unexpected error occurred.")
 
-    # @tasks.loop(seconds=15)
-    @tasks.loop(minutes=10)
+    # Matches are normally rewarded as soon as cs2 publishes match_replicated, this sweep only
+    # catches ones whose event was missed, e.g. while the bot was down
+    @tasks.loop(hours=1)
     async def poll_events(self):
         try:
             # Add different point sources here
@@ -818,6 +845,10 @@ class Points(commands.Cog):
             log.error(f"Error in poll_events: {e}")
 
     async def _process_cs2_matches(self) -> None:
+        async with self.cs2_rewards_lock:
+            await self._reward_cs2_matches()
+
+    async def _reward_cs2_matches(self) -> None:
         matches = await self.db.fetch_unprocessed_cs2_matches()
         if not matches:
             return
@@ -836,8 +867,7 @@ class Points(commands.Cog):
                 points_earned += int(player['damage']) // 10
 
                 # Build points table entry
-                if (user := await self.user_db.get_user_by_steamid64(player['steamid64'])):
-                    discord_id = user['discord_id']
+                if (discord_id := self.bot.identities.discord_id_for(player['steamid64'])):
                     change_value = points_earned
                     created_at = match['start_time']
                     category = "cs2"
@@ -855,6 +885,7 @@ class Points(commands.Cog):
             # add all the new points entries and mark event as processed
             if should_write:
                 await self.db.perform_cs2_event_transaction(rows_to_add, matchid)
+                await self.bot.events.publish(PointsChanged([row[0] for row in rows_to_add], "cs2"))
 
     @poll_events.before_loop
     async def before_poll_events(self):
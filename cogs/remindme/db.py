@@ -1,9 +1,10 @@
-from typing import List
+from typing import List, Optional
 from asyncpg import Pool
 from dataclasses import dataclass
 import logging
 from datetime import datetime
 from discord.ext import commands
+from ..helpers.sharding import owned_guild_sql
 from .types import ReminderType
 
 log: logging.Logger = logging.getLogger(__name__)
@@ -42,11 +43,19 @@ class ReminderDb():
     def __init__(self, pool: Pool):
         self.pool = pool
 
-    async def get_active_reminders(self, limit=5) -> List[Reminder]:
-        query = """
-            SELECT * FROM remindme WHERE remind_time <= NOW() AND deleted_on IS NULL AND sent_on IS NULL ORDER BY remind_time ASC LIMIT $1;
-        """
-        rows = await self.pool.fetch(query, limit)
+    async def get_active_reminders(self, limit=5, shard_count: Optional[int] = None, shard_ids: Optional[List[int]] = None) -> List[Reminder]:
+        """ Due reminders, only those in guilds on `shard_ids` when given so each process sends its own guilds'. """
+        if shard_ids is None:
+            query = """
+                SELECT * FROM remindme WHERE remind_time <= NOW() AND deleted_on IS NULL AND sent_on IS NULL ORDER BY remind_time ASC LIMIT $1;
+            """
+            rows = await self.pool.fetch(query, limit)
+        else:
+            query = f"""
+                SELECT * FROM remindme WHERE remind_time <= NOW() AND deleted_on IS NULL AND sent_on IS NULL
+                AND {owned_guild_sql('guild_id', '$2', '$3')} ORDER BY remind_time ASC LIMIT $1;
+            """
+            rows = await self.pool.fetch(query, limit, shard_count, shard_ids)
         return [Reminder.from_row(row) for row in rows]
     
     async def get_unsent_reminders_by_user(self, user_id: int) -> List[Reminder]:
@@ -3,10 +3,11 @@ import logging
 import discord
 from discord.ext import tasks, commands
 from datetime import datetime, timezone
+from functools import cached_property
 import pytz
-import parsedatetime as pdt
 
 from bot import Zhenpai
+from ..helpers.imports import lazy_import
 from .db import ReminderDb
 from .types import ReminderType
 
@@ -14,6 +15,9 @@ log: logging.Logger = logging.getLogger(__name__)
 
 REMINDER_LOOP_MINUTES = 1
 
+# Loaded on the first !remindme rather than at boot
+pdt = lazy_import('parsedatetime')
+
 CENTRAL_TIMEZONE = pytz.timezone('US/Central')
 
 class RemindMe(commands.Cog):
@@ -23,7 +27,10 @@ class RemindMe(commands.Cog):
         self.bot = bot  
         self.db = ReminderDb(self.bot.db_pool)
         self.check_reminders.start()
-        self.datetime_parser = pdt.Calendar()
+
+    @cached_property
+    def datetime_parser(self):
+        return pdt.Calendar()
 
     def cog_unload(self):
         self.check_reminders.cancel()
@@ -134,7 +141,7 @@ class RemindMe(commands.Cog):
     async def check_reminders(self):
         """Polling loop that checks if any reminders need to be sent."""
 
-        active_reminders = await self.db.get_active_reminders()
+        active_reminders = await self.db.get_active_reminders(shard_count=self.bot.shard_count, shard_ids=self.bot.shard_ids)
         for reminder in active_reminders:
             log.info(f"Trying to send reminder id: {reminder.id}")
             
@@ -142,7 +149,17 @@ class RemindMe(commands.Cog):
                 if reminder.reminder_type == ReminderType.PRIVATE:
                     user = self.bot.get_user(reminder.user_id)
                     if user:
-                        await user.send(f"You told me to remind you: {reminder.content}")
+                        result = await self.bot.dms.send(user, f"You told me to remind you: {reminder.content}")
+                        if result.failed:
+                            # transient error, leave it unsent so the next loop retries
+                            continue
+                        if result.unreachable:
+                            # DMs closed, remind them where they asked instead
+                            channel = self.bot.get_channel(reminder.channel_id)
+                            if channel:
+                                await channel.send(f"{user.mention} I couldn't DM you, so here's your reminder: {reminder.content}")
+                            else:
+                                log.warning(f"Could not DM user {reminder.user_id} or find channel {reminder.channel_id} for reminder {reminder.id}")
                     else:
                         log.warning(f"Could not find user {reminder.user_id} for reminder {reminder.id}")
                 elif reminder.reminder_type == ReminderType.PUBLIC:
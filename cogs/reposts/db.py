@@ -0,0 +1,68 @@
+from typing import List, Tuple
+from asyncpg import Pool
+from dataclasses import dataclass
+from datetime import datetime
+import logging
+
+log: logging.Logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RepostRecord:
+    """Dataclass for the first post of a link in a channel."""
+    channel_id: int
+    link_hash: int
+    user_id: int
+    message_id: int
+    posted_at: datetime
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(
+            channel_id=row['channel_id'],
+            link_hash=row['link_hash'],
+            user_id=row['user_id'],
+            message_id=row['message_id'],
+            posted_at=row['posted_at']
+        )
+
+
+class RepostsDb:
+    def __init__(self, pool: Pool):
+        self.pool = pool
+
+    async def get_links_since(self, since: datetime) -> List[RepostRecord]:
+        """Get every link first posted after `since` (naive UTC)."""
+        query = """
+            SELECT * FROM reposts WHERE posted_at >= $1
+        """
+        rows = await self.pool.fetch(query, since)
+        return [RepostRecord.from_row(row) for row in rows]
+
+    async def add_links(self, records: List[RepostRecord], expired_before: datetime) -> None:
+        """Record first posts of links.
+
+        An existing row is only replaced when it's older than `expired_before`, so the
+        original poster is kept for as long as the link counts as a repost.
+        """
+        query = """
+            INSERT INTO reposts (channel_id, link_hash, user_id, message_id, posted_at)
+            VALUES ($1, $2, $3, $4, $5)
+            ON CONFLICT (channel_id, link_hash) DO UPDATE SET
+                user_id = EXCLUDED.user_id,
+                message_id = EXCLUDED.message_id,
+                posted_at = EXCLUDED.posted_at
+            WHERE reposts.posted_at < $6
+        """
+        args: List[Tuple] = [
+            (r.channel_id, r.link_hash, r.user_id, r.message_id, r.posted_at, expired_before)
+            for r in records
+        ]
+        await self.pool.executemany(query, args)
+
+    async def delete_links_before(self, before: datetime) -> str:
+        """Prune links that are outside the repost window."""
+        query = """
+            DELETE FROM reposts WHERE posted_at < $1
+        """
+        return await self.pool.execute(query, before)
@@ -0,0 +1,79 @@
+import hashlib
+import re
+from typing import Iterable, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+_ID_PATTERN = re.compile(r"^[\w-]+$")
+
+
+def _path_parts(path: str) -> List[str]:
+    return [part for part in path.split("/") if part]
+
+
+def _valid_id(value: Optional[str]) -> Optional[str]:
+    if value and _ID_PATTERN.match(value):
+        return value
+    return None
+
+
+def canonicalize(url: str) -> Optional[str]:
+    """ Reduce a supported link to one form per piece of content, or None if it isn't one we track.
+
+    Only the content id is kept, so tracking params (si, utm_*, t, feature, ...), mirror domains
+    (x.com / vxtwitter.com / twitter.com, youtu.be / youtube.com) and vanity path segments
+    (tweet author, reddit post slug) all collapse to the same key.
+    """
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower()
+    if host.startswith("www.") or host.startswith("m.") or host.startswith("mobile.") or host.startswith("old."):
+        host = host.split(".", 1)[1]
+    path = _path_parts(parts.path)
+
+    if host in ("twitter.com", "x.com", "vxtwitter.com", "fxtwitter.com", "fixupx.com"):
+        # /<user>/status/<id> or /i/status/<id>
+        if len(path) >= 3 and path[1] == "status":
+            status_id = _valid_id(path[2])
+            if status_id:
+                return f"https://x.com/i/status/{status_id}"
+        return None
+
+    if host == "youtu.be":
+        video_id = _valid_id(path[0]) if path else None
+    elif host == "youtube.com":
+        if path == ["watch"]:
+            video_id = _valid_id(parse_qs(parts.query).get("v", [None])[0])
+        elif len(path) >= 2 and path[0] in ("shorts", "live", "embed"):
+            video_id = _valid_id(path[1])
+        else:
+            video_id = None
+    else:
+        video_id = None
+    if video_id:
+        return f"https://youtube.com/watch?v={video_id}"
+
+    if host == "redd.it":
+        post_id = _valid_id(path[0]) if path else None
+    elif host == "reddit.com" and len(path) >= 4 and path[0] == "r" and path[2] == "comments":
+        post_id = _valid_id(path[3])
+    else:
+        post_id = None
+    if post_id:
+        return f"https://reddit.com/comments/{post_id}"
+
+    return None
+
+
+def canonical_links(urls: Iterable[str]) -> List[str]:
+    """ Canonical form of every supported link among `urls` (the message pipeline's parsed.urls), deduplicated, in order. """
+    links = []
+    for url in urls:
+        link = canonicalize(url)
+        if link and link not in links:
+            links.append(link)
+    return links
+
+
+def link_hash(link: str) -> int:
+    """ Stable signed 64-bit hash of a canonical link, fits a postgres BIGINT. """
+    digest = hashlib.blake2b(link.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
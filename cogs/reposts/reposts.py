@@ -1,53 +1,99 @@
 import logging
 
 import discord
-import re
-from discord.ext import commands
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+from discord.ext import commands, tasks
 from bot import Zhenpai
-from ..helpers import TTLCache
+from .db import RepostsDb, RepostRecord
+from .links import canonical_links, link_hash
+from ..helpers.message_pipeline import ParsedMessage
 
 log: logging.Logger = logging.getLogger(__name__)
 
-TWITTER_PATTERN = r"(https?://(?:www\.)?twitter\.com/[\w-]+/status/[\w-]+)"
-X_PATTERN = r"(https?://(?:www\.)?x\.com/[\w-]+/status/[\w-]+)"
-YOUTUBE_PATTERN = r"(https?://(?:www\.)?(?:youtube\.com/watch\?v=|youtu\.be/)[\w-]+)"
-REDDIT_PATTERN = r"(https?://(?:www\.)?reddit\.com/r/[\w-]+/comments/[\w-]+/[\w-]+)"
+REPOST_WINDOW = timedelta(days=3)
+PRUNE_LOOP_HOURS = 1
 
 class Reposts(commands.Cog):
     """ Leaves a raised eyebrow react on messages that are recent reposts. """
 
     def __init__(self, bot: Zhenpai):
         self.bot = bot
-        # this is just in memory, one day could persist this
-        self.cache = TTLCache.TTLCache(ttl_seconds=3 * 24 * 60 * 60) # 3 days ttl
+        self.db = RepostsDb(self.bot.db_pool)
+        # Store {(channel_id, link_hash): first post} in memory, persisted so restarts keep the window
+        self.seen: Dict[Tuple[int, int], RepostRecord] = {}
+
+    async def cog_load(self):
+        """Load links posted within the repost window from database into memory on cog load."""
+        records = await self.db.get_links_since(datetime.utcnow() - REPOST_WINDOW)
+        for record in records:
+            self.seen[(record.channel_id, record.link_hash)] = record
+        self.prune_links.start()
+        log.info(f"Loaded {len(self.seen)} recently posted links from database")
+        self.bot.message_pipeline.register('reposts', self.on_link_message, lambda parsed: bool(parsed.urls))
+
+    def cog_unload(self):
+        self.bot.message_pipeline.unregister('reposts')
+        self.prune_links.cancel()
 
-    def _build_cache_key(self, channel_id: str, link: str) -> str:
-        return f"{channel_id}:{link}"
-    
     @commands.command(hidden=True)
     async def debug_cache(self, ctx: commands.Context):
-        await ctx.send(f"size: {len(self.cache.cache)} Cache: {self.cache.cache}")
+        channel_count = sum(1 for channel_id, _ in self.seen if channel_id == ctx.channel.id)
+        await ctx.send(f"size: {len(self.seen)} this channel: {channel_count}")
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message):
-        if message.author.bot:
+    async def on_link_message(self, parsed: ParsedMessage):
+        links = canonical_links(parsed.urls)
+        if not links:
             return
-        
-        if message.content:
-            matches = [re.findall(pattern, message.content) for pattern in [YOUTUBE_PATTERN, REDDIT_PATTERN, TWITTER_PATTERN, X_PATTERN]]
-            flattened_matches = [match for sublist in matches for match in sublist]
-            should_react = False
-            for match in flattened_matches:
-                if not match:
-                    continue
-                cache_key = self._build_cache_key(message.channel.id, match)
-                if cache_key in self.cache:
-                    should_react = True
-                
-                res = self.cache[cache_key] = True
-                if not res:
-                    log.info(f"Failed to set cache key: {cache_key}")
-            if should_react:
-                await message.add_reaction("🤨")
-                return
-                
\ No newline at end of file
+
+        message = parsed.message
+
+        posted_at = message.created_at.replace(tzinfo=None)
+        expired_before = posted_at - REPOST_WINDOW
+        first_post = None
+        new_records: List[RepostRecord] = []
+        for link in links:
+            key = (message.channel.id, link_hash(link))
+            existing = self.seen.get(key)
+            if existing and existing.posted_at >= expired_before:
+                first_post = first_post or existing
+                continue
+
+            record = RepostRecord(
+                channel_id=message.channel.id,
+                link_hash=key[1],
+                user_id=message.author.id,
+                message_id=message.id,
+                posted_at=posted_at
+            )
+            self.seen[key] = record
+            new_records.append(record)
+
+        if new_records:
+            try:
+                await self.db.add_links(new_records, expired_before)
+            except Exception as e:
+                log.error(f"Failed to persist {len(new_records)} links: {e}")
+
+        if first_post:
+            await message.add_reaction("🤨")
+            original = message.channel.get_partial_message(first_post.message_id)
+            await message.reply(
+                f"<@{first_post.user_id}> posted this first {discord.utils.format_dt(first_post.posted_at.replace(tzinfo=discord.utils.utc), 'R')}: {original.jump_url}",
+                mention_author=False,
+                allowed_mentions=discord.AllowedMentions.none()
+            )
+
+    @tasks.loop(hours=PRUNE_LOOP_HOURS)
+    async def prune_links(self):
+        """Drop links that are outside the repost window, in memory and in the database."""
+        cutoff = datetime.utcnow() - REPOST_WINDOW
+        expired = [key for key, record in self.seen.items() if record.posted_at < cutoff]
+        for key in expired:
+            del self.seen[key]
+        result = await self.db.delete_links_before(cutoff)
+        log.info(f"Pruned {len(expired)} expired links from memory, database: {result}")
+
+    @prune_links.before_loop
+    async def before_prune_links(self):
+        await self.bot.wait_until_ready()
@@ -1,11 +1,15 @@
 from discord.ext import commands
 import discord
+import asyncio
 import logging
 import config
 from bot import Zhenpai
 from typing import Dict, List, Optional, Tuple
 import re
 from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+
+from ..helpers.TTLCache import TTLCache
 
 log: logging.Logger = logging.getLogger(__name__)
 
@@ -28,6 +32,12 @@ TFT_SUMMONERS = [
 REGION = "na1"
 TFT_SET_NUMBER = 16
 
+# Repeated !tft calls within this window reuse the same data instead of hitting tft.tools again
+TFT_CACHE_TTL_SECONDS = 60
+MAX_CONCURRENT_FETCHES = 4
+# tft.tools builds the 50 match history on request, it can be slow
+TFT_TOOLS_TIMEOUT_SECONDS = 20
+
 TIER_VALUES = {
     "CHALLENGER": 10,
     "GRANDMASTER": 9,
@@ -54,6 +64,9 @@ class Riot(commands.Cog):
 
     def __init__(self, bot: Zhenpai):
         self.bot = bot
+        self.tft_cache = TTLCache(capacity=100, ttl_seconds=TFT_CACHE_TTL_SECONDS)
+        if config.TFT_TOOLS_BASE_URL:
+            bot.http_service.configure_host(urlsplit(config.TFT_TOOLS_BASE_URL).hostname, concurrency=MAX_CONCURRENT_FETCHES)
 
     async def fetch_tft_data(self, name: str, tag: str) -> Optional[Dict]:
         """Fetch TFT data from API"""
@@ -62,40 +75,53 @@ class Riot(commands.Cog):
         api_url = f"{base_url}/player/stats2/{REGION}/{name}/{tag}/{set_param}/50"
 
         try:
-            async with self.bot.http_client.get(api_url) as resp:
-                if resp.status != 200:
-                    log.error(f"Failed to fetch TFT data for {name}#{tag} from tft.tools (status {resp.status})")
-                    return None
-                log.info(f"fetching for {name}#{tag}")
-                data = await resp.json()
-                log.info(f"done fetching for {name}#{tag}")
-
-                # Extract rankedLeague from playerInfo
-                # Returns [division, LP] like ["PLATINUM I", 92] or ["MASTER I", 199]
-                ranked_league = data.get("playerInfo", {}).get("rankedLeague", [])
-
-                # Extract number of ranked games
-                games = data.get("queueSeasonStats", {}).get("1100", {}).get("games", 0)
-
-                # Calculate L2DLP: LP gained/lost from last 2 days of ranked games
-                matches = data.get("matches", [])
-                ranked_matches = [m for m in matches if m.get("queueId") == 1100]
-
-                # Filter for matches in the last 2 days
-                three_days_ago = (datetime.now().timestamp() - (2 * 24 * 60 * 60)) * 1000  # 2 days in milliseconds
-                recent_ranked = [m for m in ranked_matches if m.get("dateTime", 0) >= three_days_ago]
-                l2dlp = sum(m.get("lpDiff", 0) for m in recent_ranked)
-
-                return {
-                    "rankedLeague": ranked_league,
-                    "games": games,
-                    "l2dlp": l2dlp
-                }
+            log.info(f"fetching for {name}#{tag}")
+            resp = await self.bot.http_service.get(api_url, timeout=TFT_TOOLS_TIMEOUT_SECONDS)
+            if resp.status != 200:
+                log.error(f"Failed to fetch TFT data for {name}#{tag} from tft.tools (status {resp.status})")
+                return None
+            data = resp.json()
+            log.info(f"done fetching for {name}#{tag}")
+
+            # Extract rankedLeague from playerInfo
+            # Returns [division, LP] like ["PLATINUM I", 92] or ["MASTER I", 199]
+            ranked_league = data.get("playerInfo", {}).get("rankedLeague", [])
+
+            # Extract number of ranked games
+            games = data.get("queueSeasonStats", {}).get("1100", {}).get("games", 0)
+
+            # Calculate L2DLP: LP gained/lost from last 2 days of ranked games
+            matches = data.get("matches", [])
+            ranked_matches = [m for m in matches if m.get("queueId") == 1100]
+
+            # Filter for matches in the last 2 days
+            three_days_ago = (datetime.now().timestamp() - (2 * 24 * 60 * 60)) * 1000  # 2 days in milliseconds
+            recent_ranked = [m for m in ranked_matches if m.get("dateTime", 0) >= three_days_ago]
+            l2dlp = sum(m.get("lpDiff", 0) for m in recent_ranked)
+
+            return {
+                "rankedLeague": ranked_league,
+                "games": games,
+                "l2dlp": l2dlp
+            }
 
         except Exception as e:
             log.exception(f"Error fetching TFT data for {name}#{tag}: {e}")
             return None
 
+    async def get_tft_data(self, name: str, tag: str) -> Optional[Dict]:
+        """Cached TFT data, concurrent callers for the same summoner share one fetch. Failures aren't cached."""
+        async def load():
+            data = await self.fetch_tft_data(name, tag)
+            if data is None:
+                raise LookupError(f"{name}#{tag}")
+            return data
+
+        try:
+            return await self.tft_cache.get_or_load((name.lower(), tag.lower()), load)
+        except LookupError:
+            return None
+
     def get_rank_string(self, ranked_league: List) -> str:
         """Get the rank string without formatting"""
         if not ranked_league or len(ranked_league) != 2:
@@ -163,8 +189,8 @@ class Riot(commands.Cog):
         message = await ctx.send("Fetching tft stats...")
         player_data = []
 
-        for riot_name, tag in TFT_SUMMONERS:
-            data = await self.fetch_tft_data(riot_name, tag)
+        all_data = await asyncio.gather(*(self.get_tft_data(riot_name, tag) for riot_name, tag in TFT_SUMMONERS))
+        for (riot_name, tag), data in zip(TFT_SUMMONERS, all_data):
             if not data:
                 log.warning(f"Failed to fetch data for {riot_name}#{tag}")
                 continue
@@ -19,7 +19,8 @@ class Saturday(commands.Cog):
     """
     def __init__(self, bot: Zhenpai):
         self.bot = bot
-        self.my_task.start()
+        if self.bot.is_primary:
+            self.my_task.start()
 
     def cog_unload(self):
         self.my_task.cancel()
@@ -31,20 +31,29 @@ class TagsDb():
         """
         return await self.pool.fetch(query, guild_id)
     
-    async def create_tag(self, tag_name: str, content: str, guild_id: int, user_id: int):
+    async def create_tag(self, tag_name: str, content: str, guild_id: int, user_id: int) -> bool:
+        """Create a tag, relying on the (guild_id, tag) unique constraint instead of a lookup first.
+
+        Returns:
+            True if the tag was created, False if it already existed.
+        """
         query = """
             INSERT INTO tags (tag, content, guild_id, user_id) VALUES ($1, $2, $3, $4)
+            ON CONFLICT (guild_id, tag) DO NOTHING
         """
-        return await self.pool.execute(query, tag_name, content, guild_id, user_id)
+        result = await self.pool.execute(query, tag_name, content, guild_id, user_id)
+        return result == "INSERT 0 1"
     
-    async def update_tag(self, tag_name: str, content: str, user_id: int):
+    async def update_tag(self, tag_name: str, content: str, user_id: int) -> bool:
         query = """
             UPDATE tags SET content = $2, user_id = $3 WHERE tag = $1
         """
-        return await self.pool.execute(query, tag_name, content, user_id)
+        result = await self.pool.execute(query, tag_name, content, user_id)
+        return result != "UPDATE 0"
     
-    async def delete_tag(self, tag_name: str):
+    async def delete_tag(self, tag_name: str) -> bool:
         query = """
             DELETE FROM tags WHERE tag = $1
         """
-        return await self.pool.execute(query, tag_name)
\ No newline at end of file
+        result = await self.pool.execute(query, tag_name)
+        return result != "DELETE 0"
\ No newline at end of file
@@ -1,84 +1,152 @@
-import discord
 from discord.ext import commands
 import logging
+from typing import Dict, Optional
 from .db import TagsDb
+from ..helpers.events import TagChanged
 from bot import Zhenpai
 from ..helpers import pagination
+from ..helpers.message_pipeline import ParsedMessage
+from ..helpers.trie import Trie
 
 log: logging.Logger = logging.getLogger(__name__)
 
+# tokens shorter than this never get "did you mean" suggestions, too noisy
+MIN_SUGGESTION_LENGTH = 3
+
 class Tags(commands.Cog):
     """ For saving and retrieving things """
 
     def __init__(self, bot: Zhenpai):
         self.bot = bot
         self.db = TagsDb(self.bot.db_pool)
+        # Store {tag_name: content} in memory, tags are looked up globally (see on_tag_message)
+        self.tags: Dict[str, str] = {}
+        # Mirrors the keys of self.tags for prefix listing and "did you mean" suggestions
+        self.tag_index = Trie()
+
+    async def cog_load(self):
+        """Load all tags from database into memory on cog load."""
+        await self._load_tags()
+        # Tags are global, so with several shard processes each one follows the others' changes
+        self.bot.events.subscribe(TagChanged, self.on_tag_changed)
+        self.bot.events.on_reconnect(self._load_tags)
+        self.bot.message_pipeline.register('tags', self.on_tag_message, self._is_tag_candidate)
+
+    async def cog_unload(self):
+        self.bot.events.unsubscribe(TagChanged, self.on_tag_changed)
+        self.bot.events.remove_reconnect(self._load_tags)
+        self.bot.message_pipeline.unregister('tags')
+
+    async def _load_tags(self) -> None:
+        tags: Dict[str, str] = {}
+        for record in await self.db.get_all_tags():
+            # same tag name can exist in multiple guilds, first one wins like the old global query
+            if record['tag'] not in tags:
+                tags[record['tag']] = record['content']
+        for tag_name in set(self.tags) - set(tags):
+            self._uncache_tag(tag_name)
+        for tag_name, content in tags.items():
+            self._cache_tag(tag_name, content)
+        log.info(f"Loaded {len(self.tags)} tags from database")
+
+    async def on_tag_changed(self, event: TagChanged) -> None:
+        # our own changes come back too and are already applied, re-reading them is harmless
+        record = await self.db.get_tag(event.tag_name)
+        if record is None:
+            self._uncache_tag(event.tag_name)
+        else:
+            self._cache_tag(record['tag'], record['content'])
+
+    def _cache_tag(self, tag_name: str, content: str) -> None:
+        self.tags[tag_name] = content
+        self.tag_index.insert(tag_name)
+
+    def _uncache_tag(self, tag_name: str) -> None:
+        self.tags.pop(tag_name, None)
+        self.tag_index.remove(tag_name)
+
+    def _suggest(self, token: str) -> Optional[str]:
+        """ Suggest the closest existing tag names for a token that isn't a tag. """
+        if len(token) < MIN_SUGGESTION_LENGTH:
+            return None
+        max_distance = 1 if len(token) < 5 else 2
+        matches = self.tag_index.fuzzy(token, max_distance=max_distance, limit=3)
+        if not matches:
+            return None
+        return ", ".join(f"**{match}**" for match in matches)
 
     @commands.command()
     async def save(self, ctx: commands.Context, tag_name: str, *, content: str) -> None:
         """ Save a tag """
 
-        existing_tags = await self.db.get_all_tags()
-        existing_tag_names = [tag['tag'] for tag in existing_tags]
-        if tag_name in existing_tag_names:
+        if tag_name in self.tags:
             await ctx.send(f'Tag **{tag_name}** already exists. Use !update to change it. I did this so you dont accidentally overwrite.')
             return
         if tag_name in self.bot.all_commands:
             await ctx.send(f'Tag **{tag_name}** conflicts with an existing command')
             return
 
-        await self.db.create_tag(tag_name, content, ctx.guild.id, ctx.author.id)
+        created = await self.db.create_tag(tag_name, content, ctx.guild.id, ctx.author.id)
+        if not created:
+            await ctx.send(f'Tag **{tag_name}** already exists. Use !update to change it. I did this so you dont accidentally overwrite.')
+            return
+
+        self._cache_tag(tag_name, content)
+        await self.bot.events.publish(TagChanged(tag_name, 'save'))
         await ctx.send(f'Tag **{tag_name}** created.')
 
     @commands.command()
     async def update(self, ctx: commands.Context, tag_name: str, *, content: str) -> None:
         """ Update an existing tag """
 
-        existing_tags = await self.db.get_all_tags()
-        existing_tag_names = [tag['tag'] for tag in existing_tags]
-        if tag_name not in existing_tag_names:
+        if tag_name not in self.tags:
             await ctx.send(f"Tag **{tag_name}** doesn't exist")
             return
 
         await self.db.update_tag(tag_name, content, ctx.author.id)
+        self._cache_tag(tag_name, content)
+        await self.bot.events.publish(TagChanged(tag_name, 'update'))
         await ctx.send(f'Tag **{tag_name}** updated.')
 
     @commands.command()
     async def delete(self, ctx: commands.Context, tag_name: str) -> None:
         """ Delete a tag """
 
-        res = await self.db.delete_tag(tag_name)
-        if res:
-            await ctx.send(f'Tag **{tag_name}** deleted.')
-        else:   
+        if tag_name not in self.tags:
             await ctx.send(f"Tag **{tag_name}** doesn't exist")
+            return
+
+        await self.db.delete_tag(tag_name)
+        self._uncache_tag(tag_name)
+        await self.bot.events.publish(TagChanged(tag_name, 'delete'))
+        await ctx.send(f'Tag **{tag_name}** deleted.')
 
     @commands.command()
-    async def taglist(self, ctx: commands.Context) -> None:
-        """ List all tags """
+    async def taglist(self, ctx: commands.Context, prefix: str = "") -> None:
+        """ List all tags, optionally only the ones starting with a prefix """
 
-        tags = await self.db.get_all_tags()
         guild_name = ctx.guild.name
         title = f"Tags for {guild_name}"
-        if tags:
-            tag_list = [tag['tag'] for tag in tags]
+        tag_list = self.tag_index.starts_with(prefix, limit=len(self.tag_index))
+        if tag_list:
             await pagination.Paginator(ctx, tag_list, title).show()
         else:
             await ctx.send('No tags found')
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message):
-        """ Check messages for tags """
+    def _is_tag_candidate(self, parsed: ParsedMessage) -> bool:
+        token = parsed.command_token
+        return bool(token) and token not in self.bot.all_commands
+
+    async def on_tag_message(self, parsed: ParsedMessage):
+        """ Check prefixed messages that aren't commands for tags """
+        first_token = parsed.command_token
 
-        if message.author.bot:
+        # 08-25-23 switched this to look up globally
+        content = self.tags.get(first_token)
+        if content is not None:
+            await parsed.message.channel.send(content)
             return
 
-        prefix = self.bot.command_prefix
-        if message.content.startswith(prefix):
-            first_token = message.content.split(' ')[0][len(prefix):]
-            # record = await self.db.get_tag_by_guild(first_token, message.guild.id)
-            # 08-25-23 switched this to query globally
-            record = await self.db.get_tag(first_token)
-            if record:
-                await message.channel.send(record['content'])
-        
\ No newline at end of file
+        suggestion = self._suggest(first_token)
+        if suggestion:
+            await parsed.message.channel.send(f'Tag **{first_token}** not found. Did you mean {suggestion}?')
@@ -1,6 +1,7 @@
-from typing import List
+from typing import Dict, List, Optional
 from asyncpg import Pool
 from dataclasses import dataclass
+from datetime import datetime
 import logging
 
 log: logging.Logger = logging.getLogger(__name__)
@@ -14,6 +15,8 @@ class TenMinuteChannelRecord:
     channel_id: int
     delete_after_minutes: int
     created_at: str
+    last_queued_message_id: Optional[int]
+    sweep_mode: bool
 
     @classmethod
     def from_row(cls, row):
@@ -22,7 +25,27 @@ class TenMinuteChannelRecord:
             guild_id=row['guild_id'],
             channel_id=row['channel_id'],
             delete_after_minutes=row['delete_after_minutes'],
-            created_at=row['created_at']
+            created_at=row['created_at'],
+            last_queued_message_id=row['last_queued_message_id'],
+            sweep_mode=row['sweep_mode']
+        )
+
+
+@dataclass
+class PendingDeletion:
+    """Dataclass for a message waiting to be deleted."""
+    guild_id: int
+    channel_id: int
+    message_id: int
+    delete_at: datetime
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(
+            guild_id=row['guild_id'],
+            channel_id=row['channel_id'],
+            message_id=row['message_id'],
+            delete_at=row['delete_at']
         )
 
 
@@ -108,6 +131,20 @@ class TenMinuteChannelDb:
         result = await self.pool.execute(query, guild_id, channel_id, delete_after_minutes)
         return result == "UPDATE 1"
 
+    async def set_sweep_mode(self, guild_id: int, channel_id: int, sweep_mode: bool) -> bool:
+        """Switch a channel between queued deletion and periodic sweeps.
+
+        Returns:
+            True if the channel was successfully updated, False otherwise.
+        """
+        query = """
+            UPDATE ten_minute_channels
+            SET sweep_mode = $3
+            WHERE guild_id = $1 AND channel_id = $2
+        """
+        result = await self.pool.execute(query, guild_id, channel_id, sweep_mode)
+        return result == "UPDATE 1"
+
     async def get_channel(self, guild_id: int, channel_id: int) -> TenMinuteChannelRecord:
         """Get a specific channel record.
 
@@ -124,3 +161,50 @@ class TenMinuteChannelDb:
         """
         row = await self.pool.fetchrow(query, guild_id, channel_id)
         return TenMinuteChannelRecord.from_row(row) if row else None
+
+    async def get_pending_deletions(self) -> List[PendingDeletion]:
+        """Get every message still waiting to be deleted."""
+        query = """
+            SELECT * FROM ten_minute_pending_deletions
+        """
+        rows = await self.pool.fetch(query)
+        return [PendingDeletion.from_row(row) for row in rows]
+
+    async def add_pending_deletions(self, deletions: List[PendingDeletion]) -> None:
+        """Queue messages for deletion and advance each channel's checkpoint in one transaction."""
+        insert_query = """
+            INSERT INTO ten_minute_pending_deletions (guild_id, channel_id, message_id, delete_at)
+            VALUES ($1, $2, $3, $4)
+            ON CONFLICT (channel_id, message_id) DO NOTHING
+        """
+        checkpoint_query = """
+            UPDATE ten_minute_channels
+            SET last_queued_message_id = GREATEST(COALESCE(last_queued_message_id, 0), $2)
+            WHERE channel_id = $1
+        """
+        checkpoints: Dict[int, int] = {}
+        for d in deletions:
+            checkpoints[d.channel_id] = max(checkpoints.get(d.channel_id, 0), d.message_id)
+
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.executemany(insert_query, [
+                    (d.guild_id, d.channel_id, d.message_id, d.delete_at) for d in deletions
+                ])
+                await conn.executemany(checkpoint_query, list(checkpoints.items()))
+
+    async def remove_pending_deletions(self, channel_id: int, message_ids: List[int]) -> None:
+        """Remove messages from the deletion queue once they're gone."""
+        query = """
+            DELETE FROM ten_minute_pending_deletions
+            WHERE channel_id = $1 AND message_id = ANY($2::BIGINT[])
+        """
+        await self.pool.execute(query, channel_id, message_ids)
+
+    async def clear_pending_deletions(self, channel_id: int) -> None:
+        """Drop the whole deletion queue for a channel."""
+        query = """
+            DELETE FROM ten_minute_pending_deletions
+            WHERE channel_id = $1
+        """
+        await self.pool.execute(query, channel_id)
@@ -1,13 +1,33 @@
+import heapq
 import logging
 import discord
-from discord.ext import commands
-from typing import Dict, Tuple
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from discord.ext import commands, tasks
+from typing import Dict, List, Optional, Set, Tuple
 
 from bot import Zhenpai
-from .db import TenMinuteChannelDb
+from .db import TenMinuteChannelDb, PendingDeletion
+from ..helpers import purge
+from ..helpers.message_pipeline import ParsedMessage
 
 log: logging.Logger = logging.getLogger(__name__)
 
+DRAIN_INTERVAL_SECONDS = 10
+SWEEP_INTERVAL_SECONDS = 60
+# Messages that couldn't be deleted, e.g. missing permissions, are retried after this
+DELETE_RETRY_DELAY = timedelta(minutes=5)
+
+
+@dataclass
+class SweepStats:
+    """Per-channel counters for sweep mode."""
+    sweeps: int = 0
+    last_deleted: int = 0
+    last_api_calls: int = 0
+    total_deleted: int = 0
+    last_swept_at: Optional[datetime] = None
+
 
 class TenMinuteChannel(commands.Cog):
     """Manages channels where messages are automatically deleted after a configurable time period."""
@@ -17,15 +37,155 @@ class TenMinuteChannel(commands.Cog):
         self.db = TenMinuteChannelDb(bot.db_pool)
         # Store {(guild_id, channel_id): delete_after_minutes} in memory
         self.registered_channels: Dict[Tuple[int, int], int] = {}
-        self._loaded = False
+        # Store {channel_id: last_queued_message_id} for catching up on messages sent while offline
+        self.checkpoints: Dict[int, Optional[int]] = {}
+        # Min-heap of (delete_at, channel_id, message_id), mirrors ten_minute_pending_deletions
+        self.deletion_queue: List[Tuple[datetime, int, int]] = []
+        # Queued in memory but not yet written to the database
+        self.unsaved_deletions: List[PendingDeletion] = []
+        # Channels in sweep mode, their messages are never queued
+        self.sweep_channels: Set[int] = set()
+        self.sweep_stats: Dict[int, SweepStats] = {}
 
     async def cog_load(self):
-        """Load registered channels from database into memory on cog load."""
+        """Load registered channels and the deletion queue from database into memory on cog load.
+        With sharding, each process keeps only the channels in guilds on its own shards."""
         channels = await self.db.get_all_channels()
+        channel_guilds = {record.channel_id: record.guild_id for record in channels}
         for record in channels:
+            if not self.bot.owns_guild(record.guild_id):
+                continue
             self.registered_channels[(record.guild_id, record.channel_id)] = record.delete_after_minutes
-        self._loaded = True
-        log.info(f"Loaded {len(self.registered_channels)} registered auto-delete channels from database")
+            self.checkpoints[record.channel_id] = record.last_queued_message_id
+            if record.sweep_mode:
+                self.sweep_channels.add(record.channel_id)
+        for deletion in await self.db.get_pending_deletions():
+            # Leftovers from since unregistered channels go to the primary process
+            guild_id = channel_guilds.get(deletion.channel_id)
+            if not (self.bot.owns_guild(guild_id) if guild_id is not None else self.bot.is_primary):
+                continue
+            self.deletion_queue.append((deletion.delete_at, deletion.channel_id, deletion.message_id))
+        heapq.heapify(self.deletion_queue)
+        log.info(f"Loaded {len(self.registered_channels)} registered auto-delete channels and {len(self.deletion_queue)} pending deletions from database")
+        self.drain_deletions.start()
+        self.sweep_channels_loop.start()
+        # Bot messages get deleted too
+        self.bot.message_pipeline.register(
+            'ten_minute_channel', self.on_channel_message,
+            lambda parsed: parsed.channel_key in self.registered_channels, include_bots=True)
+
+    async def cog_unload(self):
+        self.bot.message_pipeline.unregister('ten_minute_channel')
+        self.drain_deletions.cancel()
+        self.sweep_channels_loop.cancel()
+        await self._save_queued()
+
+    def _queue_deletion(self, guild_id: int, channel_id: int, message_id: int, delete_at: datetime):
+        heapq.heappush(self.deletion_queue, (delete_at, channel_id, message_id))
+        self.unsaved_deletions.append(PendingDeletion(
+            guild_id=guild_id,
+            channel_id=channel_id,
+            message_id=message_id,
+            delete_at=delete_at
+        ))
+
+    def _queue_message(self, message: discord.Message, delete_after_minutes: int):
+        delete_at = message.created_at.replace(tzinfo=None) + timedelta(minutes=delete_after_minutes)
+        self._queue_deletion(message.guild.id, message.channel.id, message.id, delete_at)
+
+    async def _save_queued(self):
+        """Write queued deletions to the database, they're retried next tick if this fails."""
+        if not self.unsaved_deletions:
+            return
+        deletions, self.unsaved_deletions = self.unsaved_deletions, []
+        try:
+            await self.db.add_pending_deletions(deletions)
+        except Exception as e:
+            self.unsaved_deletions = deletions + self.unsaved_deletions
+            log.error(f"Failed to save {len(deletions)} pending deletions: {e}")
+            return
+        for deletion in deletions:
+            if deletion.message_id > (self.checkpoints.get(deletion.channel_id) or 0):
+                self.checkpoints[deletion.channel_id] = deletion.message_id
+
+    async def _purge(self, channel: discord.abc.Messageable, message_ids: List[int]) -> List[int]:
+        """Delete messages from a channel through the shared purge engine. Returns the ids that are gone,
+        which is all of them unless deleting failed part way."""
+        purger = purge.Purger(channel)
+        try:
+            for message_id in message_ids:
+                await purger.add(message_id)
+            await purger.flush()
+        except discord.Forbidden:
+            log.error(f"Missing permissions to delete messages in channel {channel.id}")
+        except Exception as e:
+            log.error(f"Error deleting messages in channel {channel.id}: {e}")
+        return purger.removed
+
+    def _requeue(self, channel_id: int, message_ids: List[int]):
+        """Put deletions back on the queue for a later retry, their database rows are left as they are."""
+        retry_at = datetime.utcnow() + DELETE_RETRY_DELAY
+        for message_id in message_ids:
+            heapq.heappush(self.deletion_queue, (retry_at, channel_id, message_id))
+
+    async def _delete_messages(self, channel_id: int, message_ids: List[int]):
+        """Delete due messages from a channel, then drop the deleted ones from the queue. The rest are retried later."""
+        channel = self.bot.get_channel(channel_id)
+        if channel is None:
+            log.warning(f"Dropping {len(message_ids)} pending deletions for missing channel {channel_id}")
+            await self.db.remove_pending_deletions(channel_id, message_ids)
+            return
+
+        removed = await self._purge(channel, message_ids)
+        removed_ids = set(removed)
+        failed = [message_id for message_id in message_ids if message_id not in removed_ids]
+        if failed:
+            log.warning(f"Retrying {len(failed)} deletions in channel {channel_id} in {DELETE_RETRY_DELAY}")
+            self._requeue(channel_id, failed)
+        if removed:
+            log.debug(f"Deleted {len(removed)} messages in channel {channel_id}")
+            await self.db.remove_pending_deletions(channel_id, removed)
+
+    async def _sweep_channel(self, channel_id: int, delete_after_minutes: int):
+        """Delete everything in a channel older than its deletion period."""
+        channel = self.bot.get_channel(channel_id)
+        if channel is None:
+            return
+
+        cutoff = discord.utils.utcnow() - timedelta(minutes=delete_after_minutes)
+        # Streamed, so a large backlog is deleted batch by batch as the history is read
+        try:
+            result = await purge.purge_history(channel, before=cutoff)
+        except discord.Forbidden:
+            log.error(f"Missing permissions to sweep channel {channel_id}")
+            result = purge.PurgeResult()
+
+        stats = self.sweep_stats.setdefault(channel_id, SweepStats())
+        stats.sweeps += 1
+        stats.last_deleted = result.deleted
+        stats.last_api_calls = result.api_calls
+        stats.total_deleted += result.deleted
+        stats.last_swept_at = datetime.utcnow()
+        if result.deleted:
+            log.info(f"Swept {result.deleted} messages with {result.api_calls} API calls in channel {channel_id}")
+
+    async def _catch_up_channel(self, guild_id: int, channel_id: int, delete_after_minutes: int):
+        """Queue messages sent since the channel's checkpoint, i.e. while the bot was offline."""
+        channel = self.bot.get_channel(channel_id)
+        if channel is None:
+            return
+
+        checkpoint = self.checkpoints.get(channel_id)
+        after = discord.Object(id=checkpoint) if checkpoint else None
+        count = 0
+        try:
+            async for message in channel.history(limit=None, after=after, oldest_first=True):
+                self._queue_message(message, delete_after_minutes)
+                count += 1
+        except discord.Forbidden:
+            log.error(f"Missing permissions to read history in channel {channel_id}")
+        if count:
+            log.info(f"Queued {count} messages sent while offline in channel {channel_id}")
 
     @commands.command(name="create10min")
     @commands.has_permissions(manage_channels=True)
@@ -57,6 +217,7 @@ class TenMinuteChannel(commands.Cog):
 
             # Add to in-memory dict
             self.registered_channels[(ctx.guild.id, new_channel.id)] = delete_after_minutes
+            self.checkpoints[new_channel.id] = None
 
             await ctx.send(f"Created {new_channel.mention} with {delete_after_minutes}-minute message deletion enabled. Messages will be automatically deleted after {delete_after_minutes} minutes.")
             log.info(f"Created auto-delete channel {new_channel.id} ({channel_name}) with {delete_after_minutes} min period in guild {ctx.guild.id}")
@@ -85,8 +246,15 @@ class TenMinuteChannel(commands.Cog):
             # Remove from database
             await self.db.remove_channel(ctx.guild.id, channel.id)
 
-            # Remove from in-memory dict
+            # Remove from in-memory dict and drop anything still queued
             del self.registered_channels[channel_key]
+            self.checkpoints.pop(channel.id, None)
+            self.sweep_channels.discard(channel.id)
+            self.sweep_stats.pop(channel.id, None)
+            self.deletion_queue = [entry for entry in self.deletion_queue if entry[1] != channel.id]
+            heapq.heapify(self.deletion_queue)
+            self.unsaved_deletions = [d for d in self.unsaved_deletions if d.channel_id != channel.id]
+            await self.db.clear_pending_deletions(channel.id)
 
             # Delete the channel
             await channel.delete(reason=f"Auto-delete channel deleted by {ctx.author}")
@@ -117,10 +285,15 @@ class TenMinuteChannel(commands.Cog):
         channel_info = []
         for (_, channel_id), minutes in guild_channels:
             channel = self.bot.get_channel(channel_id)
-            if channel:
-                channel_info.append(f"{channel.mention} - {minutes} minute{'s' if minutes != 1 else ''}")
-            else:
-                channel_info.append(f"<Unknown channel {channel_id}> - {minutes} minute{'s' if minutes != 1 else ''}")
+            name = channel.mention if channel else f"<Unknown channel {channel_id}>"
+            info = f"{name} - {minutes} minute{'s' if minutes != 1 else ''}"
+            if channel_id in self.sweep_channels:
+                stats = self.sweep_stats.get(channel_id)
+                info += " (sweep mode"
+                if stats:
+                    info += f", last sweep deleted {stats.last_deleted} with {stats.last_api_calls} API calls, {stats.total_deleted} total over {stats.sweeps} sweeps"
+                info += ")"
+            channel_info.append(info)
 
         await ctx.send(f"Auto-delete channels:\n" + "\n".join(channel_info))
 
@@ -161,31 +334,93 @@ class TenMinuteChannel(commands.Cog):
             await ctx.send(f"Error updating channel configuration: {e}")
             log.error(f"Error updating auto-delete channel configuration: {e}")
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message):
-        """Schedule message deletion when a message is sent in an auto-delete channel."""
-        # Ignore DMs
-        if not message.guild:
-            return
+    @commands.command(name="sweep10min")
+    @commands.has_permissions(manage_channels=True)
+    async def configure_sweep_mode(self, ctx: commands.Context, channel: discord.TextChannel, enabled: bool):
+        """Switch an auto-delete channel to sweep mode, where expired messages are bulk deleted
+        every minute instead of one at a time. Cheaper for busy channels.
+
+        Usage: !sweep10min #channel <on|off>
+        Example: !sweep10min #quick-chat on
+        """
+        channel_key = (ctx.guild.id, channel.id)
 
-        # Wait until channels are loaded
-        if not self._loaded:
+        # Check if it's a registered auto-delete channel
+        if channel_key not in self.registered_channels:
+            await ctx.send(f"{channel.mention} is not an auto-delete channel.")
             return
 
-        # Check if message is in a registered auto-delete channel
-        channel_key = (message.guild.id, message.channel.id)
-        delete_after_minutes = self.registered_channels.get(channel_key)
+        try:
+            await self.db.set_sweep_mode(ctx.guild.id, channel.id, enabled)
+
+            if enabled:
+                self.sweep_channels.add(channel.id)
+            else:
+                self.sweep_channels.discard(channel.id)
+                self.sweep_stats.pop(channel.id, None)
+                # Nothing was queued while sweeping, pick those messages up from history
+                await self._catch_up_channel(ctx.guild.id, channel.id, self.registered_channels[channel_key])
+
+            await ctx.send(f"Sweep mode {'enabled' if enabled else 'disabled'} for {channel.mention}.")
+            log.info(f"Set sweep mode for channel {channel.id} to {enabled} in guild {ctx.guild.id}")
+
+        except Exception as e:
+            await ctx.send(f"Error updating channel configuration: {e}")
+            log.error(f"Error updating auto-delete channel sweep mode: {e}")
+
+    async def on_channel_message(self, parsed: ParsedMessage):
+        """Queue message deletion when a message is sent in an auto-delete channel."""
+        message = parsed.message
+        delete_after_minutes = self.registered_channels.get(parsed.channel_key)
 
         if delete_after_minutes is None:
             return
 
-        # Schedule message deletion
-        delete_after_seconds = delete_after_minutes * 60
+        # Sweep mode channels get cleaned up by the sweeper instead
+        if message.channel.id in self.sweep_channels:
+            return
 
-        try:
-            await message.delete(delay=delete_after_seconds)
-            log.debug(f"Scheduled deletion of message {message.id} in {delete_after_minutes} minutes")
-        except discord.Forbidden:
-            log.error(f"Missing permissions to delete messages in channel {message.channel.id}")
-        except Exception as e:
-            log.error(f"Error scheduling message deletion in channel {message.channel.id}: {e}")
+        self._queue_message(message, delete_after_minutes)
+        log.debug(f"Queued deletion of message {message.id} in {delete_after_minutes} minutes")
+
+    @tasks.loop(seconds=DRAIN_INTERVAL_SECONDS)
+    async def drain_deletions(self):
+        """Single scheduler for every auto-delete channel: persist new entries, then delete whatever is due."""
+        await self._save_queued()
+
+        now = datetime.utcnow()
+        due: Dict[int, List[int]] = {}
+        while self.deletion_queue and self.deletion_queue[0][0] <= now:
+            _, channel_id, message_id = heapq.heappop(self.deletion_queue)
+            due.setdefault(channel_id, []).append(message_id)
+
+        for channel_id, message_ids in due.items():
+            try:
+                await self._delete_messages(channel_id, message_ids)
+            except Exception as e:
+                # already popped off the heap but still in the database, try them again later
+                log.error(f"Error deleting messages in channel {channel_id}: {e}")
+                self._requeue(channel_id, message_ids)
+
+    @drain_deletions.before_loop
+    async def before_drain_deletions(self):
+        await self.bot.wait_until_ready()
+        for (guild_id, channel_id), delete_after_minutes in list(self.registered_channels.items()):
+            if channel_id not in self.sweep_channels:
+                await self._catch_up_channel(guild_id, channel_id, delete_after_minutes)
+        log.info(f"Starting {__name__} deletion loop with {len(self.deletion_queue)} pending deletions")
+
+    @tasks.loop(seconds=SWEEP_INTERVAL_SECONDS)
+    async def sweep_channels_loop(self):
+        """Bulk delete expired messages in every sweep mode channel."""
+        for (guild_id, channel_id), delete_after_minutes in list(self.registered_channels.items()):
+            if channel_id not in self.sweep_channels:
+                continue
+            try:
+                await self._sweep_channel(channel_id, delete_after_minutes)
+            except Exception as e:
+                log.error(f"Error sweeping channel {channel_id}: {e}")
+
+    @sweep_channels_loop.before_loop
+    async def before_sweep_channels_loop(self):
+        await self.bot.wait_until_ready()
@@ -1,4 +1,6 @@
+import asyncpg
 from asyncpg import Pool
+from typing import Iterable, List, Optional, Tuple
 import logging
 
 log: logging.Logger = logging.getLogger(__name__)
@@ -40,6 +42,38 @@ class UsersDb():
         """
         return await self.pool.fetchrow(query, discord_id, discord_username, steamid64)
     
+    async def upsert_users(self, users: Iterable[Tuple[int, str, Optional[int]]]) -> List[Tuple[Tuple[int, str, Optional[int]], Exception]]:
+        """Create or update many (discord_id, discord_username, steamid64) rows in one transaction
+
+        If the batch fails, the rows are retried one at a time so a bad row only fails itself.
+
+        Returns:
+            The rows that couldn't be written, with their errors
+        """
+        users = list(users)
+        query = """
+            INSERT INTO users (discord_id, discord_username, steamid64)
+            VALUES ($1, $2, $3)
+            ON CONFLICT (discord_id) DO UPDATE SET
+                discord_username = EXCLUDED.discord_username,
+                steamid64 = EXCLUDED.steamid64
+        """
+        async with self.pool.acquire() as conn:
+            try:
+                async with conn.transaction():
+                    await conn.executemany(query, users)
+                return []
+            except (asyncpg.PostgresError, asyncpg.InterfaceError) as e:
+                log.warning(f"Batch upsert of {len(users)} users failed, retrying one at a time: {e}")
+
+            failed = []
+            for user in users:
+                try:
+                    await conn.execute(query, *user)
+                except (asyncpg.PostgresError, asyncpg.InterfaceError) as e:
+                    failed.append((user, e))
+            return failed
+    
     async def update_user_steamid64(self, discord_id: int, steamid64: int):
         """Update user's Steam ID"""
         query = """
@@ -3,65 +3,82 @@ Shared utilities for user processing
 Contains common logic for creating/updating users from data
 """
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 import logging
 from .db import UsersDb
 
 logger = logging.getLogger(__name__)
 
-async def process_users_data(
-    users_db: UsersDb, 
-    users_data: List[Dict[str, Any]]
-) -> tuple[int, int, List[str]]:
-    """Process a list of user data and create/update users in the database
-    
-    Args:
-        users_db: UsersDb instance for database operations
-        users_data: List of user dictionaries with 'id', 'handle', and 'steamId' fields
-        
+UserRow = Tuple[int, str, Optional[int]]  # (discord_id, discord_username, steamid64)
+
+def parse_users_data(users_data: List[Dict[str, Any]]) -> Tuple[Dict[int, UserRow], List[str]]:
+    """Validate user dictionaries into rows keyed by discord id, a later duplicate wins
+
     Returns:
-        Tuple of (new_users_count, updated_users_count, errors_list)
+        Tuple of (rows_by_discord_id, errors_list)
     """
-    processed_count = 0
-    updated_count = 0
+    rows: Dict[int, UserRow] = {}
     errors = []
-    
+
     for user_data in users_data:
         try:
             # Extract required fields
             discord_id = int(user_data.get('id'))
             handle = user_data.get('handle')
             steam_id = user_data.get('steamId')
-            
+
             if not discord_id or not handle:
                 errors.append(f"Missing required fields for user: {user_data}")
                 continue
-            
+
             # Convert steam_id to int if present
             steamid64 = int(steam_id) if steam_id else None
-            
-            # Check if user already exists
-            existing_user = await users_db.get_user_by_discord_id(discord_id)
-            
-            if existing_user:
-                # Update existing user (UsersDb.create_user handles updates)
-                await users_db.create_user(discord_id, handle, steamid64)
-                updated_count += 1
-                logger.info(f"Updated user: {handle} (ID: {discord_id})")
-            else:
-                # Create new user
-                await users_db.create_user(discord_id, handle, steamid64)
-                processed_count += 1
-                logger.info(f"Created new user: {handle} (ID: {discord_id})")
-                
-        except (ValueError, KeyError) as e:
+            rows[discord_id] = (discord_id, handle, steamid64)
+
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
             error_msg = f"Invalid data for user: {user_data} - {str(e)}"
             errors.append(error_msg)
             logger.warning(error_msg)
-        except Exception as e:
-            error_msg = f"Error processing user {user_data}: {str(e)}"
-            errors.append(error_msg)
-            logger.error(error_msg)
-    
-    return processed_count, updated_count, errors
 
+    return rows, errors
+
+async def process_users_data(
+    users_db: UsersDb,
+    users_data: List[Dict[str, Any]]
+) -> Tuple[int, int, int, List[str]]:
+    """Bring the users table in line with a list of user data
+
+    Reads the current table once, diffs it against the data and writes only new or
+    changed users, in one batch. Users missing from the data are left alone, and
+    users that fail to write are reported in the errors.
+
+    Args:
+        users_db: UsersDb instance for database operations
+        users_data: List of user dictionaries with 'id', 'handle', and 'steamId' fields
+
+    Returns:
+        Tuple of (new_users_count, updated_users_count, unchanged_users_count, errors_list)
+    """
+    rows, errors = parse_users_data(users_data)
+
+    existing = {user['discord_id']: (user['discord_id'], user['discord_username'], user['steamid64'])
+                for user in await users_db.get_all_users()}
+
+    created = [row for discord_id, row in rows.items() if discord_id not in existing]
+    updated = [row for discord_id, row in rows.items() if discord_id in existing and existing[discord_id] != row]
+    unchanged_count = len(rows) - len(created) - len(updated)
+
+    if created or updated:
+        failed = await users_db.upsert_users(created + updated)
+        failed_ids = {row[0] for row, _ in failed}
+        for (discord_id, handle, _), error in failed:
+            errors.append(f"Could not write user: {handle} (ID: {discord_id}) - {error}")
+        created = [row for row in created if row[0] not in failed_ids]
+        updated = [row for row in updated if row[0] not in failed_ids]
+
+    for discord_id, handle, _ in created:
+        logger.info(f"Created new user: {handle} (ID: {discord_id})")
+    for discord_id, handle, _ in updated:
+        logger.info(f"Updated user: {handle} (ID: {discord_id})")
+
+    return len(created), len(updated), unchanged_count, errors
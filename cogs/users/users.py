@@ -89,7 +89,7 @@ class Users(commands.Cog):
             log.error(f"Error listing users: {e}")
             await ctx.send(f"❌ Error listing users: {str(e)}")
 
-    async def _process_users_data(self, users_data: List[Dict[str, Any]]) -> Tuple[int, int, List[str]]:
+    async def _process_users_data(self, users_data: List[Dict[str, Any]]) -> Tuple[int, int, int, List[str]]:
         from .user_utils import process_users_data
         return await process_users_data(self.db, users_data)
 
@@ -141,13 +141,13 @@ class Users(commands.Cog):
                 return
             
             # Process the users
-            processed_count, updated_count, errors = await self._process_users_data(users_data)
+            processed_count, updated_count, unchanged_count, errors = await self._process_users_data(users_data)
             
             # Send results
             embed = discord.Embed(title="User Import Results", color=discord.Color.green())
             embed.add_field(name="New Users Added", value=processed_count, inline=True)
             embed.add_field(name="Users Updated", value=updated_count, inline=True)
-            embed.add_field(name="Total Processed", value=processed_count + updated_count, inline=True)
+            embed.add_field(name="Unchanged", value=unchanged_count, inline=True)
             
             if errors:
                 embed.color = discord.Color.orange()
@@ -159,7 +159,7 @@ class Users(commands.Cog):
             await ctx.send(embed=embed)
             
             # Log the operation
-            log.info(f"User import completed by {ctx.author}: {processed_count} new, {updated_count} updated, {len(errors)} errors")
+            log.info(f"User import completed by {ctx.author}: {processed_count} new, {updated_count} updated, {unchanged_count} unchanged, {len(errors)} errors")
             
         except Exception as e:
             log.error(f"Error in loadusers command: {e}")
@@ -1,9 +1,42 @@
 from asyncpg import Pool
+from dataclasses import dataclass
+from datetime import datetime
 import logging
-from typing import Optional
+from typing import List, Optional
 
 log: logging.Logger = logging.getLogger(__name__)
 
+
+@dataclass
+class VoiceLogConfig:
+    """Dataclass for a guild's voice logging configuration."""
+    guild_id: int
+    log_channel_id: int
+    enabled: bool
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(
+            guild_id=row['guild_id'],
+            log_channel_id=row['log_channel_id'],
+            enabled=row['enabled']
+        )
+
+
+@dataclass
+class VoiceSession:
+    """Dataclass for one continuous stay in a voice channel."""
+    guild_id: int
+    user_id: int
+    channel_id: int
+    joined_at: datetime
+    left_at: datetime
+
+    @property
+    def duration_seconds(self) -> int:
+        return max(0, int((self.left_at - self.joined_at).total_seconds()))
+
+
 class VoiceLoggingDb:
     def __init__(self, pool: Pool):
         self.pool = pool
@@ -29,6 +62,14 @@ class VoiceLoggingDb:
         result = await self.pool.fetchval(query, guild_id)
         return result
 
+    async def get_all_configs(self) -> List[VoiceLogConfig]:
+        """Get the voice logging configuration of every guild"""
+        query = """
+        SELECT guild_id, log_channel_id, enabled FROM voice_log_config
+        """
+        rows = await self.pool.fetch(query)
+        return [VoiceLogConfig.from_row(row) for row in rows]
+
     async def disable_logging(self, guild_id: int):
         """Disable voice logging for a guild"""
         query = """
@@ -45,4 +86,40 @@ class VoiceLoggingDb:
         SET enabled = true, updated_at = NOW()
         WHERE guild_id = $1
         """
-        await self.pool.execute(query, guild_id)
\ No newline at end of file
+        await self.pool.execute(query, guild_id)
+
+    async def add_sessions(self, sessions: List[VoiceSession]):
+        """Write finished voice sessions and roll them into the per-member totals in one transaction"""
+        session_query = """
+        INSERT INTO voice_sessions (guild_id, user_id, channel_id, joined_at, left_at, duration_seconds)
+        VALUES ($1, $2, $3, $4, $5, $6)
+        """
+        totals_query = """
+        INSERT INTO voice_time_totals (guild_id, user_id, total_seconds, session_count, last_seen_at)
+        VALUES ($1, $2, $3, 1, $4)
+        ON CONFLICT (guild_id, user_id)
+        DO UPDATE SET
+            total_seconds = voice_time_totals.total_seconds + EXCLUDED.total_seconds,
+            session_count = voice_time_totals.session_count + 1,
+            last_seen_at = GREATEST(voice_time_totals.last_seen_at, EXCLUDED.last_seen_at)
+        """
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.executemany(session_query, [
+                    (s.guild_id, s.user_id, s.channel_id, s.joined_at, s.left_at, s.duration_seconds)
+                    for s in sessions
+                ])
+                await conn.executemany(totals_query, [
+                    (s.guild_id, s.user_id, s.duration_seconds, s.left_at)
+                    for s in sessions
+                ])
+
+    async def get_voice_leaderboard(self, guild_id: int, limit: int = 10):
+        """Get the members with the most total time in voice for a guild"""
+        query = """
+        SELECT user_id, total_seconds, session_count FROM voice_time_totals
+        WHERE guild_id = $1
+        ORDER BY total_seconds DESC
+        LIMIT $2
+        """
+        return await self.pool.fetch(query, guild_id, limit)
@@ -1,81 +1,283 @@
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 import logging
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 
 from bot import Zhenpai
-from .db import VoiceLoggingDb
+from .db import VoiceLoggingDb, VoiceLogConfig, VoiceSession
 
 log: logging.Logger = logging.getLogger(__name__)
 
+FLUSH_INTERVAL_SECONDS = 5
+EMBED_DESCRIPTION_LIMIT = 4096
+EMBEDS_PER_MESSAGE = 10
+# Discord's cap on the text of all embeds in one message combined
+EMBED_TOTAL_LIMIT = 6000
+# After this many failed batch writes in a row, sessions are written one by one and bad ones dropped
+MAX_FAILED_SESSION_FLUSHES = 12
+# Finished sessions kept for retrying while the database is unavailable, the oldest are dropped past this
+MAX_PENDING_SESSIONS = 5000
+
+
+@dataclass
+class VoiceEvent:
+    """A join, leave or move waiting to be posted to the log channel."""
+    member: discord.Member
+    before: Optional[discord.abc.GuildChannel]
+    after: Optional[discord.abc.GuildChannel]
+    timestamp: datetime
+
+
 class VoiceLogging(commands.Cog):
     """Voice channel activity logging"""
 
     def __init__(self, bot: Zhenpai):
         self.bot = bot
         self.db = VoiceLoggingDb(bot.db_pool)
+        # Store {guild_id: config} in memory, voice state updates are too frequent to query for
+        self.configs: Dict[int, VoiceLogConfig] = {}
+        # Events waiting for the next flush, {guild_id: [event]}
+        self.pending_events: Dict[int, List[VoiceEvent]] = {}
+        # Members currently in voice, {(guild_id, user_id): (channel_id, joined_at)}
+        self.open_sessions: Dict[Tuple[int, int], Tuple[int, datetime]] = {}
+        # Finished sessions waiting for the next flush
+        self.pending_sessions: List[VoiceSession] = []
+        # Batch writes that failed in a row, see _flush_sessions
+        self.failed_session_flushes = 0
+
+    async def cog_load(self):
+        """Load voice logging configs from database into memory on cog load."""
+        for config in await self.db.get_all_configs():
+            self.configs[config.guild_id] = config
+        log.info(f"Loaded {len(self.configs)} voice logging configs from database")
+        self.flush_events.start()
+
+    async def cog_unload(self):
+        self.flush_events.cancel()
+        # Post whatever is still buffered and close out everyone still in voice so nothing is lost across a reload
+        await self._flush_events()
+        now = datetime.utcnow()
+        for key in list(self.open_sessions):
+            self._close_session(key[0], key[1], now)
+        await self._flush_sessions()
+
+    def _get_log_channel_id(self, guild_id: int) -> Optional[int]:
+        config = self.configs.get(guild_id)
+        if config is None or not config.enabled:
+            return None
+        return config.log_channel_id
+
+    def _open_session(self, guild_id: int, user_id: int, channel_id: int, joined_at: datetime):
+        self.open_sessions[(guild_id, user_id)] = (channel_id, joined_at)
+
+    def _close_session(self, guild_id: int, user_id: int, left_at: datetime):
+        session = self.open_sessions.pop((guild_id, user_id), None)
+        if session is None:
+            # joined before we started tracking, nothing to record
+            return
+        channel_id, joined_at = session
+        self.pending_sessions.append(VoiceSession(
+            guild_id=guild_id,
+            user_id=user_id,
+            channel_id=channel_id,
+            joined_at=joined_at,
+            left_at=left_at
+        ))
+
+    def _track_guild(self, guild: discord.Guild):
+        """Open sessions for everyone already sitting in voice, e.g. after a restart."""
+        now = datetime.utcnow()
+        for channel in guild.voice_channels + guild.stage_channels:
+            for member in channel.members:
+                if not member.bot and (guild.id, member.id) not in self.open_sessions:
+                    self._open_session(guild.id, member.id, channel.id, now)
+
+    def _untrack_guild(self, guild_id: int):
+        now = datetime.utcnow()
+        for key in [key for key in self.open_sessions if key[0] == guild_id]:
+            self._close_session(guild_id, key[1], now)
 
     @commands.Cog.listener()
     async def on_voice_state_update(self, member: discord.Member, before: discord.VoiceState, after: discord.VoiceState):
-        """Handle voice channel join/leave/move events"""
-        if not member.guild:
+        """Buffer voice channel join/leave/move events for the next flush"""
+        # Mute, deafen, stream and video toggles don't change channel and never get logged
+        if before.channel == after.channel:
             return
 
-        # Get the log channel for this guild
-        log_channel_id = await self.db.get_log_channel(member.guild.id)
-        if not log_channel_id:
+        if not member.guild:
             return
 
-        log_channel = self.bot.get_channel(log_channel_id)
-        if not log_channel:
+        # Only guilds with logging enabled are logged or tracked
+        if not self._get_log_channel_id(member.guild.id):
             return
 
-        # Determine what happened
-        embed = None
-        
-        if before.channel is None and after.channel is not None:
+        now = datetime.utcnow()
+        if not member.bot:
+            if before.channel is not None:
+                self._close_session(member.guild.id, member.id, now)
+            if after.channel is not None:
+                self._open_session(member.guild.id, member.id, after.channel.id, now)
+
+        self.pending_events.setdefault(member.guild.id, []).append(
+            VoiceEvent(member=member, before=before.channel, after=after.channel, timestamp=now)
+        )
+
+    def _build_single_embed(self, event: VoiceEvent) -> discord.Embed:
+        member = event.member
+        if event.before is None:
             # User joined a voice channel
             embed = discord.Embed(
                 title="🎤 Voice Channel Joined",
-                description=f"{member.mention} joined {after.channel.mention}",
+                description=f"{member.mention} joined {event.after.mention}",
                 color=discord.Color.green(),
-                timestamp=datetime.utcnow()
+                timestamp=event.timestamp
             )
-            embed.set_author(name=member.display_name, icon_url=member.avatar.url if member.avatar else None)
-            
-        elif before.channel is not None and after.channel is None:
+        elif event.after is None:
             # User left a voice channel
             embed = discord.Embed(
                 title="🔇 Voice Channel Left",
-                description=f"{member.mention} left {before.channel.mention}",
+                description=f"{member.mention} left {event.before.mention}",
                 color=discord.Color.red(),
-                timestamp=datetime.utcnow()
+                timestamp=event.timestamp
             )
-            embed.set_author(name=member.display_name, icon_url=member.avatar.url if member.avatar else None)
-            
-        elif before.channel != after.channel and before.channel is not None and after.channel is not None:
+        else:
             # User moved between voice channels
             embed = discord.Embed(
                 title="🔄 Voice Channel Moved",
-                description=f"{member.mention} moved from {before.channel.mention} to {after.channel.mention}",
+                description=f"{member.mention} moved from {event.before.mention} to {event.after.mention}",
                 color=discord.Color.orange(),
-                timestamp=datetime.utcnow()
+                timestamp=event.timestamp
             )
-            embed.set_author(name=member.display_name, icon_url=member.avatar.url if member.avatar else None)
+        embed.set_author(name=member.display_name, icon_url=member.avatar.url if member.avatar else None)
+        return embed
+
+    def _format_event_line(self, event: VoiceEvent) -> str:
+        time = discord.utils.format_dt(event.timestamp.replace(tzinfo=discord.utils.utc), 'T')
+        member = event.member.mention
+        if event.before is None:
+            return f"{time} 🎤 {member} joined {event.after.mention}"
+        if event.after is None:
+            return f"{time} 🔇 {member} left {event.before.mention}"
+        return f"{time} 🔄 {member} moved from {event.before.mention} to {event.after.mention}"
+
+    def _build_batch_embeds(self, events: List[VoiceEvent]) -> List[discord.Embed]:
+        """One embed per description-sized chunk of event lines."""
+        embeds = []
+        lines: List[str] = []
+        length = 0
+        for line in map(self._format_event_line, events):
+            if lines and length + len(line) + 1 > EMBED_DESCRIPTION_LIMIT:
+                embeds.append(discord.Embed(description="\n".join(lines), color=discord.Color.blurple()))
+                lines, length = [], 0
+            lines.append(line)
+            length += len(line) + 1
+        if lines:
+            embeds.append(discord.Embed(description="\n".join(lines), color=discord.Color.blurple()))
+
+        embeds[0].title = f"🔊 Voice Activity ({len(events)} events)"
+        embeds[-1].timestamp = events[-1].timestamp
+        return embeds
 
-        # Send the embed if we have one
-        if embed:
+    async def _flush_guild_events(self, guild_id: int, events: List[VoiceEvent]):
+        log_channel_id = self._get_log_channel_id(guild_id)
+        log_channel = self.bot.get_channel(log_channel_id) if log_channel_id else None
+        if not log_channel:
+            return
+
+        if len(events) == 1:
+            embeds = [self._build_single_embed(events[0])]
+        else:
+            embeds = self._build_batch_embeds(events)
+
+        try:
+            for message_embeds in self._group_embeds(embeds):
+                await log_channel.send(embeds=message_embeds)
+        except Exception as e:
+            log.error(f"Failed to send voice log message: {e}")
+
+    @staticmethod
+    def _group_embeds(embeds: List[discord.Embed]) -> List[List[discord.Embed]]:
+        """Split embeds into messages that stay under both the embed count and total text limits."""
+        messages: List[List[discord.Embed]] = []
+        current: List[discord.Embed] = []
+        total = 0
+        for embed in embeds:
+            size = len(embed)
+            if current and (len(current) >= EMBEDS_PER_MESSAGE or total + size > EMBED_TOTAL_LIMIT):
+                messages.append(current)
+                current, total = [], 0
+            current.append(embed)
+            total += size
+        if current:
+            messages.append(current)
+        return messages
+
+    async def _flush_sessions(self):
+        if not self.pending_sessions:
+            return
+        sessions, self.pending_sessions = self.pending_sessions, []
+        try:
+            await self.db.add_sessions(sessions)
+            self.failed_session_flushes = 0
+            return
+        except Exception as e:
+            self.failed_session_flushes += 1
+            log.error(f"Failed to write {len(sessions)} voice sessions ({self.failed_session_flushes} in a row): {e}")
+
+        if self.failed_session_flushes >= MAX_FAILED_SESSION_FLUSHES:
+            # keeps failing, find and drop the rows that can't be written so they stop blocking the rest
+            self.failed_session_flushes = 0
+            sessions = await self._write_sessions_one_by_one(sessions)
+
+        # put the rest back and retry on the next flush
+        self.pending_sessions = sessions + self.pending_sessions
+        overflow = len(self.pending_sessions) - MAX_PENDING_SESSIONS
+        if overflow > 0:
+            del self.pending_sessions[:overflow]
+            log.error(f"Dropped the {overflow} oldest unwritten voice sessions, over the {MAX_PENDING_SESSIONS} limit")
+
+    async def _write_sessions_one_by_one(self, sessions: List[VoiceSession]) -> List[VoiceSession]:
+        """Write sessions individually. Returns the ones to retry: all of them if none went through,
+        since the database is probably down, otherwise none, the failures are logged and dropped."""
+        failed = []
+        for session in sessions:
             try:
-                await log_channel.send(embed=embed)
+                await self.db.add_sessions([session])
             except Exception as e:
-                log.error(f"Failed to send voice log message: {e}")
+                failed.append((session, e))
+        if len(failed) == len(sessions):
+            return sessions
+        for session, error in failed:
+            log.error(f"Dropping voice session that can't be written: {session} - {error}")
+        return []
+
+    @tasks.loop(seconds=FLUSH_INTERVAL_SECONDS)
+    async def flush_events(self):
+        """Post buffered events as one message per guild and write finished sessions in one batch."""
+        await self._flush_events()
+        await self._flush_sessions()
+
+    async def _flush_events(self):
+        pending, self.pending_events = self.pending_events, {}
+        for guild_id, events in pending.items():
+            await self._flush_guild_events(guild_id, events)
+
+    @flush_events.before_loop
+    async def before_flush_events(self):
+        await self.bot.wait_until_ready()
+        for guild_id in self.configs:
+            guild = self.bot.get_guild(guild_id)
+            if guild and self._get_log_channel_id(guild_id):
+                self._track_guild(guild)
+        log.info(f"Starting {__name__} flush loop, tracking {len(self.open_sessions)} members already in voice")
 
     @commands.group(name='voicelog', invoke_without_command=True)
     @commands.has_permissions(manage_guild=True)
     async def voice_log(self, ctx):
         """Voice logging configuration commands"""
-        await ctx.send("Available commands: `setup`, `disable`, `enable`")
+        await ctx.send("Available commands: `setup`, `disable`, `enable`, `top`")
 
     @voice_log.command(name='setup')
     @commands.has_permissions(manage_guild=True)
@@ -85,6 +287,14 @@ class VoiceLogging(commands.Cog):
             channel = ctx.channel
 
         await self.db.set_log_channel(ctx.guild.id, channel.id)
+        existing = self.configs.get(ctx.guild.id)
+        self.configs[ctx.guild.id] = VoiceLogConfig(
+            guild_id=ctx.guild.id,
+            log_channel_id=channel.id,
+            enabled=existing.enabled if existing else True
+        )
+        if self._get_log_channel_id(ctx.guild.id):
+            self._track_guild(ctx.guild)
         
         embed = discord.Embed(
             title="✅ Voice Logging Configured",
@@ -98,6 +308,9 @@ class VoiceLogging(commands.Cog):
     async def disable_voice_log(self, ctx):
         """Disable voice logging for this server"""
         await self.db.disable_logging(ctx.guild.id)
+        if ctx.guild.id in self.configs:
+            self.configs[ctx.guild.id].enabled = False
+        self._untrack_guild(ctx.guild.id)
         
         embed = discord.Embed(
             title="🔇 Voice Logging Disabled",
@@ -111,6 +324,9 @@ class VoiceLogging(commands.Cog):
     async def enable_voice_log(self, ctx):
         """Enable voice logging for this server"""
         await self.db.enable_logging(ctx.guild.id)
+        if ctx.guild.id in self.configs:
+            self.configs[ctx.guild.id].enabled = True
+            self._track_guild(ctx.guild)
         
         embed = discord.Embed(
             title="✅ Voice Logging Enabled",
@@ -119,5 +335,27 @@ class VoiceLogging(commands.Cog):
         )
         await ctx.send(embed=embed)
 
+    @voice_log.command(name='top')
+    async def voice_log_top(self, ctx, limit: int = 10):
+        """Show who has spent the most time in voice in this server"""
+        limit = max(1, min(limit, 25))
+        rows = await self.db.get_voice_leaderboard(ctx.guild.id, limit)
+        if not rows:
+            await ctx.send("No voice sessions recorded for this server yet.")
+            return
+
+        lines = []
+        for i, row in enumerate(rows, start=1):
+            hours, remainder = divmod(row['total_seconds'], 3600)
+            minutes = remainder // 60
+            lines.append(f"**{i}.** <@{row['user_id']}> - {hours}h {minutes}m ({row['session_count']} sessions)")
+
+        embed = discord.Embed(
+            title="🎧 Time in Voice",
+            description="\n".join(lines),
+            color=discord.Color.blurple()
+        )
+        await ctx.send(embed=embed, allowed_mentions=discord.AllowedMentions.none())
+
 async def setup(bot):
     await bot.add_cog(VoiceLogging(bot))
\ No newline at end of file
@@ -45,6 +45,13 @@ COMMIT_HASH = os.environ.get('COMMIT_HASH') or os.environ.get('RAILWAY_GIT_COMMI
 
 COMMAND_PREFIX = "!"
 
+# Sharding: each process runs the SHARD_IDS ("0-3", "0,2,4") out of SHARD_COUNT shards.
+# Unset, one process runs every shard. Process-wide singletons (cs2 live matches and replication,
+# points sweeps, command sync, the Flask service) run in whichever process owns PRIMARY_SHARD_ID.
+SHARD_COUNT = int(os.environ['SHARD_COUNT']) if os.environ.get('SHARD_COUNT') else None
+SHARD_IDS = os.environ.get('SHARD_IDS')
+PRIMARY_SHARD_ID = int(os.environ.get('PRIMARY_SHARD_ID', 0))
+
 # apexlegendsstatus dot com
 APEX_API_KEY = os.environ.get('APEX_API_KEY')
 
@@ -2,24 +2,32 @@
 """
 Idempotent user loading script
 Loads users from users.json and creates/updates them in the database
-Safe to run multiple times - will only create missing users and update existing ones
+Safe to run multiple times - will only create missing users and update changed ones,
+and does nothing at all if users.json hasn't changed since the last load
 """
 
+import hashlib
 import json
 import os
 import sys
 import asyncio
 import asyncpg
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import logging
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+USERS_JSON_HASH_KEY = 'users_json_hash'
 
-async def load_users_from_json():
-    """Main function to load users from users.json"""
+
+async def load_users_from_json(pool: Optional[asyncpg.Pool] = None):
+    """Main function to load users from users.json
+
+    Uses `pool` if given (the bot passes its own at startup), otherwise opens a
+    small one for the duration of the load.
+    """
     
     # Read users.json file
     users_json_path = 'users.json'
@@ -28,8 +36,9 @@ async def load_users_from_json():
         return
     
     try:
-        with open(users_json_path, 'r') as f:
-            users_data = json.load(f)
+        with open(users_json_path, 'rb') as f:
+            users_json = f.read()
+        users_data = json.loads(users_json)
         logger.info(f"Loaded {len(users_data)} users from {users_json_path}")
     except json.JSONDecodeError as e:
         logger.error(f"Invalid JSON in users.json: {e}")
@@ -42,38 +51,50 @@ async def load_users_from_json():
         logger.error("users.json should contain an array of user objects")
         return
     
-    import config
-    
-    # Connect to database
-    try:
-        pool = await asyncpg.create_pool(
-            host=config.PGHOST,
-            port=config.PGPORT,
-            database=config.PGDATABASE,
-            user=config.PGUSER,
-            password=config.PGPASSWORD,
-            min_size=1,
-            max_size=5
-        )
-        logger.info("Connected to database")
-    except Exception as e:
-        logger.error(f"Could not connect to database: {e}")
-        return
+    owns_pool = pool is None
+    if owns_pool:
+        import config
+
+        # Connect to database
+        try:
+            pool = await asyncpg.create_pool(
+                host=config.PGHOST,
+                port=config.PGPORT,
+                database=config.PGDATABASE,
+                user=config.PGUSER,
+                password=config.PGPASSWORD,
+                min_size=1,
+                max_size=5
+            )
+            logger.info("Connected to database")
+        except Exception as e:
+            logger.error(f"Could not connect to database: {e}")
+            return
     
     try:
-        # Process users
-        logger.info(f"Processing {len(users_data)} users from users.json...")
+        from cogs.helpers.bot_state import BotStateDb
         from cogs.users.user_utils import process_users_data
         from cogs.users.db import UsersDb
-        
+
+        bot_state = BotStateDb(pool)
+        users_json_hash = hashlib.sha256(users_json).hexdigest()
+        if await bot_state.get(USERS_JSON_HASH_KEY) == users_json_hash:
+            logger.info(f"{users_json_path} unchanged since the last load, skipping user loading")
+            return
+
+        # Process users
+        logger.info(f"Processing {len(users_data)} users from users.json...")
         users_db = UsersDb(pool)
-        processed_count, updated_count, errors = await process_users_data(users_db, users_data)
+        processed_count, updated_count, unchanged_count, errors = await process_users_data(users_db, users_data)
+        # Only remember a clean load, so bad entries keep being reported until they're fixed
+        if not errors:
+            await bot_state.set(USERS_JSON_HASH_KEY, users_json_hash)
         
         # Log results
         logger.info(f"User loading completed:")
         logger.info(f"  New users created: {processed_count}")
         logger.info(f"  Existing users updated: {updated_count}")
-        logger.info(f"  Total processed: {processed_count + updated_count}")
+        logger.info(f"  Unchanged: {unchanged_count}")
         
         if errors:
             logger.warning(f"  Errors encountered: {len(errors)}")
@@ -90,7 +111,8 @@ async def load_users_from_json():
     except Exception as e:
         logger.error(f"Error during user loading: {e}")
     finally:
-        await pool.close()
+        if owns_pool:
+            await pool.close()
 
 if __name__ == "__main__":
     asyncio.run(load_users_from_json())
\ No newline at end of file
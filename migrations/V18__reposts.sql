@@ -0,0 +1,12 @@
+-- Links seen per channel for repost detection, keyed by a 64-bit hash of the canonical url
+CREATE TABLE reposts (
+    channel_id BIGINT NOT NULL,
+    link_hash BIGINT NOT NULL,
+    user_id BIGINT NOT NULL,
+    message_id BIGINT NOT NULL,
+    posted_at TIMESTAMP NOT NULL DEFAULT NOW(),          -- naive UTC
+    PRIMARY KEY (channel_id, link_hash)
+);
+
+-- Index for reloading / pruning the ttl window
+CREATE INDEX idx_reposts_posted_at ON reposts(posted_at);
@@ -0,0 +1,25 @@
+-- One row per continuous stay in a voice channel
+CREATE TABLE voice_sessions (
+    id BIGSERIAL PRIMARY KEY,
+    guild_id BIGINT NOT NULL,
+    user_id BIGINT NOT NULL,
+    channel_id BIGINT NOT NULL,
+    joined_at TIMESTAMP NOT NULL,                      -- naive UTC
+    left_at TIMESTAMP NOT NULL,                        -- naive UTC
+    duration_seconds INTEGER NOT NULL
+);
+
+CREATE INDEX idx_voice_sessions_guild_user ON voice_sessions(guild_id, user_id);
+CREATE INDEX idx_voice_sessions_guild_joined ON voice_sessions(guild_id, joined_at);
+
+-- Running totals per member, kept up to date as sessions are written so leaderboards never scan sessions
+CREATE TABLE voice_time_totals (
+    guild_id BIGINT NOT NULL,
+    user_id BIGINT NOT NULL,
+    total_seconds BIGINT NOT NULL DEFAULT 0,
+    session_count INTEGER NOT NULL DEFAULT 0,
+    last_seen_at TIMESTAMP,
+    PRIMARY KEY (guild_id, user_id)
+);
+
+CREATE INDEX idx_voice_time_totals_leaderboard ON voice_time_totals(guild_id, total_seconds DESC);
@@ -0,0 +1,13 @@
+-- Durable queue of messages waiting to be deleted from ten minute channels
+CREATE TABLE ten_minute_pending_deletions (
+    channel_id BIGINT NOT NULL,
+    message_id BIGINT NOT NULL,
+    guild_id BIGINT NOT NULL,
+    delete_at TIMESTAMP NOT NULL,                      -- naive UTC
+    PRIMARY KEY (channel_id, message_id)
+);
+
+CREATE INDEX idx_ten_minute_pending_deletions_delete_at ON ten_minute_pending_deletions(delete_at);
+
+-- Newest message id that made it into the queue, startup catch-up scans history after it
+ALTER TABLE ten_minute_channels ADD COLUMN last_queued_message_id BIGINT;
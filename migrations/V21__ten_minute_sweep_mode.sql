@@ -0,0 +1,2 @@
+-- Sweep mode: instead of queueing every message, periodically bulk delete whatever is older than the period
+ALTER TABLE ten_minute_channels ADD COLUMN sweep_mode BOOLEAN NOT NULL DEFAULT FALSE;
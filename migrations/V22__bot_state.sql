@@ -0,0 +1,6 @@
+-- Small key/value store for bot-level state that has to survive redeploys, e.g. the last synced command tree hash
+CREATE TABLE bot_state (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    updated_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
@@ -0,0 +1,36 @@
+-- steamid64 is looked up for every player in every cs2 match and joined against in the stats queries
+CREATE INDEX idx_users_steamid64 ON users(steamid64);
+
+-- Every change to users is broadcast on the users_changed channel so the bot's in-memory identity map
+-- stays current no matter what wrote it
+CREATE OR REPLACE FUNCTION notify_users_changed() RETURNS trigger AS $$
+DECLARE
+    changed users%ROWTYPE;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        changed := OLD;
+    ELSE
+        changed := NEW;
+    END IF;
+    PERFORM pg_notify('users_changed', json_build_object(
+        'op', TG_OP,
+        'discord_id', changed.discord_id,
+        'discord_username', changed.discord_username,
+        'steamid64', changed.steamid64
+    )::text);
+    -- a discord_id change would otherwise leave the old id behind
+    IF TG_OP = 'UPDATE' AND OLD.discord_id <> NEW.discord_id THEN
+        PERFORM pg_notify('users_changed', json_build_object(
+            'op', 'DELETE',
+            'discord_id', OLD.discord_id,
+            'discord_username', OLD.discord_username,
+            'steamid64', OLD.steamid64
+        )::text);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER users_changed
+    AFTER INSERT OR UPDATE OR DELETE ON users
+    FOR EACH ROW EXECUTE FUNCTION notify_users_changed();
@@ -0,0 +1,34 @@
+-- users changes now go out as user_updated events on the shared event bus channel instead of their own channel
+CREATE OR REPLACE FUNCTION notify_users_changed() RETURNS trigger AS $$
+DECLARE
+    changed users%ROWTYPE;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        changed := OLD;
+    ELSE
+        changed := NEW;
+    END IF;
+    PERFORM pg_notify('zhenpai_events', json_build_object(
+        'type', 'user_updated',
+        'data', json_build_object(
+            'op', TG_OP,
+            'discord_id', changed.discord_id,
+            'discord_username', changed.discord_username,
+            'steamid64', changed.steamid64
+        )
+    )::text);
+    -- a discord_id change would otherwise leave the old id behind
+    IF TG_OP = 'UPDATE' AND OLD.discord_id <> NEW.discord_id THEN
+        PERFORM pg_notify('zhenpai_events', json_build_object(
+            'type', 'user_updated',
+            'data', json_build_object(
+                'op', 'DELETE',
+                'discord_id', OLD.discord_id,
+                'discord_username', OLD.discord_username,
+                'steamid64', OLD.steamid64
+            )
+        )::text);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
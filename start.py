@@ -1,14 +1,16 @@
-import discord
+import argparse
 import logging.config
 import asyncio
 import contextlib
-from bot import Zhenpai
 from logging.handlers import RotatingFileHandler
-from aiohttp import ClientSession
-import asyncpg
+from typing import List, Optional
 import config
 import threading
-from app import app as flask_app
+from cogs.helpers.imports import import_profiler
+from cogs.helpers.sharding import parse_shard_ids
+
+# discord.py, aiohttp, asyncpg and the Flask app are imported where they're used, after
+# main() has installed the import profiler, so startup imports show up in its report
 
 def db_connection_options():
     return {
@@ -30,11 +32,25 @@ class RemoveNoise(logging.Filter):
             return False
         return True
 
+def log_filename(shard_ids: Optional[List[int]]) -> str:
+    """ info.log, or info.shards-0-3.log for a process running part of the shards so processes on
+    one host don't truncate and rotate each other's file. """
+    if shard_ids is None:
+        return 'info.log'
+    if shard_ids == list(range(shard_ids[0], shard_ids[-1] + 1)):
+        return f"info.shards-{shard_ids[0]}-{shard_ids[-1]}.log"
+    return f"info.shards-{'_'.join(map(str, shard_ids))}.log"
+
 @contextlib.contextmanager
-def setup_logging():
+def setup_logging(filename: str = 'info.log'):
+    import discord
+    from cogs.helpers.log_pipeline import JsonFormatter, LogPipeline, SamplingFilter, TextFormatter, log_buffer
+
     log = logging.getLogger()
+    pipeline = None
 
     try:
+        # adds the colored console handler to the root logger, moved behind the queue below
         discord.utils.setup_logging()
         # __enter__
         max_bytes = 32 * 1024 * 1024  # 32 MiB
@@ -43,32 +59,41 @@ def setup_logging():
         logging.getLogger('discord.state').addFilter(RemoveNoise())
 
         log.setLevel(logging.INFO)
-        handler = RotatingFileHandler(filename='info.log', encoding='utf-8', mode='w', maxBytes=max_bytes, backupCount=5)
-        dt_fmt = '%Y-%m-%d %H:%M:%S'
-        fmt = logging.Formatter('[{asctime}] [{levelname:<7}] {name}: {message}', dt_fmt, style='{')
-        handler.setFormatter(fmt)
-        log.addHandler(handler)
+        handler = RotatingFileHandler(filename=filename, encoding='utf-8', mode='w', maxBytes=max_bytes, backupCount=5)
+        handler.setFormatter(JsonFormatter())
+        log_buffer.setFormatter(TextFormatter())
+
+        pipeline = LogPipeline(log.handlers[:] + [handler, log_buffer], SamplingFilter())
+        pipeline.start(log)
 
         yield
     finally:
         # __exit__
+        if pipeline is not None:
+            pipeline.stop(log)
         handlers = log.handlers[:]
         for hdlr in handlers:
             hdlr.close()
             log.removeHandler(hdlr)
 
-async def run_bot():
+async def run_bot(cogs: Optional[List[str]] = None, shard_count: Optional[int] = None,
+                  shard_ids: Optional[List[int]] = None):
+    from aiohttp import ClientSession
+    import asyncpg
+    from bot import Zhenpai
+
     async with ClientSession() as http_client:
         async with asyncpg.create_pool(**db_connection_options()) as pool:
-            # Load users from users.json on startup
-            from load_users import load_users_from_json
-            await load_users_from_json()
-            
-            async with Zhenpai(http_client=http_client, db_pool=pool) as bot:
+            # users.json is loaded in setup_hook, on this pool
+            async with Zhenpai(http_client=http_client, db_pool=pool, cogs=cogs,
+                               shard_count=shard_count, shard_ids=shard_ids) as bot:
                 await bot._run()
 
 def start_flask():
     def run_flask():
+        # Imported on this thread so Flask and the app's dependencies load alongside the bot's startup
+        from app import app as flask_app
+
         print("Starting Flask service on port 5757")
         flask_app.run(host='0.0.0.0', port=5757, debug=False, use_reloader=False)
 
@@ -76,10 +101,27 @@ def start_flask():
     flask_thread = threading.Thread(target=run_flask, daemon=True)
     flask_thread.start()
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Run zhenpai')
+    parser.add_argument('--cogs', type=lambda value: [cog.strip() for cog in value.split(',') if cog.strip()],
+                        help='Comma separated extensions to load instead of the full list, e.g. --cogs tags,misc')
+    parser.add_argument('--no-flask', action='store_true', help="Don't start the Flask service")
+    parser.add_argument('--shard-count', type=int, default=config.SHARD_COUNT,
+                        help='Total shards across all processes, defaults to SHARD_COUNT')
+    parser.add_argument('--shards', type=parse_shard_ids, default=parse_shard_ids(config.SHARD_IDS),
+                        help='Shards this process runs, e.g. --shards 0-3, defaults to SHARD_IDS or all of them')
+    parser.add_argument('--log-file', help='Log file, defaults to info.log or one named after --shards')
+    return parser.parse_args()
+
 def main():
-    with setup_logging():
-        start_flask()
-        asyncio.run(run_bot())
+    import_profiler.install()
+    args = parse_args()
+    # The Flask service publishes to every process through the event bus, so one copy is enough
+    is_primary = args.shards is None or config.PRIMARY_SHARD_ID in args.shards
+    with setup_logging(args.log_file or log_filename(args.shards)):
+        if not args.no_flask and is_primary:
+            start_flask()
+        asyncio.run(run_bot(args.cogs, args.shard_count, args.shards))
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
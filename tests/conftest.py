@@ -0,0 +1,44 @@
+import os
+from datetime import date, datetime
+
+import pytest
+
+# config.py requires these, importing a cog package pulls in bot -> config
+os.environ.setdefault('OWNER_ID', '1')
+os.environ.setdefault('TESTING_GUILD_ID', '1')
+os.environ.setdefault('LIVE_MATCH_CHANNEL_ID', '1')
+
+
+class FakeClock:
+    """ Stands in for the `time` module so tests control time.monotonic(). """
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def fake_clock() -> FakeClock:
+    return FakeClock()
+
+
+def _make_draft_session(**overrides):
+    """ A collecting draft session for Fri/Sat 2026-07-17/18, 18:00-20:00, with any fields overridden. """
+    from cogs.draft_scheduling.db import DraftSession
+
+    fields = dict(
+        id=1, guild_id=1, channel_id=1, announcement_message_id=None, organizer_id=1, role_id=1,
+        name='draft', candidate_days=[date(2026, 7, 17), date(2026, 7, 18)], hour_start=18, hour_end=20,
+        deadline=datetime(2026, 7, 16), status='collecting', reminder_stage=0,
+        day_of_reminder_sent=False, picked_slot=None, created_at=datetime(2026, 7, 10))
+    fields.update(overrides)
+    return DraftSession(**fields)
+
+
+@pytest.fixture
+def make_draft_session():
+    return _make_draft_session
@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from cogs.draft_scheduling.constants import (
+    DAY_OF_REMINDER_HOURS_BEFORE,
+    FIRST_DM_HOURS,
+    LAST_CALL_HOURS_BEFORE_DEADLINE,
+    SECOND_DM_HOURS,
+)
+from cogs.draft_scheduling.draft_scheduling import DraftScheduling
+
+CREATED_AT = datetime(2026, 7, 10, 12)
+DEADLINE = datetime(2026, 7, 16, 12)
+
+
+def next_due(session):
+    # _next_due only looks at the session
+    return DraftScheduling._next_due(None, session)
+
+
+@pytest.mark.parametrize('reminder_stage, expected', [
+    (0, CREATED_AT + timedelta(hours=FIRST_DM_HOURS)),
+    (1, CREATED_AT + timedelta(hours=SECOND_DM_HOURS)),
+    (2, DEADLINE - timedelta(hours=LAST_CALL_HOURS_BEFORE_DEADLINE)),
+    (3, DEADLINE),
+])
+def test_collecting_session_walks_the_reminder_stages(make_draft_session, reminder_stage, expected):
+    session = make_draft_session(created_at=CREATED_AT, deadline=DEADLINE, reminder_stage=reminder_stage)
+    assert next_due(session) == expected
+
+
+def test_short_deadline_comes_before_later_reminders(make_draft_session):
+    deadline = CREATED_AT + timedelta(hours=6)
+    session = make_draft_session(created_at=CREATED_AT, deadline=deadline, reminder_stage=0)
+    assert next_due(session) == deadline - timedelta(hours=LAST_CALL_HOURS_BEFORE_DEADLINE)
+
+
+def test_decided_session_is_due_before_the_draft(make_draft_session):
+    picked = datetime.utcnow() + timedelta(days=2)
+    session = make_draft_session(status='decided', picked_slot=picked)
+    assert next_due(session) == picked - timedelta(hours=DAY_OF_REMINDER_HOURS_BEFORE)
+
+
+@pytest.mark.parametrize('overrides', [
+    dict(status='decided', picked_slot=datetime.utcnow() + timedelta(days=2), day_of_reminder_sent=True),
+    dict(status='decided', picked_slot=datetime.utcnow() - timedelta(hours=1)),
+    dict(status='decided', picked_slot=None),
+    dict(status='needs_organizer'),
+    dict(status='cancelled'),
+])
+def test_nothing_left_to_do(make_draft_session, overrides):
+    assert next_due(make_draft_session(**overrides)) is None
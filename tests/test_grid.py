@@ -0,0 +1,67 @@
+from datetime import date, datetime
+
+import pytest
+
+from cogs.draft_scheduling.db import DraftResponse
+from cogs.draft_scheduling.grid import AvailabilityGrid
+
+FRIDAY = date(2026, 7, 17)
+SATURDAY = date(2026, 7, 18)
+
+
+def make_response(user_id: int, availability, is_out: bool = False) -> DraftResponse:
+    return DraftResponse(id=None, session_id=1, user_id=user_id, is_out=is_out,
+                         availability=availability, note=None, updated_at=datetime(2026, 7, 11))
+
+
+@pytest.fixture
+def grid(make_draft_session) -> AvailabilityGrid:
+    return AvailabilityGrid(make_draft_session(), [
+        make_response(10, {FRIDAY.isoformat(): [18, 19], SATURDAY.isoformat(): [20]}),
+        make_response(20, {FRIDAY.isoformat(): [19], SATURDAY.isoformat(): [20]}),
+        make_response(30, {FRIDAY.isoformat(): [19, 20], SATURDAY.isoformat(): [20, 21]}),
+        # out, or nothing picked, don't count as responders
+        make_response(40, {FRIDAY.isoformat(): [18]}, is_out=True),
+        make_response(50, {}),
+    ])
+
+
+def test_slots_are_day_major(grid):
+    assert grid.slots[:3] == [(FRIDAY.isoformat(), 18), (FRIDAY.isoformat(), 19), (FRIDAY.isoformat(), 20)]
+    assert len(grid.slots) == 6
+
+
+def test_responders_skip_out_and_empty(grid):
+    assert grid.user_ids == [10, 20, 30]
+    assert grid.responder_count == 3
+
+
+def test_universal_slots(grid):
+    assert grid.universal_slots() == [(FRIDAY.isoformat(), 19), (SATURDAY.isoformat(), 20)]
+
+
+def test_hours_outside_the_window_are_ignored(grid):
+    assert grid.count((SATURDAY.isoformat(), 21)) == 0
+
+
+def test_ranked_by_attendance_then_earliest(grid):
+    assert grid.ranked(3) == [
+        ((FRIDAY.isoformat(), 19), 3),
+        ((SATURDAY.isoformat(), 20), 3),
+        ((FRIDAY.isoformat(), 18), 1),
+    ]
+    assert grid.best() == ((FRIDAY.isoformat(), 19), 3)
+
+
+def test_users_and_missing_at_slot(grid):
+    slot = (FRIDAY.isoformat(), 20)
+    assert grid.users_at(slot) == [30]
+    assert grid.missing_at(slot) == [10, 20]
+    assert grid.users_at(('2026-01-01', 18)) == []
+    assert grid.missing_at(('2026-01-01', 18)) == [10, 20, 30]
+
+
+def test_empty_grid(make_draft_session):
+    grid = AvailabilityGrid(make_draft_session(), [])
+    assert grid.universal_slots() == []
+    assert grid.best() is None
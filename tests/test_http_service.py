@@ -0,0 +1,106 @@
+import asyncio
+from typing import Dict, List, Optional
+
+import pytest
+
+from cogs.helpers import http_service
+from cogs.helpers.http_service import HttpService
+
+URL = 'https://api.example.com/thing'
+
+
+class FakeResponse:
+    def __init__(self, status: int, body: bytes = b'', headers: Optional[Dict[str, str]] = None):
+        self.status = status
+        self.body = body
+        self.headers = headers or {}
+        self.url = URL
+
+    async def read(self) -> bytes:
+        return self.body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeSession:
+    """ Replays queued responses and records the headers of every request. """
+    def __init__(self, responses: List[FakeResponse]):
+        self.responses = list(responses)
+        self.requests: List[Dict[str, str]] = []
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        self.requests.append(dict(headers or {}))
+        return self.responses.pop(0)
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    async def fake_sleep(seconds):
+        pass
+    monkeypatch.setattr(http_service.asyncio, 'sleep', fake_sleep)
+
+
+def run_gets(session: FakeSession, count: int, **kwargs):
+    service = HttpService(session)
+
+    async def run():
+        return [await service.get(URL, **kwargs) for _ in range(count)]
+
+    return service, asyncio.run(run())
+
+
+def test_fresh_cache_hit_makes_no_request():
+    session = FakeSession([FakeResponse(200, b'one')])
+    service, (first, second) = run_gets(session, 2, cache_ttl=60)
+    assert len(session.requests) == 1
+    assert not first.from_cache
+    assert second.from_cache and second.body == b'one'
+    assert service.stats.cache_hits == 1
+
+
+def test_stale_etag_is_revalidated_and_304_serves_cached_body():
+    session = FakeSession([
+        FakeResponse(200, b'one', {'ETag': '"v1"', 'Last-Modified': 'Mon, 19 Oct 2026 10:00:00 GMT'}),
+        FakeResponse(304),
+    ])
+    service, (first, second) = run_gets(session, 2)
+    assert session.requests[0] == {}
+    assert session.requests[1] == {'If-None-Match': '"v1"', 'If-Modified-Since': 'Mon, 19 Oct 2026 10:00:00 GMT'}
+    assert second.status == 200 and second.body == b'one' and second.from_cache
+    assert service.stats.revalidated == 1
+
+
+def test_changed_resource_replaces_the_cached_entry():
+    session = FakeSession([
+        FakeResponse(200, b'one', {'ETag': '"v1"'}),
+        FakeResponse(200, b'two', {'ETag': '"v2"'}),
+        FakeResponse(304),
+    ])
+    _, (_, second, third) = run_gets(session, 3)
+    assert second.body == b'two' and not second.from_cache
+    assert session.requests[2] == {'If-None-Match': '"v2"'}
+    assert third.body == b'two'
+
+
+def test_responses_without_validators_or_ttl_are_not_cached():
+    session = FakeSession([FakeResponse(200, b'one'), FakeResponse(200, b'two')])
+    _, (_, second) = run_gets(session, 2)
+    assert session.requests == [{}, {}]
+    assert second.body == b'two'
+
+
+def test_retries_5xx_then_returns_the_last_response():
+    session = FakeSession([FakeResponse(503), FakeResponse(200, b'ok')])
+    service, (response,) = run_gets(session, 1, retries=2)
+    assert response.status == 200
+    assert service.stats.retries == 1
+
+
+def test_retry_delay_honours_retry_after_within_the_cap():
+    assert HttpService._retry_delay(0, '3') == 3
+    assert HttpService._retry_delay(0, '999') == http_service.RETRY_MAX_SECONDS
+    assert 0 <= HttpService._retry_delay(2, 'soon') <= http_service.RETRY_BASE_SECONDS * 4
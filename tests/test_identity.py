@@ -0,0 +1,50 @@
+import asyncio
+
+from cogs.helpers.identity import Identity, IdentityMap
+
+
+class FakeEvents:
+    def subscribe(self, event_type, callback):
+        pass
+
+    def on_reconnect(self, callback):
+        pass
+
+
+class FakePool:
+    def __init__(self, rows, during_fetch=None):
+        self.rows = rows
+        self.during_fetch = during_fetch
+
+    async def fetch(self, query):
+        if self.during_fetch:
+            self.during_fetch()
+        return self.rows
+
+
+def row(discord_id, username, steamid64=None):
+    return {'discord_id': discord_id, 'discord_username': username, 'steamid64': steamid64}
+
+
+def test_apply_moves_steamid_with_the_user():
+    identities = IdentityMap(FakePool([]), FakeEvents())
+    identities.apply('INSERT', Identity(1, 'a', 100))
+    identities.apply('UPDATE', Identity(1, 'a', 200))
+    assert identities.discord_id_for(100) is None
+    assert identities.discord_id_for(200) == 1
+    identities.apply('DELETE', Identity(1, 'a', 200))
+    assert identities.username_for(1) is None
+    assert identities.name_for_steamid64(200) == 'Unknown Player'
+
+
+def test_changes_during_reload_are_kept():
+    pool = FakePool([row(1, 'a', 100), row(2, 'b', 200)])
+    identities = IdentityMap(pool, FakeEvents())
+    # written while the table is being read, the snapshot doesn't have them
+    pool.during_fetch = lambda: (identities.apply('INSERT', Identity(3, 'c', 300)),
+                                 identities.apply('DELETE', Identity(2, 'b', 200)))
+    asyncio.run(identities.reload())
+    assert sorted(identities.by_discord_id) == [1, 3]
+    assert identities.discord_id_for(300) == 3
+    assert identities.discord_id_for(200) is None
+    assert identities.discord_ids_for([100, 200, 300]) == [1, 3]
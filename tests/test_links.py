@@ -0,0 +1,46 @@
+import pytest
+
+from cogs.reposts.links import canonical_links, canonicalize, link_hash
+
+
+@pytest.mark.parametrize('url, expected', [
+    ('https://twitter.com/someone/status/123?s=20', 'https://x.com/i/status/123'),
+    ('https://x.com/other/status/123/photo/1', 'https://x.com/i/status/123'),
+    ('https://vxtwitter.com/someone/status/123', 'https://x.com/i/status/123'),
+    ('https://mobile.twitter.com/i/status/123', 'https://x.com/i/status/123'),
+    ('https://www.youtube.com/watch?v=dQw4w9WgXcQ&t=42s', 'https://youtube.com/watch?v=dQw4w9WgXcQ'),
+    ('https://youtu.be/dQw4w9WgXcQ?si=tracking', 'https://youtube.com/watch?v=dQw4w9WgXcQ'),
+    ('https://m.youtube.com/shorts/dQw4w9WgXcQ', 'https://youtube.com/watch?v=dQw4w9WgXcQ'),
+    ('https://old.reddit.com/r/games/comments/abc123/some_slug/', 'https://reddit.com/comments/abc123'),
+    ('https://redd.it/abc123', 'https://reddit.com/comments/abc123'),
+])
+def test_canonicalize_collapses_mirrors_and_tracking(url, expected):
+    assert canonicalize(url) == expected
+
+
+@pytest.mark.parametrize('url', [
+    'https://twitter.com/someone',
+    'https://youtube.com/channel/abc',
+    'https://reddit.com/r/games',
+    'https://example.com/watch?v=abc',
+    'https://youtube.com/watch?v=bad%20id',
+])
+def test_canonicalize_ignores_untracked_links(url):
+    assert canonicalize(url) is None
+
+
+def test_canonical_links_dedupes_in_order():
+    urls = [
+        'https://youtu.be/abc',
+        'https://example.com',
+        'https://x.com/a/status/1',
+        'https://www.youtube.com/watch?v=abc',
+    ]
+    assert canonical_links(urls) == ['https://youtube.com/watch?v=abc', 'https://x.com/i/status/1']
+
+
+def test_link_hash_is_stable_signed_64_bit():
+    value = link_hash('https://x.com/i/status/1')
+    assert value == link_hash('https://x.com/i/status/1')
+    assert value != link_hash('https://x.com/i/status/2')
+    assert -2 ** 63 <= value < 2 ** 63
@@ -0,0 +1,49 @@
+import logging
+
+import pytest
+
+from cogs.helpers import log_pipeline
+from cogs.helpers.log_pipeline import SAMPLED, SamplingFilter
+
+
+@pytest.fixture
+def sampling(monkeypatch, fake_clock):
+    monkeypatch.setattr(log_pipeline, 'time', fake_clock)
+    return SamplingFilter(burst=3, refill_seconds=10)
+
+
+def record(level=logging.INFO, lineno=1, extra=None):
+    rec = logging.LogRecord('zhenpai.test', level, __file__, lineno, 'polled', None, None)
+    rec.__dict__.update(extra or {})
+    return rec
+
+
+def passed(sampling, count, **kwargs):
+    return [sampling.filter(record(**kwargs)) for _ in range(count)]
+
+
+def test_records_without_opt_in_always_pass(sampling):
+    assert all(passed(sampling, 50))
+
+
+def test_burst_then_drops(sampling):
+    assert passed(sampling, 5, extra=SAMPLED) == [True, True, True, False, False]
+
+
+def test_refill_lets_one_through_with_the_suppressed_count(sampling, fake_clock):
+    passed(sampling, 5, extra=SAMPLED)
+    fake_clock.advance(10)
+    rec = record(extra=SAMPLED)
+    assert sampling.filter(rec)
+    assert rec.suppressed == 2
+    assert not sampling.filter(record(extra=SAMPLED))
+
+
+def test_call_sites_have_their_own_buckets(sampling):
+    passed(sampling, 5, extra=SAMPLED)
+    assert sampling.filter(record(lineno=2, extra=SAMPLED))
+
+
+def test_warnings_always_pass(sampling):
+    passed(sampling, 5, extra=SAMPLED)
+    assert all(passed(sampling, 5, level=logging.WARNING, extra=SAMPLED))
@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+
+from cogs.helpers import ratelimit
+from cogs.helpers.ratelimit import TokenBucket
+
+
+@pytest.fixture
+def clock(monkeypatch, fake_clock):
+    """ Fake time where asyncio.sleep just advances the clock, recording each sleep. """
+    monkeypatch.setattr(ratelimit, 'time', fake_clock)
+    fake_clock.sleeps = []
+
+    async def fake_sleep(seconds):
+        fake_clock.sleeps.append(seconds)
+        fake_clock.advance(seconds)
+
+    monkeypatch.setattr(ratelimit.asyncio, 'sleep', fake_sleep)
+    return fake_clock
+
+
+def test_burst_up_to_capacity_then_waits_for_refill(clock):
+    bucket = TokenBucket(rate=2, capacity=3)
+
+    async def run():
+        for _ in range(4):
+            await bucket.acquire()
+
+    asyncio.run(run())
+    # three tokens were ready, the fourth needed half a second at 2 tokens/s
+    assert clock.sleeps == [pytest.approx(0.5)]
+
+
+def test_refill_is_capped_at_capacity(clock):
+    bucket = TokenBucket(rate=1, capacity=2)
+    clock.advance(100)
+
+    async def run():
+        for _ in range(3):
+            await bucket.acquire()
+
+    asyncio.run(run())
+    assert clock.sleeps == [pytest.approx(1)]
+
+
+def test_pause_empties_the_bucket_until_it_ends(clock):
+    bucket = TokenBucket(rate=1, capacity=5)
+    bucket.pause(10)
+
+    asyncio.run(bucket.acquire())
+    # nothing refills while paused, then one token takes a second
+    assert sum(clock.sleeps) == pytest.approx(11)
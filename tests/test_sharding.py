@@ -0,0 +1,43 @@
+import pytest
+
+from cogs.helpers.sharding import owned_guild_sql, parse_shard_ids, shard_for_guild, validate_sharding
+
+
+@pytest.mark.parametrize('spec, expected', [
+    (None, None),
+    ('', None),
+    ('  ', None),
+    ('3', [3]),
+    ('0-3', [0, 1, 2, 3]),
+    ('0,2,4', [0, 2, 4]),
+    ('4-5, 0-1,', [0, 1, 4, 5]),
+    ('1-2,2-3', [1, 2, 3]),
+])
+def test_parse_shard_ids(spec, expected):
+    assert parse_shard_ids(spec) == expected
+
+
+@pytest.mark.parametrize('spec', ['3-1', 'a', '1-b'])
+def test_parse_shard_ids_rejects_bad_ranges(spec):
+    with pytest.raises(ValueError):
+        parse_shard_ids(spec)
+
+
+def test_shard_for_guild_uses_discords_formula():
+    guild_id = 123456789012345678
+    assert shard_for_guild(guild_id, 1) == 0
+    assert shard_for_guild(guild_id, 4) == (guild_id >> 22) % 4
+    assert all(0 <= shard_for_guild(guild_id + (n << 22), 4) < 4 for n in range(8))
+
+
+def test_owned_guild_sql():
+    assert owned_guild_sql('guild_id', '$2', '$3') == '((guild_id >> 22) % $2) = ANY($3)'
+
+
+def test_validate_sharding():
+    validate_sharding(None, None)
+    validate_sharding(4, [0, 3])
+    with pytest.raises(ValueError):
+        validate_sharding(None, [0])
+    with pytest.raises(ValueError):
+        validate_sharding(4, [4])
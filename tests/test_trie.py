@@ -0,0 +1,58 @@
+from cogs.helpers.trie import Trie
+
+
+def make_trie() -> Trie:
+    return Trie(['cat', 'cats', 'car', 'cart', 'dog', 'doge'])
+
+
+def test_insert_and_contains():
+    trie = make_trie()
+    assert len(trie) == 6
+    assert 'cat' in trie
+    assert 'ca' not in trie
+    trie.insert('cat')
+    assert len(trie) == 6
+
+
+def test_starts_with_is_sorted_and_limited():
+    trie = make_trie()
+    assert trie.starts_with('ca') == ['car', 'cart', 'cat', 'cats']
+    assert trie.starts_with('ca', limit=2) == ['car', 'cart']
+    assert trie.starts_with('x') == []
+
+
+def test_remove_keeps_words_sharing_the_path():
+    trie = make_trie()
+    assert trie.remove('cat')
+    assert 'cat' not in trie
+    assert 'cats' in trie
+    assert trie.remove('cats')
+    # the now empty c-a-t branch is pruned, car/cart are untouched
+    assert 't' not in trie.root.children['c'].children['a'].children
+    assert trie.starts_with('ca') == ['car', 'cart']
+    assert len(trie) == 4
+
+
+def test_remove_missing_word():
+    trie = make_trie()
+    assert not trie.remove('ca')
+    assert not trie.remove('horse')
+    assert len(trie) == 6
+
+
+def test_fuzzy_orders_by_distance_then_word():
+    trie = make_trie()
+    assert trie.fuzzy('cat', max_distance=1) == ['cat', 'car', 'cart', 'cats']
+    assert trie.fuzzy('dgo', max_distance=2) == ['dog', 'doge']
+
+
+def test_fuzzy_respects_max_distance_and_limit():
+    trie = make_trie()
+    assert trie.fuzzy('horse', max_distance=2) == []
+    assert trie.fuzzy('cat', max_distance=1, limit=2) == ['cat', 'car']
+
+
+def test_fuzzy_after_remove():
+    trie = make_trie()
+    trie.remove('dog')
+    assert trie.fuzzy('dog', max_distance=1) == ['doge']
@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+from cogs.helpers import TTLCache as ttl_module
+from cogs.helpers.TTLCache import TTLCache
+
+
+@pytest.fixture
+def clock(monkeypatch, fake_clock):
+    monkeypatch.setattr(ttl_module, 'time', fake_clock)
+    return fake_clock
+
+
+def test_get_set_and_missing(clock):
+    cache = TTLCache(capacity=10, ttl_seconds=60)
+    cache['a'] = 1
+    assert cache['a'] == 1
+    assert cache.get('b', 'default') == 'default'
+    # subscripting a missing key returns None, as it always has
+    assert cache['b'] is None
+    assert cache.stats.hits == 1
+    assert cache.stats.misses == 2
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = TTLCache(capacity=10, ttl_seconds=60)
+    cache.set('a', 1)
+    cache.set('b', 2, ttl_seconds=120)
+    clock.advance(60)
+    assert 'a' not in cache
+    assert cache.get('b') == 2
+    assert len(cache) == 1
+    assert cache.stats.expirations == 1
+
+
+def test_reset_key_is_not_expired_by_its_old_entry(clock):
+    cache = TTLCache(capacity=10, ttl_seconds=60)
+    cache.set('a', 1)
+    clock.advance(30)
+    cache.set('a', 2)
+    clock.advance(40)
+    assert cache.get('a') == 2
+
+
+def test_evicts_least_recently_used_at_capacity(clock):
+    cache = TTLCache(capacity=2, ttl_seconds=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert 'b' not in cache
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert cache.stats.evictions == 1
+
+
+def test_delete_and_pop(clock):
+    cache = TTLCache(capacity=10, ttl_seconds=60)
+    cache.set('a', 1)
+    assert cache.pop('a') == 1
+    assert cache.pop('a', 'gone') == 'gone'
+    with pytest.raises(KeyError):
+        del cache['a']
+
+
+def test_get_or_load_is_single_flight(clock):
+    cache = TTLCache(capacity=10, ttl_seconds=60)
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0)
+        return 'value'
+
+    async def run():
+        return await asyncio.gather(*(cache.get_or_load('key', loader) for _ in range(5)))
+
+    assert asyncio.run(run()) == ['value'] * 5
+    assert calls == 1
+    assert cache.stats.loads == 1
+    assert cache.get('key') == 'value'
+
+
+def test_get_or_load_errors_reach_every_waiter_and_are_not_cached(clock):
+    cache = TTLCache(capacity=10, ttl_seconds=60)
+
+    async def failing():
+        await asyncio.sleep(0)
+        raise ValueError('boom')
+
+    async def run():
+        return await asyncio.gather(*(cache.get_or_load('key', failing) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert 'key' not in cache
+    assert not cache._inflight